@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'src.apartments.apps.ApartmentsConfig',
     'src.booking.apps.BookingConfig',
     'src.authentication.apps.AuthenticationConfig',
+    'src.monitoring.apps.MonitoringConfig',
     #3d-party
     'rest_framework',
     'django_filters',
@@ -53,6 +54,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # EXPLAIN профайлера — после ответа и вне метрик запроса
+    # EXPLAIN des Profilers — nach der Antwort und außerhalb der Anfragemetriken
+    'src.monitoring.profiler.QueryProfilerMiddleware',
+    # латентность всего остального стека / Latenz des übrigen Stacks
+    'src.monitoring.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -111,6 +117,62 @@ else:
     }
 
 
+# Cache
+# Redis, если задан REDIS_URL (нужен пакет redis), иначе LocMemCache в памяти процесса
+# Redis, wenn REDIS_URL gesetzt ist (Paket redis erforderlich), sonst LocMemCache im Prozessspeicher
+
+REDIS_URL = env.str('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'easyrent',
+        }
+    }
+
+# TTL (сек) кэша ответов GET /listings/ для анонимов и арендаторов; 0 — выключено
+# TTL (Sek.) des Antwort-Caches für GET /listings/ für Anonyme und Mieter; 0 — deaktiviert
+LISTING_CACHE_TIMEOUT = env.int('LISTING_CACHE_TIMEOUT', default=60)
+
+# TTL (сек) календаря занятости /listings/{id}/availability/ (сбрасывается при изменении броней); 0 — выключено
+# TTL (Sek.) des Belegungskalenders /listings/{id}/availability/ (wird bei Buchungsänderungen geleert); 0 — deaktiviert
+LISTING_AVAILABILITY_CACHE_TIMEOUT = env.int('LISTING_AVAILABILITY_CACHE_TIMEOUT', default=3600)
+
+# Отложенная запись просмотров объявлений (Redis, если REDIS_URL задан, иначе память процесса)
+# Verzögertes Schreiben der Anzeigenaufrufe (Redis, falls REDIS_URL gesetzt, sonst Prozessspeicher)
+VIEW_BUFFER_ENABLED = env.bool('VIEW_BUFFER_ENABLED', default=True)
+VIEW_BUFFER_FLUSH_INTERVAL = env.float('VIEW_BUFFER_FLUSH_INTERVAL', default=5.0)
+VIEW_BUFFER_MAX_KEYS = env.int('VIEW_BUFFER_MAX_KEYS', default=1000)
+
+# Отложенная запись истории поиска (те же механизмы, что у просмотров)
+# Verzögertes Schreiben der Suchhistorie (dieselben Mechanismen wie bei Aufrufen)
+SEARCH_LOG_BUFFER_ENABLED = env.bool('SEARCH_LOG_BUFFER_ENABLED', default=True)
+SEARCH_LOG_FLUSH_INTERVAL = env.float('SEARCH_LOG_FLUSH_INTERVAL', default=5.0)
+SEARCH_LOG_MAX_KEYS = env.int('SEARCH_LOG_MAX_KEYS', default=1000)
+
+# Популярные запросы: счётчиков в сводке Space-Saving и период полураспада окна trending
+# Beliebte Suchanfragen: Zähler der Space-Saving-Zusammenfassung und Halbwertszeit des Fensters trending
+TRENDING_SEARCH_CAPACITY = env.int('TRENDING_SEARCH_CAPACITY', default=200)
+TRENDING_SEARCH_HALF_LIFE_HOURS = env.float('TRENDING_SEARCH_HALF_LIFE_HOURS', default=24)
+
+# Буферы пишет фоновый поток; False — сброс в запросе по интервалу (тесты, отладка)
+# Puffer schreibt ein Hintergrund-Thread; False — Flush in der Anfrage nach Intervall (Tests, Debugging)
+WRITE_BEHIND_BACKGROUND_FLUSH = env.bool('WRITE_BEHIND_BACKGROUND_FLUSH', default=True)
+
+# Срок хранения почасовых/дневных агрегатов просмотров (prune_listing_view_stats)
+# Aufbewahrungsfrist der stündlichen/täglichen Aufrufaggregate (prune_listing_view_stats)
+VIEW_STATS_HOUR_RETENTION_DAYS = env.int('VIEW_STATS_HOUR_RETENTION_DAYS', default=7)
+VIEW_STATS_DAY_RETENTION_DAYS = env.int('VIEW_STATS_DAY_RETENTION_DAYS', default=90)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -134,7 +196,7 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 10,
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'src.authentication.authentication.RoleJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -144,9 +206,40 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'src.throttling.AnonBrowseThrottle',
+        'src.throttling.SearchThrottle',
+    ),
+    # token bucket: "N/period" — N токенов, пополнение N за period / N Tokens, Auffüllung um N pro period
+    'DEFAULT_THROTTLE_RATES': {
+        'anon_browse': env.str('THROTTLE_RATE_ANON_BROWSE', default='120/min'),
+        'search': env.str('THROTTLE_RATE_SEARCH', default='30/min'),
+        'login': env.str('THROTTLE_RATE_LOGIN', default='10/min'),
+        'booking_create': env.str('THROTTLE_RATE_BOOKING_CREATE', default='20/hour'),
+    },
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': (
+        'src.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
+# Доля запросов с метриками (0 — выключено, 1 — все); /api/v1/metrics/ для администраторов
+# Anteil der Anfragen mit Metriken (0 — aus, 1 — alle); /api/v1/metrics/ für Administratoren
+METRICS_SAMPLE_RATE = env.float('METRICS_SAMPLE_RATE', default=1.0)
+
+# Профайлер SQL: медленные запросы и N+1 с EXPLAIN в кольцевом буфере (/api/v1/metrics/queries/)
+# SQL-Profiler: langsame Abfragen und N+1 mit EXPLAIN im Ringpuffer (/api/v1/metrics/queries/)
+PROFILER_ENABLED = env.bool('PROFILER_ENABLED', default=False)
+PROFILER_SLOW_QUERY_MS = env.float('PROFILER_SLOW_QUERY_MS', default=100.0)
+PROFILER_REPEAT_THRESHOLD = env.int('PROFILER_REPEAT_THRESHOLD', default=5)
+PROFILER_BUFFER_SIZE = env.int('PROFILER_BUFFER_SIZE', default=200)
+
+# Троттлинг (Redis Lua, если REDIS_URL задан, иначе ведро в памяти процесса)
+# Drosselung (Redis-Lua, falls REDIS_URL gesetzt, sonst Eimer im Prozessspeicher)
+THROTTLE_ENABLED = env.bool('THROTTLE_ENABLED', default=True)
+THROTTLE_LOCAL_MAX_KEYS = env.int('THROTTLE_LOCAL_MAX_KEYS', default=10000)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
     "REFRESH_TOKEN_LIFETIME": timedelta(hours=1),
@@ -170,6 +263,34 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=7),
 }
 
+# last_login при входе пишется пачками (тот же буфер, что у просмотров); Server-Timing по шагам входа
+# last_login bei der Anmeldung wird stapelweise geschrieben (derselbe Puffer wie bei Aufrufen); Server-Timing der Anmeldeschritte
+LAST_LOGIN_BUFFER_ENABLED = env.bool('LAST_LOGIN_BUFFER_ENABLED', default=True)
+LAST_LOGIN_FLUSH_INTERVAL = env.float('LAST_LOGIN_FLUSH_INTERVAL', default=5.0)
+LAST_LOGIN_MAX_KEYS = env.int('LAST_LOGIN_MAX_KEYS', default=1000)
+LOGIN_SERVER_TIMING = env.bool('LOGIN_SERVER_TIMING', default=False)
+
+# TTL (сек) эпохи авторизации в кэше. Без общего кэша (LocMemCache) сброс эпохи видит только
+# свой процесс, поэтому там по умолчанию 0 — эпоха читается из БД на каждом запросе
+# TTL (Sek.) der Autorisierungsepoche im Cache. Ohne gemeinsamen Cache (LocMemCache) sieht nur der
+# eigene Prozess das Zurücksetzen, daher standardmäßig 0 — die Epoche wird bei jeder Anfrage aus der DB gelesen
+AUTH_EPOCH_CACHE_TIMEOUT = env.int('AUTH_EPOCH_CACHE_TIMEOUT', default=300)
+AUTH_EPOCH_LOCAL_CACHE_TIMEOUT = env.int('AUTH_EPOCH_LOCAL_CACHE_TIMEOUT', default=0)
+
+# Ожидаемое число отозванных неистёкших refresh-токенов в фильтре Блума (1% ложных срабатываний);
+# фильтр работает только с общим кэшем (Redis), с LocMem каждый refresh проверяется в БД
+# Erwartete Anzahl widerrufener, nicht abgelaufener Refresh-Tokens im Bloom-Filter (1% Falsch-Positive);
+# der Filter arbeitet nur mit gemeinsamem Cache (Redis), mit LocMem wird jeder Refresh in der DB geprüft
+TOKEN_BLACKLIST_BLOOM_CAPACITY = env.int('TOKEN_BLACKLIST_BLOOM_CAPACITY', default=100000)
+
+# Полнотекстовый поиск объявлений по инвертированному индексу (ListingSearchTerm)
+# Volltextsuche in Anzeigen über den invertierten Index (ListingSearchTerm)
+LISTING_SEARCH_INDEX_ENABLED = env.bool('LISTING_SEARCH_INDEX_ENABLED', default=True)
+
+# Быстрая сериализация GET /listings/ из .values() вместо ListingDTO
+# Schnelle Serialisierung von GET /listings/ aus .values() statt ListingDTO
+LISTING_FAST_SERIALIZATION = env.bool('LISTING_FAST_SERIALIZATION', default=True)
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'EasyRent API',
     'DESCRIPTION': 'Simple API for Library management',
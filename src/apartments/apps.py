@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ApartmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'src.apartments'
+
+    def ready(self):
+        import src.apartments.signals
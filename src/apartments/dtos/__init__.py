@@ -1,6 +1,9 @@
 from src.apartments.dtos.listing import ListingDTO, ListingCompactDTO, ListingDetailDTO
+from src.apartments.dtos.rows import ListingRowMapper
 from src.apartments.dtos.review import ReviewCreateDTO, ReviewDTO
-from src.apartments.dtos.search import SearchHistoryDTO, PopularSearchDTO
+from src.apartments.dtos.search import SearchHistoryDTO, PopularSearchDTO, PopularSearchQueryDTO
+from src.apartments.dtos.view_stats import ListingViewStatsQueryDTO, ListingViewStatsDTO
+from src.apartments.dtos.availability import ListingAvailabilityQueryDTO, ListingAvailabilityDTO
 
 __all__ = [
     'ListingDTO',
@@ -8,6 +11,12 @@ __all__ = [
     'ReviewCreateDTO',
     'ReviewDTO',
     'ListingDetailDTO',
+    'ListingRowMapper',
     'SearchHistoryDTO',
-    'PopularSearchDTO'
+    'PopularSearchDTO',
+    'PopularSearchQueryDTO',
+    'ListingViewStatsQueryDTO',
+    'ListingViewStatsDTO',
+    'ListingAvailabilityQueryDTO',
+    'ListingAvailabilityDTO'
 ]
\ No newline at end of file
@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+from rest_framework import serializers
+
+DEFAULT_DAYS = 31
+MAX_DAYS = 366
+
+
+class ListingAvailabilityQueryDTO(serializers.Serializer):
+    """
+    Параметры календаря занятости: from (по умолчанию сегодня) и to
+    (по умолчанию from + 31 день), не больше года.
+
+    Parameter des Belegungskalenders: from (standardmäßig heute) und to
+    (standardmäßig from + 31 Tage), höchstens ein Jahr.
+    """
+
+    def get_fields(self):
+        # "from" — ключевое слово Python, поэтому поля не атрибутами класса
+        # "from" ist ein Python-Schlüsselwort, daher keine Klassenattribute
+        return {
+            "from": serializers.DateField(required=False),
+            "to": serializers.DateField(required=False),
+        }
+
+    def validate(self, attrs):
+        date_from = attrs.get("from") or date.today()
+        date_to = attrs.get("to") or date_from + timedelta(days=DEFAULT_DAYS)
+        if date_to <= date_from:
+            raise serializers.ValidationError({"to": "Must be later than 'from'."})
+        if (date_to - date_from).days > MAX_DAYS:
+            raise serializers.ValidationError({"to": f"The range may span at most {MAX_DAYS} days."})
+        return {"date_from": date_from, "date_to": date_to}
+
+
+class OccupiedIntervalDTO(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+
+class ListingAvailabilityDTO(serializers.Serializer):
+    """Занятые интервалы [start, end) объявления / Belegte Intervalle [start, end) einer Anzeige"""
+
+    def get_fields(self):
+        return {
+            "listing": serializers.IntegerField(),
+            "from": serializers.DateField(),
+            "to": serializers.DateField(),
+            "occupied": OccupiedIntervalDTO(many=True),
+        }
@@ -1,8 +1,10 @@
 from django.contrib.auth.models import User
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from src.apartments.dtos.review import ReviewDTO
 from src.apartments.models import Listing
+from src.apartments.services.review import ReviewService, LATEST_REVIEWS_LIMIT
 
 class LandlordDTO(serializers.ModelSerializer):
     class Meta:
@@ -47,17 +49,30 @@ class ListingDTO(ListingCompactDTO):
 
         return data
 
+class ReviewsSummaryDTO(serializers.Serializer):
+    """Сводка по отзывам объявления / Zusammenfassung der Bewertungen einer Anzeige"""
+    count = serializers.IntegerField()
+    average_rating = serializers.FloatField(allow_null=True)
+    histogram = serializers.DictField(child=serializers.IntegerField())
+
+
 class ListingDetailDTO(ListingDTO):
-    """Сериализатор для детального просмотра Listing с отзывами"""
-    reviews = ReviewDTO(many=True, read_only=True)
+    """Сериализатор для детального просмотра Listing с последними отзывами и сводкой.
+    Полный список отзывов — GET /listings/{id}/reviews/"""
+    reviews = serializers.SerializerMethodField()
+    reviews_summary = serializers.SerializerMethodField()
 
     class Meta(ListingDTO.Meta):
-        fields = ListingDTO.Meta.fields + ["reviews"]
-
-    # def to_representation(self, instance):
-    #     data = super().to_representation(instance)
-    #     # Удаляем поле listing из каждого отзыва, если оно есть
-    #     if 'reviews' in data:
-    #         for review in data['reviews']:
-    #             review.pop('listing', None)
-    #     return data
+        fields = ListingDTO.Meta.fields + ["reviews", "reviews_summary"]
+
+    @extend_schema_field(ReviewDTO(many=True))
+    def get_reviews(self, obj):
+        # latest_reviews заполняется Prefetch в ListingViewSet.get_queryset
+        reviews = getattr(obj, "latest_reviews", None)
+        if reviews is None:
+            reviews = ReviewService.reviews_queryset().filter(listing=obj)[:LATEST_REVIEWS_LIMIT]
+        return ReviewDTO(reviews, many=True).data
+
+    @extend_schema_field(ReviewsSummaryDTO)
+    def get_reviews_summary(self, obj):
+        return ReviewService.summary(obj.pk)
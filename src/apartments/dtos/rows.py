@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+from django.utils import timezone
+
+from src.apartments.dtos.listing import ListingCompactDTO
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+PRICE_QUANTUM = Decimal("0.01")
+
+
+def _price(value, tz):
+    # как DecimalField DRF при COERCE_DECIMAL_TO_STRING / wie DRF DecimalField
+    return None if value is None else format(value.quantize(PRICE_QUANTUM), "f")
+
+
+def _datetime(value, tz):
+    if value is None:
+        return None
+    if value.utcoffset() is not None:
+        value = value.astimezone(tz)
+    return value.strftime(DATETIME_FORMAT)
+
+
+# поле ListingCompactDTO → преобразование (значение, таймзона); None — как есть
+# Feld von ListingCompactDTO → Umwandlung (Wert, Zeitzone); None — unverändert
+CONVERTERS = {
+    "price": _price,
+    "created_at": _datetime,
+}
+
+LANDLORD_FIELDS = ("id", "username", "email")
+
+
+class ListingRowMapper:
+    """
+    Быстрый путь сериализации списка объявлений только для чтения.
+    Строки из .values() (с landlord через JOIN) превращаются в тот же JSON,
+    что и ListingDTO, без создания полей сериализатора на каждую строку.
+
+    Schneller, schreibgeschützter Serialisierungspfad für die Anzeigenliste.
+    Zeilen aus .values() (landlord per JOIN) ergeben dasselbe JSON wie
+    ListingDTO, ohne Serializer-Felder pro Zeile anzulegen.
+    """
+
+    def __init__(self, include_is_active: bool = False):
+        fields = [
+            field for field in ListingCompactDTO.Meta.fields
+            if include_is_active or field != "is_active"
+        ]
+        # (ключ, колонка, преобразование) вычисляются один раз
+        # (Schlüssel, Spalte, Umwandlung) werden einmal berechnet
+        self.fields = [(field, field, CONVERTERS.get(field)) for field in fields]
+        self.landlord_fields = [(field, f"landlord__{field}") for field in LANDLORD_FIELDS]
+        self.columns = fields + [column for _, column in self.landlord_fields]
+
+    def map_row(self, row: dict, tz=None) -> dict:
+        tz = tz or timezone.get_current_timezone()
+        data = {
+            key: row[column] if convert is None else convert(row[column], tz)
+            for key, column, convert in self.fields
+        }
+        data["landlord"] = {key: row[column] for key, column in self.landlord_fields}
+        return data
+
+    def map_many(self, rows) -> list[dict]:
+        # текущая таймзона один раз на страницу, а не на каждую строку
+        # aktuelle Zeitzone einmal pro Seite statt pro Zeile
+        tz = timezone.get_current_timezone()
+        map_row = self.map_row
+        return [map_row(row, tz) for row in rows]
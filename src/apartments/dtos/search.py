@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from src.apartments.models import SearchHistory
+from src.apartments.services.trending import WINDOWS
 
 
 class SearchHistoryDTO(serializers.ModelSerializer):
@@ -16,4 +17,11 @@ class PopularSearchDTO(serializers.Serializer):
     Serializer für beliebte Suchanfragen"""
 
     keyword = serializers.CharField()
-    total = serializers.IntegerField()
\ No newline at end of file
+    total = serializers.IntegerField()
+
+
+class PopularSearchQueryDTO(serializers.Serializer):
+    """Параметры запроса популярных запросов /
+    Anfrageparameter der beliebten Suchanfragen"""
+
+    window = serializers.ChoiceField(choices=WINDOWS, default="all")
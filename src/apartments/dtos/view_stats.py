@@ -0,0 +1,43 @@
+from rest_framework import serializers
+
+from src.apartments.services.view_stats import STEP, retention
+from src.choices import ViewBucketGranularity
+
+DEFAULT_PERIODS = {
+    ViewBucketGranularity.HOUR: 48,
+    ViewBucketGranularity.DAY: 30,
+}
+
+
+class ListingViewStatsQueryDTO(serializers.Serializer):
+    """Параметры запроса статистики просмотров /
+    Anfrageparameter der Aufrufstatistik"""
+    granularity = serializers.ChoiceField(
+        choices=ViewBucketGranularity.choices, default=ViewBucketGranularity.DAY
+    )
+    periods = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        granularity = attrs["granularity"]
+        # не дальше срока хранения агрегатов / nicht weiter als die Aufbewahrungsfrist der Aggregate
+        limit = retention(granularity) // STEP[granularity]
+        periods = attrs.get("periods", min(DEFAULT_PERIODS[granularity], limit))
+        if periods > limit:
+            raise serializers.ValidationError({"periods": f"At most {limit} for granularity '{granularity}'."})
+        attrs["periods"] = periods
+        return attrs
+
+
+class ViewStatsPointDTO(serializers.Serializer):
+    start = serializers.DateTimeField()
+    views = serializers.IntegerField()
+    unique_viewers = serializers.IntegerField()
+
+
+class ListingViewStatsDTO(serializers.Serializer):
+    """Ряд просмотров объявления / Aufrufzeitreihe einer Anzeige"""
+    listing = serializers.IntegerField()
+    granularity = serializers.CharField()
+    total_views = serializers.IntegerField()
+    unique_viewers = serializers.IntegerField()
+    series = ViewStatsPointDTO(many=True)
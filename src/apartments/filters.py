@@ -0,0 +1,44 @@
+from django.conf import settings
+from rest_framework.filters import SearchFilter, OrderingFilter
+
+from src.apartments.services.search_index import SearchIndexService
+
+
+def search_index_enabled() -> bool:
+    return getattr(settings, "LISTING_SEARCH_INDEX_ENABLED", True)
+
+
+class ListingSearchFilter(SearchFilter):
+    """
+    Поиск по инвертированному индексу (ListingSearchTerm) вместо ILIKE '%kw%'.
+    При LISTING_SEARCH_INDEX_ENABLED = False работает стандартный SearchFilter.
+
+    Suche über den invertierten Index (ListingSearchTerm) statt ILIKE '%kw%'.
+    Bei LISTING_SEARCH_INDEX_ENABLED = False arbeitet der Standard-SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not search_index_enabled():
+            return super().filter_queryset(request, queryset, view)
+
+        query = request.query_params.get(self.search_param, "")
+        if not query.strip():
+            return queryset
+        return SearchIndexService.search(queryset, query)
+
+
+class ListingOrderingFilter(OrderingFilter):
+    """
+    При поиске без явного ?ordering= сортирует по релевантности.
+    Sortiert bei einer Suche ohne explizites ?ordering= nach Relevanz.
+    """
+
+    def get_default_ordering(self, view):
+        request = getattr(view, "request", None)
+        if (
+            search_index_enabled()
+            and request is not None
+            and request.query_params.get(ListingSearchFilter.search_param, "").strip()
+        ):
+            return ["-search_rank", "-created_at"]
+        return super().get_default_ordering(view)
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from src.apartments.models import Listing, ACTIVE_LISTINGS
+from src.apartments.pagination import ListingKeysetPagination
+from src.apartments.views import ListingViewSet
+from src.benchmark import measure, summarize, rolled_back, seed_users, seed_listings
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark page 1 vs deep page latency of GET /listings/ "
+        "for page-number and keyset (cursor) pagination on a seeded table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=60000, help="Listings to seed (rolled back afterwards).")
+        parser.add_argument("--page", type=int, default=5000, help="Deep page number to compare with page 1.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case.")
+        parser.add_argument("--ordering", default="-created_at", help="Ordering to benchmark.")
+
+    def handle(self, *args, **options):
+        page_size = ListingKeysetPagination.page_size
+        page = options["page"]
+        needed = page * page_size
+        if options["listings"] < needed:
+            self.stderr.write(f"--listings must be at least {needed} to reach page {page}.")
+            return
+
+        with rolled_back():
+            self.stdout.write(f"Seeding {options['listings']} listings...")
+            landlord_ids = seed_users(50, prefix="bench_pagination_landlord_")
+            seed_listings(options["listings"], landlord_ids)
+
+            view = ListingViewSet.as_view({"get": "list"})
+            factory = APIRequestFactory()
+            ordering = options["ordering"]
+            deep_cursor = self._cursor_before_page(ordering, page, page_size)
+
+            cases = {
+                "page-number, page 1": {"ordering": ordering, "page": 1},
+                f"page-number, page {page}": {"ordering": ordering, "page": page},
+                "cursor, page 1": {"ordering": ordering, "pagination": "cursor"},
+                f"cursor, page {page}": {"ordering": ordering, "pagination": "cursor", "cursor": deep_cursor},
+            }
+            for name, params in cases.items():
+                def run(params=params):
+                    response = view(factory.get("/api/v1/listings/", params))
+                    assert response.status_code == 200, response.data
+
+                stats = summarize(measure(run, repeat=options["repeat"]))
+                self.stdout.write(
+                    f"{name:<28} p50={stats['p50']:8.2f}ms  p95={stats['p95']:8.2f}ms  max={stats['max']:8.2f}ms"
+                )
+
+    @staticmethod
+    def _cursor_before_page(ordering: str, page: int, page_size: int) -> str:
+        """Курсор, указывающий на последнюю запись предыдущей страницы"""
+        field = ordering.lstrip("-")
+        order_by = (ordering, "-id") if ordering.startswith("-") else (ordering, "id")
+        row = (
+            Listing.objects.filter(ACTIVE_LISTINGS)
+            .order_by(*order_by)
+            .values(field, "id")[(page - 1) * page_size - 1]
+        )
+        return ListingKeysetPagination.encode_cursor(ordering, row[field], row["id"])
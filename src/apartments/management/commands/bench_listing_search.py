@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from src.apartments.services import SearchIndexService
+from src.apartments.views import ListingViewSet
+from src.benchmark import measure, summarize, rolled_back, seed_users, seed_listings
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark GET /listings/?search= with the inverted index against the "
+        "stock SearchFilter (ILIKE '%%kw%%' over title/description/location)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=100000, help="Listings to seed, e.g. 1000000.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query.")
+        parser.add_argument(
+            "--query", action="append", dest="queries",
+            help="Search query to benchmark (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        queries = options["queries"] or ["berlin", "sunny balcony", "garden sauna munich", "renov"]
+
+        with rolled_back():
+            self.stdout.write(f"Seeding {options['listings']} listings...")
+            landlord_ids = seed_users(100, prefix="bench_search_landlord_")
+            seed_listings(options["listings"], landlord_ids)
+            self.stdout.write("Building search index...")
+            SearchIndexService.rebuild(chunk_size=2000)
+
+            view = ListingViewSet.as_view({"get": "list"})
+            factory = APIRequestFactory()
+
+            for query in queries:
+                for backend, enabled in (("SearchFilter", False), ("inverted index", True)):
+                    def run():
+                        with override_settings(LISTING_SEARCH_INDEX_ENABLED=enabled):
+                            response = view(factory.get("/api/v1/listings/", {"search": query}))
+                        assert response.status_code == 200, response.data
+                        return response
+
+                    stats = summarize(measure(run, repeat=options["repeat"]))
+                    count = run().data["count"]
+                    self.stdout.write(
+                        f"{query!r:<24} {backend:<15} hits={count:<8} "
+                        f"p50={stats['p50']:9.2f}ms  p95={stats['p95']:9.2f}ms"
+                    )
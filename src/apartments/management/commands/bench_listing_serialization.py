@@ -0,0 +1,72 @@
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from src.apartments.dtos import ListingDTO, ListingRowMapper
+from src.apartments.models import Listing, ACTIVE_LISTINGS
+from src.benchmark import measure, summarize, rolled_back, seed_users, seed_listings
+from src.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark serializing one page of GET /listings/: ListingDTO + JSONRenderer "
+        "against ListingRowMapper over .values() + FastJSONRenderer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100, help="Listings per page.")
+        parser.add_argument("--repeat", type=int, default=50, help="Timed runs per path.")
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        request = Request(APIRequestFactory().get("/api/v1/listings/"))
+        request.user = AnonymousUser()
+        mapper = ListingRowMapper(include_is_active=False)
+
+        with rolled_back():
+            landlord_ids = seed_users(max(rows // 4, 1), prefix="bench_serialize_landlord_")
+            seed_listings(rows, landlord_ids)
+            queryset = Listing.objects.filter(ACTIVE_LISTINGS).order_by("-created_at", "-id")[:rows]
+
+            def serializer_path(instances=None):
+                # как сейчас: landlord подгружается лениво для каждой строки
+                # wie bisher: landlord wird pro Zeile nachgeladen
+                instances = list(queryset) if instances is None else instances
+                data = ListingDTO(instances, many=True, context={"request": request}).data
+                return JSONRenderer().render(data)
+
+            def mapper_path(values=None):
+                values = list(queryset.values(*mapper.columns)) if values is None else values
+                return FastJSONRenderer().render(mapper.map_many(values))
+
+            if json.loads(serializer_path()) != json.loads(mapper_path()):
+                raise CommandError("ListingRowMapper output differs from ListingDTO.")
+
+            # только сериализация + рендеринг, строки уже загружены
+            # nur Serialisierung + Rendering, Zeilen sind bereits geladen
+            instances = list(queryset.select_related("landlord"))
+            values = list(queryset.values(*mapper.columns))
+
+            cases = [
+                ("queries+serialize", "ListingDTO", serializer_path),
+                ("queries+serialize", "ListingRowMapper", mapper_path),
+                ("serialize only", "ListingDTO", lambda: serializer_path(instances)),
+                ("serialize only", "ListingRowMapper", lambda: mapper_path(values)),
+            ]
+            results = {}
+            for scope, label, fn in cases:
+                stats = summarize(measure(fn, repeat=options["repeat"]))
+                results[(scope, label)] = stats
+                self.stdout.write(
+                    f"{scope:<18} {label:<17} rows={rows:<5} "
+                    f"p50={stats['p50']:8.2f}ms  p95={stats['p95']:8.2f}ms"
+                )
+
+            for scope in ("queries+serialize", "serialize only"):
+                speedup = results[(scope, "ListingDTO")]["p50"] / results[(scope, "ListingRowMapper")]["p50"]
+                self.stdout.write(self.style.SUCCESS(f"{scope}: x{speedup:.1f} faster (p50)"))
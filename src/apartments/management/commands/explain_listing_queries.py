@@ -0,0 +1,97 @@
+import itertools
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import QueryDict
+
+from src.apartments.models import Listing, ACTIVE_LISTINGS
+from src.apartments.views.listing import ListingFilter, ListingViewSet
+
+# наборы параметров ListingFilter, которые реально приходят от фронтенда
+# Parameterkombinationen von ListingFilter, die tatsächlich vom Frontend kommen
+FILTER_CASES = [
+    {},
+    {"min_price": "50"},
+    {"max_price": "200"},
+    {"min_price": "50", "max_price": "200"},
+    {"min_rooms": "2"},
+    {"max_rooms": "3"},
+    {"location": "berlin"},
+    {"housing_type": "apartment"},
+    {"housing_type": "apartment", "min_price": "50", "max_price": "200"},
+    {"available_from": "2024-03-01", "available_to": "2024-03-04"},
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN for every ListingFilter x ordering_fields combination of "
+        "GET /listings/ and fail if any plan falls back to a full table scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose-plans", action="store_true", help="Print every plan, not only failures.")
+
+    def handle(self, *args, **options):
+        orderings = [None] + [
+            f"{prefix}{field}"
+            for field, prefix in itertools.product(ListingViewSet.ordering_fields, ("", "-"))
+        ]
+
+        shapes = []
+        for params, ordering in itertools.product(FILTER_CASES, orderings):
+            queryset = ListingFilter(
+                data=QueryDict(mutable=True) | params,
+                queryset=Listing.objects.filter(ACTIVE_LISTINGS),
+            ).qs
+            order_by = [ordering] if ordering else ListingViewSet.ordering
+            label = f"active {params or '{}'} ordering={','.join(order_by)}"
+            shapes.append((label, queryset.order_by(*order_by)))
+
+        # my_listings / арендодатель: свои объявления, новые первыми
+        shapes.append(("landlord=? ordering=-created_at", Listing.objects.filter(landlord_id=1).order_by("-created_at")))
+
+        failures = []
+        for label, queryset in shapes:
+            plan = self.explain(queryset[:10])
+            full_scan = self.is_full_scan(plan)
+            if full_scan:
+                failures.append(label)
+            if full_scan or options["verbose_plans"]:
+                marker = "FULL SCAN" if full_scan else "ok"
+                self.stdout.write(f"[{marker}] {label}\n{plan}\n")
+
+        if failures:
+            raise CommandError(f"{len(failures)} of {len(shapes)} listing query shapes use a full table scan.")
+        self.stdout.write(self.style.SUCCESS(f"All {len(shapes)} listing query shapes use an index."))
+
+    @staticmethod
+    def explain(queryset) -> str:
+        if connection.vendor == "mysql":
+            return queryset.explain(format="JSON")
+        return queryset.explain()
+
+    @staticmethod
+    def is_full_scan(plan: str) -> bool:
+        table = Listing._meta.db_table
+        if connection.vendor == "sqlite":
+            pattern = rf"\bSCAN (?:TABLE )?{table}\b(?! USING (?:COVERING )?INDEX)"
+            return re.search(pattern, plan) is not None
+        if connection.vendor == "mysql":
+            return _mysql_full_scan(json.loads(plan), table)
+        if connection.vendor == "postgresql":
+            return f"Seq Scan on {table}" in plan
+        return False
+
+
+def _mysql_full_scan(node, table: str) -> bool:
+    """Ищет в JSON-плане MySQL доступ типа ALL к таблице объявлений"""
+    if isinstance(node, dict):
+        if node.get("table_name") == table and node.get("access_type") == "ALL":
+            return True
+        return any(_mysql_full_scan(value, table) for value in node.values())
+    if isinstance(node, list):
+        return any(_mysql_full_scan(value, table) for value in node)
+    return False
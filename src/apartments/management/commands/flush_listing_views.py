@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from src.apartments.services import ViewService
+
+
+class Command(BaseCommand):
+    help = (
+        "Flush buffered listing views into ListingView and Listing.views_count. "
+        "With the Redis buffer this drains the shared buffer of all processes; "
+        "the in-memory buffer is per process and flushes itself."
+    )
+
+    def handle(self, *args, **options):
+        flushed = ViewService.flush_views()
+        self.stdout.write(self.style.SUCCESS(f"Flushed {flushed} buffered view keys."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from src.apartments.services import SearchService
+
+
+class Command(BaseCommand):
+    help = (
+        "Flush buffered search keywords into SearchHistory. "
+        "With the Redis buffer this drains the shared buffer of all processes; "
+        "the in-memory buffer is per process and flushes itself."
+    )
+
+    def handle(self, *args, **options):
+        flushed = SearchService.flush_searches()
+        self.stdout.write(self.style.SUCCESS(f"Flushed {flushed} buffered search keys."))
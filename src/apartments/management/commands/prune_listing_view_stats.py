@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from src.apartments.services import ViewStatsService
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete hourly/daily listing view buckets older than "
+        "VIEW_STATS_HOUR_RETENTION_DAYS / VIEW_STATS_DAY_RETENTION_DAYS. Run daily from cron."
+    )
+
+    def handle(self, *args, **options):
+        deleted = ViewStatsService.prune()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired view buckets."))
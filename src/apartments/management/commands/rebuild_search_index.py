@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from src.apartments.models import Listing
+from src.apartments.services import SearchIndexService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the listing full-text inverted index (ListingSearchTerm) in pk chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500, help="Listings indexed per transaction.")
+        parser.add_argument("--listing", type=int, action="append", help="Only reindex these listing ids.")
+
+    def handle(self, *args, **options):
+        queryset = Listing.objects.all()
+        if options["listing"]:
+            queryset = queryset.filter(pk__in=options["listing"])
+
+        indexed = SearchIndexService.rebuild(queryset, chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} listings."))
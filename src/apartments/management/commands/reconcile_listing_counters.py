@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from src.apartments.models import Listing
+from src.apartments.services import ListingCounterService
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill / reconcile Listing.views_count and Listing.reviews_count "
+        "from ListingView and Review rows, in primary-key chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Listings updated per statement.")
+        parser.add_argument("--listing", type=int, action="append", help="Only reconcile these listing ids.")
+
+    def handle(self, *args, **options):
+        queryset = Listing.objects.all()
+        if options["listing"]:
+            queryset = queryset.filter(pk__in=options["listing"])
+
+        chunk_size = options["chunk_size"]
+        updated = 0
+        last_pk = 0
+        while True:
+            # короткие UPDATE по диапазонам pk, без длинных блокировок таблицы
+            # kurze UPDATEs über pk-Bereiche, ohne lange Tabellensperren
+            pks = list(
+                queryset.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:chunk_size]
+            )
+            if not pks:
+                break
+            updated += ListingCounterService.reconcile(Listing.objects.filter(pk__in=pks))
+            last_pk = pks[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters for {updated} listings."))
@@ -0,0 +1,97 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from src.benchmark import flush_write_buffers, forget_cached_rows, rolled_back
+from src.benchmark.dataset import DatasetGenerator
+from src.benchmark.scenarios import SCENARIOS, build_world, compare, run_scenario
+
+
+class Command(BaseCommand):
+    help = (
+        "End-to-end HTTP benchmark: drives the real URLconf and middleware in-process with scripted "
+        "scenarios (anonymous browse, listing detail, booking creation, landlord status transitions, "
+        "login/refresh) on a seeded dataset that is rolled back afterwards. Reports throughput, "
+        "p50/p95/p99 and queries per request, writes them to a JSON baseline, and fails when a "
+        "scenario regresses beyond --tolerance against an existing baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--baseline", default="benchmarks/baseline.json", help="Baseline JSON file.")
+        parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline.")
+        parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50/p95 slowdown (0.25 = +25%%).")
+        parser.add_argument("--query-slack", type=float, default=0.5,
+                            help="Allowed increase of queries per request.")
+        parser.add_argument("--repeat", type=int, default=200, help="Timed operations per scenario.")
+        parser.add_argument("--warmup", type=int, default=20, help="Untimed operations per scenario.")
+        parser.add_argument("--query-samples", type=int, default=10, help="Operations with SQL counting.")
+        parser.add_argument("--scenario", action="append", help="Only run these scenarios.")
+        parser.add_argument("--seed", type=int, default=0, help="Dataset seed.")
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--listings", type=int, default=3000)
+        parser.add_argument("--bookings", type=int, default=10000)
+        parser.add_argument("--views", type=int, default=30000)
+        parser.add_argument("--searches", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        scenarios = [cls for cls in SCENARIOS if not options["scenario"] or cls.name in options["scenario"]]
+        if not scenarios:
+            raise CommandError(f"Unknown scenario; choose from {', '.join(cls.name for cls in SCENARIOS)}.")
+
+        generator = DatasetGenerator(prefix="bench_e2e_", seed=options["seed"])
+        if generator.exists():
+            raise CommandError("Users with prefix 'bench_e2e_' already exist; remove them first.")
+
+        # без внешних сервисов и фоновых потоков: буферы сбрасываются в том же соединении
+        # ohne externe Dienste und Hintergrund-Threads: Puffer werden in derselben Verbindung geleert
+        overrides = {
+            "ALLOWED_HOSTS": ["*"],
+            "THROTTLE_ENABLED": False,
+            "PROFILER_ENABLED": False,
+            "WRITE_BEHIND_BACKGROUND_FLUSH": False,
+        }
+        results = {}
+        with override_settings(**overrides):
+            # чужие отложенные приращения — в БД до транзакции, которая будет откачена
+            # fremde ausstehende Inkremente — in die DB vor der Transaktion, die zurückgerollt wird
+            flush_write_buffers()
+            with rolled_back():
+                self.stdout.write(f"Seeding dataset on {connection.vendor}...")
+                world = build_world(
+                    generator, options["users"], options["listings"], options["bookings"],
+                    options["views"], options["searches"],
+                )
+                listing_ids = list(generator.listings().values_list("pk", flat=True))
+                forget_cached_rows()
+                for cls in scenarios:
+                    result = run_scenario(cls(world), options["repeat"], options["warmup"], options["query_samples"])
+                    results[cls.name] = result
+                    self.stdout.write(
+                        f"{cls.name:<28} {result['throughput_rps']:8.1f} req/s  p50={result['p50_ms']:8.2f}ms  "
+                        f"p95={result['p95_ms']:8.2f}ms  p99={result['p99_ms']:8.2f}ms  "
+                        f"queries/req={result['queries_per_request']}"
+                    )
+                # приращения прогона пишутся в транзакцию и откатываются вместе с ней
+                # Inkremente des Laufs werden in die Transaktion geschrieben und mit ihr zurückgerollt
+                flush_write_buffers()
+        # ответы, календари и эпохи откаченных строк / Antworten, Kalender und Epochen zurückgerollter Zeilen
+        forget_cached_rows(listing_ids, generator.tenant_ids + generator.landlord_ids)
+
+        path = Path(options["baseline"])
+        if options["update_baseline"] or not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            document = {"vendor": connection.vendor, "scenarios": results}
+            path.write_text(json.dumps(document, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {path}."))
+            return
+
+        baseline = json.loads(path.read_text())
+        if baseline.get("vendor") != connection.vendor:
+            self.stderr.write(f"Baseline was recorded on {baseline.get('vendor')}, running on {connection.vendor}.")
+        regressions = compare(results, baseline["scenarios"], options["tolerance"], options["query_slack"])
+        if regressions:
+            raise CommandError("Performance regressions:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {path} (tolerance {options['tolerance']:.0%})."))
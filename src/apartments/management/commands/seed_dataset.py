@@ -0,0 +1,81 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from src.apartments.services import TrendingSearchService
+from src.benchmark import flush_write_buffers, forget_cached_rows
+from src.benchmark.dataset import DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic, seed-deterministic dataset at production scale: users with profiles, "
+        "listings with Zipfian popularity, seasonal bookings, reviews, ListingView and SearchHistory "
+        "rows. Inserts with chunked bulk_create (no per-user post_save signals), then reconciles "
+        "listing counters, rebuilds the search index and the all-time trending searches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20000, help="Users (5%% landlords, the rest tenants).")
+        parser.add_argument("--listings", type=int, default=50000, help="Listings.")
+        parser.add_argument("--bookings", type=int, default=500000,
+                            help="Booking attempts; overlapping ones are dropped.")
+        parser.add_argument("--views", type=int, default=1000000, help="ListingView rows.")
+        parser.add_argument("--searches", type=int, default=200000, help="SearchHistory rows.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; same seed, same data.")
+        parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of listing popularity.")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per bulk_create chunk.")
+        parser.add_argument("--prefix", default="seed_", help="Username prefix of seeded users.")
+        parser.add_argument("--flush", action="store_true", help="Delete previously seeded data with this prefix first.")
+        parser.add_argument("--skip-index", action="store_true", help="Do not rebuild the search index.")
+
+    def handle(self, *args, **options):
+        if options["users"] < 2 or options["listings"] < 1:
+            raise CommandError("Need at least 2 users and 1 listing.")
+
+        generator = DatasetGenerator(
+            prefix=options["prefix"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            zipf_exponent=options["zipf"],
+            log=lambda message: self.stdout.write(f"  {message}"),
+        )
+        stale_user_ids = []
+        if generator.exists():
+            if not options["flush"]:
+                raise CommandError(
+                    f"Users with prefix {options['prefix']!r} already exist; use --flush or another --prefix."
+                )
+            # отложенные приращения записываются до удаления строк, на которые ссылаются
+            # ausstehende Inkremente werden vor dem Löschen der referenzierten Zeilen geschrieben
+            flush_write_buffers()
+            stale_user_ids = list(
+                User.objects.filter(username__startswith=options["prefix"]).values_list("pk", flat=True)
+            )
+            self.stdout.write(f"Deleted {generator.delete()} previously seeded rows.")
+
+        started = time.perf_counter()
+        counts = generator.generate(
+            users=options["users"],
+            listings=options["listings"],
+            bookings=options["bookings"],
+            views=options["views"],
+            searches=options["searches"],
+        )
+
+        # views_count / reviews_count из вставленных строк / aus den eingefügten Zeilen
+        call_command("reconcile_listing_counters", stdout=self.stdout)
+        if not options["skip_index"]:
+            call_command("rebuild_search_index", stdout=self.stdout)
+        # SearchHistory вставлена в обход record / SearchHistory wurde am record vorbei eingefügt
+        TrendingSearchService.rebuild()
+        # bulk_create не шлёт сигналов — сбрасываем только свои ключи, не весь кэш
+        # bulk_create sendet keine Signale — nur eigene Schlüssel verwerfen, nicht den ganzen Cache
+        forget_cached_rows(generator.listings().values_list("pk", flat=True), stale_user_ids)
+
+        summary = ", ".join(f"{name}={count}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {summary} in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Listing = apps.get_model('apartments', 'Listing')
+    ListingView = apps.get_model('apartments', 'ListingView')
+    Review = apps.get_model('apartments', 'Review')
+
+    views = (
+        ListingView.objects.filter(listing=OuterRef('pk'))
+        .values('listing')
+        .annotate(total=Sum('view_count'))
+        .values('total')
+    )
+    reviews = (
+        Review.objects.filter(listing=OuterRef('pk'))
+        .values('listing')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Listing.objects.update(
+        views_count=Coalesce(Subquery(views), Value(0)),
+        reviews_count=Coalesce(Subquery(reviews), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0005_searchhistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='views_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0006_listing_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Term')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='Weight')),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='apartments.listing', verbose_name='Listing')),
+            ],
+            options={
+                'verbose_name': 'Listing Search Term',
+                'verbose_name_plural': 'Listing Search Terms',
+                'indexes': [models.Index(fields=['term', 'listing'], name='listing_search_term_idx')],
+                'unique_together': {('listing', 'term')},
+            },
+        ),
+    ]
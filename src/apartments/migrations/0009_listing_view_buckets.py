@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0008_listing_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingViewBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Stunde'), ('day', 'Tag')], max_length=4, verbose_name='Granularity')),
+                ('bucket_start', models.DateTimeField(verbose_name='Bucket Start')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='Views')),
+                ('viewers_sketch', models.BinaryField(verbose_name='Unique Viewers Sketch')),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_buckets', to='apartments.listing', verbose_name='Listing')),
+            ],
+            options={
+                'verbose_name': 'Listing View Bucket',
+                'verbose_name_plural': 'Listing View Buckets',
+                'indexes': [models.Index(fields=['granularity', 'bucket_start'], name='listing_view_bucket_age_idx')],
+                'unique_together': {('listing', 'granularity', 'bucket_start')},
+            },
+        ),
+    ]
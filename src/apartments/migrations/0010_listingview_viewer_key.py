@@ -0,0 +1,67 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:02
+
+from django.db import migrations, models
+from django.db.models import CharField, Count, Exists, Min, OuterRef, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Concat
+
+
+def backfill_viewer_key(apps, schema_editor):
+    """
+    Заполняет viewer_key одним UPDATE и сливает дубликаты, которые старый
+    ключ с NULL пропускал (анонимные просмотры одного IP): суммы — в самую
+    раннюю строку группы, остальные строки — одним DELETE.
+
+    Füllt viewer_key mit einem UPDATE und führt Duplikate zusammen, die der
+    alte Schlüssel mit NULL durchließ (anonyme Aufrufe derselben IP): Summen in
+    die früheste Zeile der Gruppe, die übrigen Zeilen mit einem DELETE.
+    """
+    ListingView = apps.get_model('apartments', 'ListingView')
+    ListingView.objects.update(viewer_key=Concat(
+        Coalesce(Cast('user_id', CharField()), Value('')),
+        Value('|'),
+        Coalesce('ip_address', Value(''), output_field=CharField()),
+        output_field=CharField(),
+    ))
+
+    duplicates = (
+        ListingView.objects
+        .order_by()
+        .values('listing_id', 'viewer_key')
+        .annotate(rows=Count('id'), keep=Min('id'), total=Sum('view_count'))
+        .filter(rows__gt=1)
+        .values_list('keep', 'total')
+    )
+    ListingView.objects.bulk_update(
+        [ListingView(pk=keep, view_count=total) for keep, total in duplicates.iterator()],
+        ['view_count'],
+        batch_size=500,
+    )
+    earlier = ListingView.objects.filter(
+        listing_id=OuterRef('listing_id'), viewer_key=OuterRef('viewer_key'), id__lt=OuterRef('id'),
+    )
+    ListingView.objects.filter(Exists(earlier)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0009_listing_view_buckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listingview',
+            name='viewer_key',
+            field=models.CharField(default='', editable=False, max_length=80, verbose_name='Viewer Key'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_viewer_key, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='listingview',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='listingview',
+            constraint=models.UniqueConstraint(fields=('listing', 'viewer_key'), name='listingview_viewer_unique'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:20
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, F, Min, OuterRef, Sum
+
+
+def backfill_user_key(apps, schema_editor):
+    """
+    Заполняет user_key одним UPDATE и сливает анонимные дубликаты запроса
+    (user NULL уникальный ключ не ловил): суммы — в самую раннюю строку,
+    остальные строки — одним DELETE.
+
+    Füllt user_key mit einem UPDATE und führt anonyme Duplikate einer Anfrage
+    zusammen (user NULL erfasste der eindeutige Schlüssel nicht): Summen in die
+    früheste Zeile, die übrigen Zeilen mit einem DELETE.
+    """
+    SearchHistory = apps.get_model('apartments', 'SearchHistory')
+    SearchHistory.objects.filter(user__isnull=False).update(user_key=F('user_id'))
+
+    duplicates = (
+        SearchHistory.objects
+        .filter(user__isnull=True)
+        .order_by()
+        .values('keyword')
+        .annotate(rows=Count('id'), keep=Min('id'), total=Sum('search_count'))
+        .filter(rows__gt=1)
+        .values_list('keep', 'total')
+    )
+    SearchHistory.objects.bulk_update(
+        [SearchHistory(pk=keep, search_count=total) for keep, total in duplicates.iterator()],
+        ['search_count'],
+        batch_size=500,
+    )
+    earlier = SearchHistory.objects.filter(user__isnull=True, keyword=OuterRef('keyword'), id__lt=OuterRef('id'))
+    SearchHistory.objects.filter(Exists(earlier), user__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0010_listingview_viewer_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchhistory',
+            name='user_key',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='User Key'),
+        ),
+        migrations.RunPython(backfill_user_key, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='searchhistory',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='searchhistory',
+            constraint=models.UniqueConstraint(fields=('keyword', 'user_key'), name='searchhistory_keyword_user_unique'),
+        ),
+    ]
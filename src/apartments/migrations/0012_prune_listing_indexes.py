@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0011_searchhistory_user_key'),
+    ]
+
+    # один индекс на путь доступа: частичные индексы дублировали составные (is_active, ...)
+    # и не создаются в MySQL, отдельный индекс views_count удорожал каждый сброс просмотров
+    # ein Index je Zugriffspfad: die partiellen Indizes doppelten die zusammengesetzten
+    # (is_active, ...) und werden in MySQL nicht angelegt, der eigene views_count-Index
+    # verteuerte jeden View-Flush
+    operations = [
+        migrations.AlterField(
+            model_name='listing',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_live_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_live_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_live_type_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_live_rooms_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_live_views_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_live_reviews_idx',
+        ),
+    ]
@@ -1,11 +1,16 @@
-from src.apartments.models.listing import Listing
+from src.apartments.models.listing import Listing, ACTIVE_LISTINGS
 from src.apartments.models.review import Review
 from src.apartments.models.listingview import ListingView
 from src.apartments.models.search_history import SearchHistory
+from src.apartments.models.search_index import ListingSearchTerm
+from src.apartments.models.view_bucket import ListingViewBucket
 
 __all__ = [
     'Listing',
+    'ACTIVE_LISTINGS',
     'Review',
     'ListingView',
-    'SearchHistory'
-]
\ No newline at end of file
+    'SearchHistory',
+    'ListingSearchTerm',
+    'ListingViewBucket'
+]
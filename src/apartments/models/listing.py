@@ -1,8 +1,17 @@
 from django.db import models
+from django.db.models import Q, Value
 from django.contrib.auth.models import User
 
 from src.choices import HousingType
 
+# is_active=True Django компилирует в "WHERE is_active", а SQLite такое условие
+# с индексами (is_active, ...) не сопоставляет; сравнение со значением даёт
+# "is_active = 1" на всех бэкендах
+# Django kompiliert is_active=True zu "WHERE is_active", was SQLite nicht mit den
+# Indizes (is_active, ...) abgleicht; der Vergleich mit einem Wert ergibt
+# "is_active = 1" auf allen Backends
+ACTIVE_LISTINGS = Q(is_active=Value(True))
+
 class Listing(models.Model):
     landlord = models.ForeignKey(User, on_delete=models.CASCADE, related_name="listings")
     title = models.CharField(max_length=255)
@@ -14,6 +23,27 @@ class Listing(models.Model):
     is_active = models.BooleanField(default=True)
     cancellation_deadline_days = models.PositiveIntegerField(default=3)
     created_at = models.DateTimeField(auto_now_add=True)
+    # денормализованные счётчики, обновляются атомарными инкрементами; сортировку
+    # покрывают индексы Meta, отдельный индекс только удорожал бы каждый сброс просмотров
+    # denormalisierte Zähler, werden durch atomare Inkremente aktualisiert; die Sortierung
+    # decken die Meta-Indizes ab, ein eigener Index würde jeden View-Flush nur verteuern
+    views_count = models.PositiveIntegerField(default=0)
+    reviews_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # под реальные запросы ListingViewSet (ACTIVE_LISTINGS + фильтр/сортировка);
+            # по одному индексу на путь доступа, частичные индексы MySQL не поддерживает
+            # für die realen Abfragen von ListingViewSet (ACTIVE_LISTINGS + Filter/Sortierung);
+            # ein Index je Zugriffspfad, partielle Indizes unterstützt MySQL nicht
+            models.Index(fields=["is_active", "created_at"], name="listing_active_created_idx"),
+            models.Index(fields=["is_active", "price"], name="listing_active_price_idx"),
+            models.Index(fields=["is_active", "housing_type", "price"], name="listing_active_type_price_idx"),
+            models.Index(fields=["is_active", "rooms"], name="listing_active_rooms_idx"),
+            models.Index(fields=["is_active", "views_count"], name="listing_active_views_idx"),
+            models.Index(fields=["is_active", "reviews_count"], name="listing_active_reviews_idx"),
+            models.Index(fields=["landlord", "created_at"], name="listing_landlord_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.price}"
@@ -30,12 +30,27 @@ class ListingView(models.Model):
         default=1,
         verbose_name="View Count"
     )
-    
+    # "user_id|ip" без NULL: уникальный ключ ловит и анонимные строки, поэтому
+    # пачка просмотров пишется одним INSERT ... ON CONFLICT
+    # "user_id|ip" ohne NULL: der eindeutige Schlüssel erfasst auch anonyme Zeilen,
+    # daher wird ein Stapel Aufrufe mit einem INSERT ... ON CONFLICT geschrieben
+    viewer_key = models.CharField(
+        max_length=80,
+        editable=False,
+        verbose_name="Viewer Key"
+    )
+
     class Meta:
         verbose_name = "Listing View"
         verbose_name_plural = "Listing Views"
-        unique_together = ("listing", "user", "ip_address")
-        
+        constraints = [
+            models.UniqueConstraint(fields=["listing", "viewer_key"], name="listingview_viewer_unique"),
+        ]
+
+    @staticmethod
+    def key_for(user_id, ip_address) -> str:
+        return f"{user_id or ''}|{ip_address or ''}"
+
     def __str__(self):
         viewer = self.user.username if self.user else self.ip_address
         return f"{viewer} - {self.listing} (просмотров: {self.view_count})"
\ No newline at end of file
@@ -10,6 +10,15 @@ class SearchHistory(models.Model):
         blank=True,
         verbose_name="User"
     )
+    # id пользователя, 0 — аноним: в отличие от NULL ловится уникальным ключом,
+    # поэтому пачка запросов пишется одним INSERT ... ON CONFLICT
+    # Benutzer-ID, 0 — anonym: anders als NULL greift der eindeutige Schlüssel,
+    # daher wird ein Stapel Suchanfragen mit einem INSERT ... ON CONFLICT geschrieben
+    user_key = models.PositiveBigIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="User Key"
+    )
     keyword = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     search_count = models.PositiveIntegerField(
@@ -19,8 +28,14 @@ class SearchHistory(models.Model):
     class Meta:
         verbose_name = "Search View"
         verbose_name_plural = "Search Views"
-        unique_together = ("keyword", "user")
+        constraints = [
+            models.UniqueConstraint(fields=["keyword", "user_key"], name="searchhistory_keyword_user_unique"),
+        ]
         ordering = ["-created_at"]
 
+    @staticmethod
+    def key_for(user_id) -> int:
+        return user_id or 0
+
     def __str__(self):
         return f"{self.user.username} → {self.keyword}"
\ No newline at end of file
@@ -0,0 +1,31 @@
+from django.db import models
+from src.apartments.models.listing import Listing
+
+
+class ListingSearchTerm(models.Model):
+    """
+    Инвертированный индекс для полнотекстового поиска объявлений.
+    Одна строка на (объявление, термин) с суммарным весом по полям.
+
+    Invertierter Index für die Volltextsuche in Anzeigen.
+    Eine Zeile pro (Anzeige, Begriff) mit dem summierten Gewicht über die Felder.
+    """
+    listing = models.ForeignKey(
+        Listing,
+        on_delete=models.CASCADE,
+        related_name="search_terms",
+        verbose_name="Listing"
+    )
+    term = models.CharField(max_length=64, verbose_name="Term")
+    weight = models.PositiveIntegerField(default=1, verbose_name="Weight")
+
+    class Meta:
+        verbose_name = "Listing Search Term"
+        verbose_name_plural = "Listing Search Terms"
+        unique_together = ("listing", "term")
+        indexes = [
+            models.Index(fields=["term", "listing"], name="listing_search_term_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.term} → {self.listing_id} ({self.weight})"
@@ -0,0 +1,41 @@
+from django.db import models
+
+from src.apartments.models.listing import Listing
+from src.choices import ViewBucketGranularity
+
+
+class ListingViewBucket(models.Model):
+    """
+    Агрегат просмотров объявления за час или день: число просмотров и
+    HyperLogLog-скетч уникальных зрителей (фиксированный размер).
+
+    Aggregat der Aufrufe einer Anzeige pro Stunde oder Tag: Anzahl der Aufrufe
+    und HyperLogLog-Sketch der eindeutigen Betrachter (feste Größe).
+    """
+    listing = models.ForeignKey(
+        Listing,
+        on_delete=models.CASCADE,
+        related_name="view_buckets",
+        verbose_name="Listing"
+    )
+    granularity = models.CharField(
+        max_length=4,
+        choices=ViewBucketGranularity.choices,
+        verbose_name="Granularity"
+    )
+    bucket_start = models.DateTimeField(verbose_name="Bucket Start")
+    views = models.PositiveIntegerField(default=0, verbose_name="Views")
+    viewers_sketch = models.BinaryField(verbose_name="Unique Viewers Sketch")
+
+    class Meta:
+        verbose_name = "Listing View Bucket"
+        verbose_name_plural = "Listing View Buckets"
+        # уникальность служит и индексом для выборки ряда
+        # die Eindeutigkeit dient auch als Index für die Zeitreihenabfrage
+        unique_together = ("listing", "granularity", "bucket_start")
+        indexes = [
+            models.Index(fields=["granularity", "bucket_start"], name="listing_view_bucket_age_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.listing_id} {self.granularity} {self.bucket_start:%Y-%m-%d %H:%M} ({self.views})"
@@ -0,0 +1,208 @@
+import base64
+import binascii
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+# пределы BIGINT: большее значение в WHERE — ошибка БД, а не 400
+# BIGINT-Grenzen: ein größerer Wert im WHERE ist ein DB-Fehler statt 400
+BIGINT_MIN, BIGINT_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def _parse_int(value):
+    if isinstance(value, bool):
+        raise TypeError(value)
+    parsed = int(value)
+    if not BIGINT_MIN <= parsed <= BIGINT_MAX:
+        raise ValueError(value)
+    return parsed
+
+
+def _parse_decimal(value):
+    parsed = Decimal(value)
+    if not parsed.is_finite():
+        raise ValueError(value)
+    return parsed
+
+
+def _parse_datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+class ListingKeysetPagination(BasePagination):
+    """
+    Keyset (cursor) пагинация для списка объявлений.
+    Позиция кодируется как пара (значение поля сортировки, id), поэтому
+    запрос следующей страницы — это индексируемое условие WHERE вместо OFFSET,
+    а COUNT(*) не выполняется вовсе.
+
+    Keyset-(Cursor-)Paginierung für die Anzeigenliste.
+    Die Position wird als Paar (Wert des Sortierfelds, id) kodiert, daher ist
+    die nächste Seite eine indexierbare WHERE-Bedingung statt OFFSET,
+    und COUNT(*) wird gar nicht ausgeführt.
+
+    Ссылка previous ведёт назад: курсор с флагом «r» читает тот же индекс
+    в обратном порядке / Der Link previous führt zurück: ein Cursor mit dem
+    Flag „r“ liest denselben Index in umgekehrter Reihenfolge.
+
+    Включается параметром ?pagination=cursor / Aktivierung mit ?pagination=cursor
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    default_ordering = "-created_at"
+
+    # поле сортировки → функция разбора значения из курсора
+    # Sortierfeld → Funktion zum Parsen des Werts aus dem Cursor
+    ordering_fields = {
+        "created_at": _parse_datetime,
+        "price": _parse_decimal,
+        "views_count": _parse_int,
+    }
+
+    invalid_cursor_message = "Invalid cursor"
+
+    @staticmethod
+    def is_requested(request) -> bool:
+        """Запрошен ли режим курсора / Ob der Cursor-Modus angefordert wurde"""
+        params = request.query_params
+        return params.get("pagination") == "cursor" or "cursor" in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(request)
+        field = self.ordering.lstrip("-")
+        position = self.decode_cursor(request)
+        reverse = position is not None and position[2]
+        # предыдущая страница — тот же запрос в обратном порядке
+        # die vorherige Seite ist dieselbe Abfrage in umgekehrter Reihenfolge
+        descending = self.ordering.startswith("-") != reverse
+
+        if descending:
+            queryset = queryset.order_by(f"-{field}", "-id")
+        else:
+            queryset = queryset.order_by(field, "id")
+
+        if position is not None:
+            value, pk, _ = position
+            lookup = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{field}__{lookup}": value})
+                | Q(**{field: value, f"id__{lookup}": pk})
+            )
+
+        # берём на одну запись больше, чтобы узнать, есть ли следующая страница
+        # eine Zeile mehr holen, um zu wissen, ob es eine nächste Seite gibt
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_ordering(self, request) -> str:
+        """
+        Первое поле из ?ordering=, если оно поддерживается, иначе -created_at.
+        Erstes Feld aus ?ordering=, falls unterstützt, sonst -created_at.
+        """
+        param = request.query_params.get(self.ordering_query_param, "")
+        first = param.split(",")[0].strip()
+        if first.lstrip("-") in self.ordering_fields:
+            return first
+        return self.default_ordering
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.link_from(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.link_from(self.page[0], reverse=True)
+
+    def link_from(self, row, reverse: bool) -> str:
+        cursor = self.encode_cursor(
+            self.ordering,
+            _row_value(row, self.ordering.lstrip("-")),
+            _row_value(row, "id"),
+            reverse=reverse,
+        )
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    @staticmethod
+    def encode_cursor(ordering: str, value, pk, reverse: bool = False) -> str:
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        payload = {"o": ordering, "v": value, "id": pk}
+        if reverse:
+            payload["r"] = 1
+        payload = json.dumps(payload, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            if payload["o"] != self.ordering:
+                raise ValueError(payload["o"])
+            parse = self.ordering_fields[self.ordering.lstrip("-")]
+            reverse = payload.get("r", 0)
+            if reverse not in (0, 1):
+                raise ValueError(reverse)
+            return parse(payload["v"]), _parse_int(payload["id"]), bool(reverse)
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError, InvalidOperation):
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+
+
+def _row_value(row, field):
+    if isinstance(row, dict):
+        return row[field]
+    return getattr(row, field)
+
+
+class ReviewCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация отзывов объявления, новые первыми.
+    Cursor-Paginierung der Bewertungen einer Anzeige, neueste zuerst.
+    """
+    page_size = api_settings.PAGE_SIZE
+    ordering = ("-created_at", "-id")
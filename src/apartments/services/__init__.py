@@ -1,2 +1,8 @@
 from src.apartments.services.view import ViewService
-from src.apartments.services.search import SearchService
\ No newline at end of file
+from src.apartments.services.search import SearchService
+from src.apartments.services.counters import ListingCounterService
+from src.apartments.services.search_index import SearchIndexService
+from src.apartments.services.cache import ListingCacheService
+from src.apartments.services.review import ReviewService
+from src.apartments.services.view_stats import ViewStatsService
+from src.apartments.services.trending import TrendingSearchService
@@ -0,0 +1,210 @@
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Callable, Hashable
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+FlushCallback = Callable[[dict], None]
+
+# снимает блокировку, только если она всё ещё наша / gibt die Sperre nur frei, wenn sie noch uns gehört
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class WriteBehindBuffer:
+    """
+    Буфер отложенной записи: суммирует приращения по ключу в памяти процесса
+    и раз в interval секунд (или при max_keys ключах) отдаёт их в flush_callback
+    одной пачкой (фоновый поток-демон, переполнение или выход процесса).
+    При падении процесса теряется не больше одного окна.
+
+    Write-Behind-Puffer: summiert Inkremente pro Schlüssel im Prozessspeicher
+    und übergibt sie alle interval Sekunden (oder bei max_keys Schlüsseln)
+    gesammelt an flush_callback (Daemon-Thread, Überlauf oder Prozessende).
+    Bei einem Absturz geht höchstens ein Fenster verloren.
+    """
+
+    def __init__(self, name: str, flush_callback: FlushCallback, interval: float = 5.0,
+                 max_keys: int = 1000, background: bool = True):
+        self.name = name
+        self.flush_callback = flush_callback
+        self.interval = interval
+        self.max_keys = max_keys
+        self.background = background
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def add(self, key: Hashable, amount: int = 1) -> None:
+        if self.background and self._thread is None:
+            self._start_thread()
+        with self._lock:
+            self._pending[key] += amount
+            # с фоновым потоком запрос сбрасывает буфер только при переполнении
+            # mit Hintergrund-Thread flusht die Anfrage den Puffer nur bei Überlauf
+            due = len(self._pending) >= self.max_keys or (
+                not self.background and time.monotonic() - self._last_flush >= self.interval
+            )
+        if due:
+            self.flush()
+
+    def pending(self) -> dict:
+        """Ещё не записанные приращения / Noch nicht geschriebene Inkremente"""
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self) -> int:
+        """Записывает накопленное, возвращает число ключей /
+        Schreibt das Gesammelte, gibt die Anzahl der Schlüssel zurück"""
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not batch:
+            return 0
+        try:
+            self.flush_callback(dict(batch))
+        except Exception:
+            # возвращаем приращения в буфер, чтобы повторить при следующем сбросе
+            # Inkremente zurück in den Puffer, um beim nächsten Flush erneut zu schreiben
+            logger.exception("Flushing write-behind buffer %s failed", self.name)
+            with self._lock:
+                self._pending.update(batch)
+            return 0
+        return len(batch)
+
+    def _start_thread(self) -> None:
+        # поток запускается лениво — уже в рабочем процессе после fork
+        # der Thread startet verzögert — erst im Worker-Prozess nach dem Fork
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=f"buffer-{self.name}", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                # поток не должен умирать: следующий сброс повторит попытку
+                # der Thread darf nicht sterben: der nächste Flush versucht es erneut
+                logger.exception("Background flush of write-behind buffer %s failed", self.name)
+            finally:
+                # соединения с БД этого потока / DB-Verbindungen dieses Threads
+                connections.close_all()
+
+
+class RedisWriteBehindBuffer(WriteBehindBuffer):
+    """
+    Тот же буфер, но приращения копятся в хэше Redis (HINCRBY) и общие для
+    всех процессов; падение процесса ничего не теряет. Сброс целиком
+    (переименование, запись, удаление) идёт под блокировкой SET NX PX с
+    токеном, поэтому хэш в обработке пишет только один процесс. Если процесс
+    упал посреди записи, хэш повторяется после истечения блокировки.
+
+    Derselbe Puffer, aber die Inkremente liegen in einem Redis-Hash (HINCRBY)
+    und sind für alle Prozesse gemeinsam; ein Prozessabsturz verliert nichts.
+    Der gesamte Flush (Umbenennen, Schreiben, Löschen) läuft unter einer Sperre
+    SET NX PX mit Token, daher schreibt nur ein Prozess den Hash in Bearbeitung.
+    Stirbt ein Prozess mitten im Schreiben, wird der Hash nach Ablauf der Sperre
+    wiederholt.
+    """
+
+    def __init__(self, name: str, flush_callback: FlushCallback, encode: Callable, decode: Callable,
+                 interval: float = 5.0, max_keys: int = 1000, background: bool = True):
+        super().__init__(name, flush_callback, interval, max_keys, background)
+        self.encode = encode
+        self.decode = decode
+        self.hash_key = cache.make_key(f"buffer:{name}")
+        self.processing_key = cache.make_key(f"buffer:{name}:processing")
+        self.lock_key = cache.make_key(f"buffer:{name}:lock")
+        self.window_key = f"buffer:{name}:window"
+        # с запасом на медленную запись в БД / mit Reserve für langsames Schreiben in die DB
+        self.lock_timeout_ms = int(max(30.0, 6 * interval) * 1000)
+        self._release_lock = None
+
+    @staticmethod
+    def is_available() -> bool:
+        return isinstance(caches["default"], RedisCache)
+
+    def _client(self):
+        return cache._cache.get_client(self.hash_key, write=True)
+
+    def add(self, key: Hashable, amount: int = 1) -> None:
+        if self.background and self._thread is None:
+            self._start_thread()
+        client = self._client()
+        pipeline = client.pipeline()
+        pipeline.hincrby(self.hash_key, self.encode(key), amount)
+        pipeline.hlen(self.hash_key)
+        _, size = pipeline.execute()
+        # cache.add — без фонового потока сброс не чаще раза в interval
+        # cache.add — ohne Hintergrund-Thread höchstens ein Flush pro interval
+        if size >= self.max_keys or (
+            not self.background and cache.add(self.window_key, 1, timeout=self.interval)
+        ):
+            self.flush()
+
+    def pending(self) -> dict:
+        values = self._client().hgetall(self.hash_key)
+        return {self.decode(field.decode()): int(value) for field, value in values.items()}
+
+    def flush(self) -> int:
+        client = self._client()
+        token = uuid.uuid4().hex
+        if not client.set(self.lock_key, token, nx=True, px=self.lock_timeout_ms):
+            # сбрасывает другой процесс / ein anderer Prozess flusht gerade
+            return 0
+        try:
+            return self._flush_locked(client)
+        finally:
+            if self._release_lock is None:
+                self._release_lock = client.register_script(RELEASE_LOCK_SCRIPT)
+            if not self._release_lock(keys=[self.lock_key], args=[token]):
+                logger.warning("Write-behind buffer %s: flush lock expired before the flush finished", self.name)
+
+    def _flush_locked(self, client) -> int:
+        # незавершённый прошлый сброс повторяется раньше нового окна
+        # ein unvollendeter früherer Flush wird vor dem neuen Fenster wiederholt
+        if not client.exists(self.processing_key):
+            if not client.exists(self.hash_key):
+                return 0
+            client.rename(self.hash_key, self.processing_key)
+
+        values = client.hgetall(self.processing_key)
+        batch = {self.decode(field.decode()): int(value) for field, value in values.items()}
+        if batch:
+            try:
+                self.flush_callback(batch)
+            except Exception:
+                logger.exception("Flushing write-behind buffer %s failed", self.name)
+                return 0
+        client.delete(self.processing_key)
+        return len(batch)
+
+def make_buffer(name: str, flush_callback: FlushCallback, encode: Callable, decode: Callable,
+                interval: float, max_keys: int) -> WriteBehindBuffer:
+    """
+    Буфер в Redis, если кэш на Redis, иначе в памяти процесса.
+    Puffer in Redis, falls der Cache auf Redis läuft, sonst im Prozessspeicher.
+    """
+    background = getattr(settings, "WRITE_BEHIND_BACKGROUND_FLUSH", True)
+    if RedisWriteBehindBuffer.is_available():
+        return RedisWriteBehindBuffer(name, flush_callback, encode, decode, interval, max_keys, background)
+    return WriteBehindBuffer(name, flush_callback, interval, max_keys, background)
@@ -0,0 +1,140 @@
+import hashlib
+import time
+from functools import partial
+from typing import Iterable, Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpRequest
+
+
+class ListingCacheService:
+    """
+    Кэш ответов списка/деталей объявлений с инвалидацией по версии.
+    Любое изменение Listing/Review увеличивает версию — старые ключи
+    просто перестают читаться и истекают по TTL. Бронирования влияют только
+    на фильтр свободных дат, поэтому у таких запросов своя вторая версия.
+    Версии увеличиваются после фиксации транзакции: иначе параллельный
+    запрос успел бы закэшировать старые данные под новой версией.
+
+    Antwort-Cache für Anzeigenliste/-details mit versionsbasierter Invalidierung.
+    Jede Änderung an Listing/Review erhöht die Version — alte Schlüssel
+    werden nicht mehr gelesen und laufen per TTL ab. Buchungen wirken nur auf
+    den Filter freier Daten, daher haben solche Anfragen eine eigene zweite Version.
+    Versionen werden nach dem Commit erhöht: sonst könnte eine parallele Anfrage
+    alte Daten unter der neuen Version cachen.
+    """
+
+    VERSION_KEY = "listings:cache:version"
+    AVAILABILITY_VERSION_KEY = "listings:cache:availability-version"
+    AVAILABILITY_PARAMS = frozenset({"available_from", "available_to"})
+    HITS_KEY = "listings:cache:hits"
+    MISSES_KEY = "listings:cache:misses"
+
+    @staticmethod
+    def timeout() -> int:
+        return getattr(settings, "LISTING_CACHE_TIMEOUT", 60)
+
+    @staticmethod
+    def get_version(key: str = VERSION_KEY) -> int:
+        """Текущая версия кэша / Aktuelle Cache-Version"""
+        version = cache.get(key)
+        if version is None:
+            # начальная версия от времени, чтобы не совпасть с ключами до сброса кэша
+            # Startversion aus der Zeit, um nicht mit Schlüsseln vor einem Cache-Reset zu kollidieren
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            version = cache.get(key)
+        return version
+
+    @staticmethod
+    def invalidate() -> None:
+        """Инвалидирует все закэшированные ответы (после фиксации) /
+        Invalidiert alle zwischengespeicherten Antworten (nach dem Commit)"""
+        transaction.on_commit(partial(ListingCacheService._bump, ListingCacheService.VERSION_KEY))
+
+    @staticmethod
+    def invalidate_availability() -> None:
+        """Инвалидирует ответы с фильтром свободных дат (после фиксации) /
+        Invalidiert Antworten mit Filter freier Daten (nach dem Commit)"""
+        transaction.on_commit(partial(ListingCacheService._bump, ListingCacheService.AVAILABILITY_VERSION_KEY))
+
+    @staticmethod
+    def reset() -> None:
+        """
+        Сразу увеличивает обе версии — для команд, которые пишут через
+        bulk_create (без сигналов) или откатывают свою транзакцию.
+
+        Erhöht sofort beide Versionen — für Befehle, die per bulk_create
+        (ohne Signale) schreiben oder ihre Transaktion zurückrollen.
+        """
+        ListingCacheService._bump(ListingCacheService.VERSION_KEY)
+        ListingCacheService._bump(ListingCacheService.AVAILABILITY_VERSION_KEY)
+
+    @staticmethod
+    def _bump(key: str) -> None:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000), timeout=None)
+
+    @staticmethod
+    def make_key(request: HttpRequest, action: str, allowed_params: Iterable[str], pk=None) -> str:
+        """
+        Ключ из нормализованных параметров: только известные параметры,
+        без пустых значений, в отсортированном порядке.
+
+        Schlüssel aus normalisierten Parametern: nur bekannte Parameter,
+        ohne leere Werte, in sortierter Reihenfolge.
+        """
+        allowed = set(allowed_params)
+        normalized = []
+        for name, values in request.GET.lists():
+            if name not in allowed:
+                continue
+            values = sorted(
+                " ".join(value.split()).casefold() if name == "search" else value.strip()
+                for value in values
+            )
+            normalized.extend((name, value) for value in values if value)
+        normalized.sort()
+
+        digest = hashlib.sha1(
+            f"{request.get_host()}?{urlencode(normalized)}".encode()
+        ).hexdigest()
+        version = str(ListingCacheService.get_version())
+        if any(name in ListingCacheService.AVAILABILITY_PARAMS for name, _ in normalized):
+            version += f".{ListingCacheService.get_version(ListingCacheService.AVAILABILITY_VERSION_KEY)}"
+        return f"listings:v{version}:{action}:{pk or ''}:{digest}"
+
+    @staticmethod
+    def get(key: str) -> Optional[dict]:
+        """Читает ответ из кэша и учитывает попадание/промах /
+        Liest die Antwort aus dem Cache und zählt Treffer/Fehlschlag"""
+        data = cache.get(key)
+        ListingCacheService._count(
+            ListingCacheService.MISSES_KEY if data is None else ListingCacheService.HITS_KEY
+        )
+        return data
+
+    @staticmethod
+    def set(key: str, data) -> None:
+        cache.set(key, data, timeout=ListingCacheService.timeout())
+
+    @staticmethod
+    def stats() -> dict:
+        """Счётчики попаданий/промахов / Treffer-/Fehlschlagzähler"""
+        values = cache.get_many([ListingCacheService.HITS_KEY, ListingCacheService.MISSES_KEY])
+        return {
+            "hits": values.get(ListingCacheService.HITS_KEY, 0),
+            "misses": values.get(ListingCacheService.MISSES_KEY, 0),
+        }
+
+    @staticmethod
+    def _count(key: str) -> None:
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, 1, timeout=None):
+                cache.incr(key)
@@ -0,0 +1,61 @@
+from django.db.models import Case, Count, F, IntegerField, OuterRef, QuerySet, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from src.apartments.models import Listing, ListingView, Review
+
+
+class ListingCounterService:
+    """Сервис денормализованных счётчиков объявлений /
+    Service für die denormalisierten Zähler der Anzeigen"""
+
+    @staticmethod
+    def add_views(listing_id: int, count: int = 1) -> None:
+        """Атомарно увеличивает views_count /
+        Erhöht views_count atomar"""
+        Listing.objects.filter(pk=listing_id).update(views_count=F("views_count") + count)
+
+    @staticmethod
+    def add_views_bulk(counts: dict[int, int]) -> int:
+        """Увеличивает views_count нескольких объявлений одним UPDATE /
+        Erhöht views_count mehrerer Anzeigen mit einem UPDATE"""
+        if not counts:
+            return 0
+        return Listing.objects.filter(pk__in=counts).update(views_count=Case(
+            *(When(pk=pk, then=F("views_count") + count) for pk, count in counts.items()),
+            default=F("views_count"),
+            output_field=IntegerField(),
+        ))
+
+    @staticmethod
+    def add_reviews(listing_id: int, count: int = 1) -> None:
+        """Атомарно изменяет reviews_count (count может быть отрицательным) /
+        Ändert reviews_count atomar (count kann negativ sein)"""
+        queryset = Listing.objects.filter(pk=listing_id)
+        if count < 0:
+            # не уходим ниже нуля / nicht unter null fallen
+            queryset = queryset.filter(reviews_count__gte=-count)
+        queryset.update(reviews_count=F("reviews_count") + count)
+
+    @staticmethod
+    def reconcile(queryset: QuerySet = None) -> int:
+        """Пересчитывает счётчики из ListingView и Review /
+        Berechnet die Zähler aus ListingView und Review neu"""
+        if queryset is None:
+            queryset = Listing.objects.all()
+
+        views = (
+            ListingView.objects.filter(listing=OuterRef("pk"))
+            .values("listing")
+            .annotate(total=Sum("view_count"))
+            .values("total")
+        )
+        reviews = (
+            Review.objects.filter(listing=OuterRef("pk"))
+            .values("listing")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        return queryset.update(
+            views_count=Coalesce(Subquery(views), Value(0)),
+            reviews_count=Coalesce(Subquery(reviews), Value(0)),
+        )
@@ -0,0 +1,61 @@
+import hashlib
+import math
+from typing import Iterable, Optional
+
+# 2^10 регистров по байту: 1 КБ на скетч, стандартная ошибка ≈ 1.04/√1024 ≈ 3.25%
+# 2^10 Register à ein Byte: 1 KB pro Sketch, Standardfehler ≈ 1.04/√1024 ≈ 3.25%
+DEFAULT_PRECISION = 10
+HASH_BITS = 64
+
+
+class HyperLogLog:
+    """
+    HyperLogLog — приблизительный подсчёт уникальных значений в фиксированной памяти.
+    Скетчи одинаковой точности объединяются поэлементным максимумом регистров.
+
+    HyperLogLog — ungefähre Zählung eindeutiger Werte bei festem Speicherbedarf.
+    Sketches gleicher Präzision werden per elementweisem Register-Maximum vereinigt.
+    """
+
+    def __init__(self, registers: Optional[bytes] = None, precision: int = DEFAULT_PRECISION):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers else bytearray(self.size)
+        if len(self.registers) != self.size:
+            raise ValueError(f"Expected {self.size} registers, got {len(self.registers)}")
+
+    def add(self, value: str) -> None:
+        digest = hashlib.blake2b(value.encode(), digest_size=HASH_BITS // 8).digest()
+        hashed = int.from_bytes(digest, "big")
+        # старшие precision бит — номер регистра, по остальным — позиция первой единицы
+        # die oberen precision Bits wählen das Register, der Rest die Position der ersten Eins
+        index = hashed >> (HASH_BITS - self.precision)
+        rest_bits = HASH_BITS - self.precision
+        rest = hashed & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[str]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> int:
+        """Оценка числа уникальных значений / Schätzung der Anzahl eindeutiger Werte"""
+        size = self.size
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # малые значения — линейный подсчёт / kleine Werte — lineares Zählen
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
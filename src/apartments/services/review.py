@@ -0,0 +1,46 @@
+from django.db.models import Avg, Count, Prefetch, Q
+
+from src.apartments.models import Review
+
+# сколько последних отзывов встраивается в детальный ответ объявления
+# wie viele neueste Bewertungen in die Detailantwort der Anzeige eingebettet werden
+LATEST_REVIEWS_LIMIT = 5
+RATINGS = range(1, 6)
+
+
+class ReviewService:
+    """Сервис отзывов / Service für Bewertungen"""
+
+    @staticmethod
+    def reviews_queryset():
+        """Отзывы с арендатором одним JOIN, новые первыми /
+        Bewertungen mit Mieter per JOIN, neueste zuerst"""
+        return Review.objects.select_related("tenant").order_by("-created_at", "-id")
+
+    @staticmethod
+    def latest_prefetch(limit: int = LATEST_REVIEWS_LIMIT) -> Prefetch:
+        """Prefetch первых limit отзывов в listing.latest_reviews /
+        Prefetch der ersten limit Bewertungen in listing.latest_reviews"""
+        return Prefetch(
+            "reviews",
+            queryset=ReviewService.reviews_queryset()[:limit],
+            to_attr="latest_reviews",
+        )
+
+    @staticmethod
+    def summary(listing_id: int) -> dict:
+        """
+        Количество, средняя оценка и гистограмма оценок одним запросом.
+        Anzahl, Durchschnittsbewertung und Bewertungshistogramm in einer Abfrage.
+        """
+        aggregates = Review.objects.filter(listing_id=listing_id).aggregate(
+            count=Count("id"),
+            average=Avg("rating"),
+            **{f"rating_{rating}": Count("id", filter=Q(rating=rating)) for rating in RATINGS},
+        )
+        average = aggregates["average"]
+        return {
+            "count": aggregates["count"],
+            "average_rating": round(average, 2) if average is not None else None,
+            "histogram": {str(rating): aggregates[f"rating_{rating}"] for rating in RATINGS},
+        }
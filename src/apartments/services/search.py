@@ -1,35 +1,139 @@
-from django.db.models import F, Sum
+import unicodedata
+from collections import Counter
+from functools import partial
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
 from src.apartments.models import SearchHistory
+from src.apartments.services.buffer import WriteBehindBuffer, make_buffer
+from src.apartments.services.trending import TrendingSearchService
+from src.apartments.services.upsert import upsert_increment
+from src.monitoring import timed
+
+KEYWORD_MAX_LENGTH = SearchHistory._meta.get_field("keyword").max_length
+
+# ключ буфера поиска: (user_id | None, нормализованный запрос)
+# Schlüssel des Suchpuffers: (user_id | None, normalisierte Suchanfrage)
+SearchKey = tuple[Optional[int], str]
+
+_buffer = None
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Unicode NFKC, casefold и одиночные пробелы — дубликаты сливаются /
+    Unicode NFKC, casefold und einfache Leerzeichen — Duplikate werden zusammengeführt"""
+    normalized = unicodedata.normalize("NFKC", keyword or "").casefold()
+    return " ".join(normalized.split())[:KEYWORD_MAX_LENGTH]
+
+
+def _encode_key(key: SearchKey) -> str:
+    # user_id без "|", поэтому запрос может содержать любые символы
+    # user_id enthält kein "|", daher darf die Suchanfrage beliebige Zeichen enthalten
+    user_id, keyword = key
+    return f"{user_id or ''}|{keyword}"
+
+
+def _decode_key(value: str) -> SearchKey:
+    user_id, keyword = value.split("|", 1)
+    return int(user_id) if user_id else None, keyword
 
 
 class SearchService:
     """Сервис для работы с историей поиска / Service zur Verwaltung der Suchhistorie"""
 
     @staticmethod
+    def buffer_enabled() -> bool:
+        return getattr(settings, "SEARCH_LOG_BUFFER_ENABLED", True)
+
+    @staticmethod
+    def get_buffer() -> WriteBehindBuffer:
+        """Буфер поисковых запросов процесса / Suchanfragen-Puffer des Prozesses"""
+        global _buffer
+        if _buffer is None:
+            _buffer = make_buffer(
+                "search-log",
+                SearchService.write_searches,
+                _encode_key,
+                _decode_key,
+                interval=getattr(settings, "SEARCH_LOG_FLUSH_INTERVAL", 5.0),
+                max_keys=getattr(settings, "SEARCH_LOG_MAX_KEYS", 1000),
+            )
+        return _buffer
+
+    @staticmethod
+    @timed("log_search")
     def log_search(user, keyword: str):
-        """Записывает новый запрос или увеличивает счётчик /
-        Speichert eine neue Suche oder erhöht den Zähler"""
-        obj, created = SearchHistory.objects.get_or_create(
-            user=user if user.is_authenticated else None,
-            keyword=keyword
-        )
-        if not created:
-            obj.search_count = F("search_count") + 1
-            obj.save(update_fields=["search_count"])
-            obj.refresh_from_db(fields=["search_count"])
-        # return obj
+        """Записывает новый запрос или увеличивает счётчик (через буфер) /
+        Speichert eine neue Suche oder erhöht den Zähler (über den Puffer)"""
+        keyword = normalize_keyword(keyword)
+        if not keyword:
+            return
+        key = (user.pk if user.is_authenticated else None, keyword)
+        if SearchService.buffer_enabled():
+            SearchService.get_buffer().add(key)
+        else:
+            SearchService.write_searches({key: 1})
 
     @staticmethod
-    def get_popular(limit: int = 10):
-        """Возвращает популярные поисковые запросы /
-        Gibt die beliebtesten Suchanfragen zurück"""
-        return (
-            SearchHistory.objects
-            .values("keyword")
-            .annotate(total=Sum("search_count"))
-            .order_by("-total")[:limit]
+    def flush_searches() -> int:
+        """Сбрасывает буфер поиска в БД / Schreibt den Suchpuffer in die DB"""
+        return SearchService.get_buffer().flush()
+
+    @staticmethod
+    def write_searches(batch: dict[SearchKey, int]) -> None:
+        """
+        Записывает пачку запросов одним INSERT ... ON CONFLICT / ON DUPLICATE KEY
+        UPDATE с прибавлением счётчика — и для пользователей, и для анонимов
+        (user_key 0).
+
+        Schreibt einen Stapel Suchanfragen mit einem INSERT ... ON CONFLICT / ON
+        DUPLICATE KEY UPDATE mit Zähleraddition — für Benutzer wie für Anonyme
+        (user_key 0).
+        """
+        user_ids = {user_id for user_id, _ in batch if user_id is not None}
+        if user_ids:
+            # удалённые пользователи / gelöschte Benutzer
+            user_ids = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+        rows = [
+            (user_id, keyword, count) for (user_id, keyword), count in batch.items()
+            if user_id is None or user_id in user_ids
+        ]
+        if not rows:
+            return
+
+        totals = Counter()
+        for _, keyword, count in rows:
+            totals[keyword] += count
+
+        with transaction.atomic():
+            SearchService._upsert(rows)
+            # top-K обновляется после фиксации / Top-K wird nach dem Commit aktualisiert
+            transaction.on_commit(partial(TrendingSearchService.record, dict(totals)))
+
+    @staticmethod
+    def _upsert(rows: list[tuple[Optional[int], str, int]]) -> None:
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        upsert_increment(
+            SearchHistory,
+            fields=["user_id", "user_key", "keyword", "search_count", "created_at"],
+            unique_fields=["keyword", "user_key"],
+            count_field="search_count",
+            rows=[
+                (user_id, SearchHistory.key_for(user_id), keyword, searches, now)
+                for user_id, keyword, searches in rows
+            ],
         )
 
+    @staticmethod
+    def get_popular(limit: int = 10, window: str = "all"):
+        """Возвращает популярные поисковые запросы окна (см. TrendingSearchService.top) /
+        Gibt die beliebtesten Suchanfragen des Fensters zurück (siehe TrendingSearchService.top)"""
+        return TrendingSearchService.top(window, limit)
+
     @staticmethod
     def my_search(user, limit: int = 20):
         """Возвращает историю поиска текущего пользователя-арендатора /
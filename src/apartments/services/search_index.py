@@ -0,0 +1,134 @@
+import re
+import unicodedata
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, QuerySet, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from src.apartments.models import Listing, ListingSearchTerm
+
+TOKEN_RE = re.compile(r"\w+")
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+
+# вес термина в зависимости от поля / Gewicht eines Begriffs je nach Feld
+FIELD_WEIGHTS = {
+    "title": 3,
+    "location": 2,
+    "description": 1,
+}
+INDEXED_FIELDS = frozenset(FIELD_WEIGHTS)
+
+
+def tokenize(text: str) -> list[str]:
+    """Нормализует (NFKC, casefold) и разбивает текст на термины /
+    Normalisiert (NFKC, casefold) und zerlegt den Text in Begriffe"""
+    normalized = unicodedata.normalize("NFKC", text or "").casefold()
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(normalized)
+        if len(token) >= MIN_TERM_LENGTH
+    ]
+
+
+def prefix_match(term: str) -> Q:
+    """Условие «термин начинается с term» / Bedingung „Begriff beginnt mit term“"""
+    if connection.vendor == "sqlite":
+        # LIKE в SQLite не использует индекс, а диапазон — использует
+        # LIKE nutzt in SQLite keinen Index, ein Bereich dagegen schon
+        upper = term[:-1] + chr(ord(term[-1]) + 1)
+        return Q(term__gte=term, term__lt=upper)
+    return Q(term__startswith=term)
+
+
+class SearchIndexService:
+    """Сервис инвертированного индекса объявлений /
+    Service für den invertierten Index der Anzeigen"""
+
+    @staticmethod
+    def build_terms(listing_id: int, fields: dict) -> list[ListingSearchTerm]:
+        """Термины одного объявления с весами по полям /
+        Begriffe einer Anzeige mit Gewichten nach Feldern"""
+        weights = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(fields.get(field)):
+                weights[term] += weight
+        return [
+            ListingSearchTerm(listing_id=listing_id, term=term, weight=weight)
+            for term, weight in weights.items()
+        ]
+
+    @staticmethod
+    def index_listing(listing: Listing) -> None:
+        """Переиндексирует одно объявление /
+        Indexiert eine Anzeige neu"""
+        fields = {field: getattr(listing, field) for field in INDEXED_FIELDS}
+        with transaction.atomic():
+            ListingSearchTerm.objects.filter(listing_id=listing.pk).delete()
+            ListingSearchTerm.objects.bulk_create(SearchIndexService.build_terms(listing.pk, fields))
+
+    @staticmethod
+    def rebuild(queryset: QuerySet = None, chunk_size: int = 500) -> int:
+        """Перестраивает индекс порциями по pk, возвращает число объявлений /
+        Baut den Index in pk-Portionen neu auf, gibt die Anzahl der Anzeigen zurück"""
+        if queryset is None:
+            queryset = Listing.objects.all()
+
+        indexed = 0
+        last_pk = 0
+        while True:
+            rows = list(
+                queryset.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values("pk", *INDEXED_FIELDS)[:chunk_size]
+            )
+            if not rows:
+                break
+            terms = []
+            for row in rows:
+                terms.extend(SearchIndexService.build_terms(row["pk"], row))
+            pks = [row["pk"] for row in rows]
+            with transaction.atomic():
+                ListingSearchTerm.objects.filter(listing_id__in=pks).delete()
+                ListingSearchTerm.objects.bulk_create(terms, batch_size=1000)
+            indexed += len(rows)
+            last_pk = pks[-1]
+        return indexed
+
+    @staticmethod
+    def search(queryset: QuerySet, query: str) -> QuerySet:
+        """
+        Оставляет объявления, где каждый термин запроса совпадает по префиксу,
+        и аннотирует search_rank (сумма весов, точное совпадение — вдвое).
+
+        Behält Anzeigen, bei denen jeder Suchbegriff als Präfix passt,
+        und annotiert search_rank (Summe der Gewichte, exakter Treffer doppelt).
+        Запрос без терминов даёт пустой результат /
+        Eine Anfrage ohne Begriffe liefert ein leeres Ergebnis.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            # запрос из одних коротких токенов ничего не находит, а не всё подряд
+            # eine Anfrage nur aus zu kurzen Tokens findet nichts statt allem
+            return queryset.none().annotate(search_rank=Value(0))
+
+        for term in terms:
+            queryset = queryset.filter(
+                pk__in=ListingSearchTerm.objects.filter(prefix_match(term)).values("listing_id")
+            )
+
+        rank = (
+            ListingSearchTerm.objects
+            .filter(reduce(or_, map(prefix_match, terms)), listing=OuterRef("pk"))
+            .values("listing")
+            .annotate(total=Sum(Case(
+                When(term__in=terms, then=F("weight") * 2),
+                default=F("weight"),
+                output_field=IntegerField(),
+            )))
+            .values("total")
+        )
+        return queryset.annotate(search_rank=Coalesce(Subquery(rank), Value(0)))
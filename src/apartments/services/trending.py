@@ -0,0 +1,260 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+
+from src.apartments.models import SearchHistory
+
+logger = logging.getLogger(__name__)
+
+
+class SpaceSaving:
+    """
+    Space-Saving (Metwally и др.): top-K частых элементов в capacity счётчиках.
+    Для каждого элемента хранится (count, error): настоящая частота лежит
+    в [count - error, count]. Элемент с частотой > N/capacity не теряется.
+
+    Space-Saving (Metwally u. a.): Top-K häufiger Elemente in capacity Zählern.
+    Pro Element wird (count, error) gespeichert: die wahre Häufigkeit liegt
+    in [count - error, count]. Ein Element mit Häufigkeit > N/capacity geht nicht verloren.
+    """
+
+    def __init__(self, capacity: int, counters: Optional[dict] = None):
+        self.capacity = capacity
+        self.counters = {item: list(value) for item, value in (counters or {}).items()}
+
+    def add(self, item: str, count: float = 1) -> None:
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += count
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [count, 0]
+        else:
+            # вытесняем минимальный счётчик, его значение становится ошибкой
+            # den kleinsten Zähler verdrängen, sein Wert wird zum Fehler
+            victim = min(self.counters, key=lambda key: self.counters[key][0])
+            minimum = self.counters.pop(victim)[0]
+            self.counters[item] = [minimum + count, minimum]
+
+    def update(self, counts: dict) -> None:
+        for item, count in counts.items():
+            self.add(item, count)
+
+    def scale(self, factor: float) -> None:
+        for counter in self.counters.values():
+            counter[0] *= factor
+            counter[1] *= factor
+
+    @classmethod
+    def merge(cls, capacity: int, summaries: Iterable[tuple["SpaceSaving", float]]) -> "SpaceSaving":
+        """Взвешенное объединение сводок / Gewichtete Vereinigung von Zusammenfassungen"""
+        merged = {}
+        for summary, weight in summaries:
+            for item, (count, error) in summary.counters.items():
+                counter = merged.setdefault(item, [0, 0])
+                counter[0] += count * weight
+                counter[1] += error * weight
+        top = sorted(merged.items(), key=lambda entry: entry[1][0], reverse=True)[:capacity]
+        return cls(capacity, dict(top))
+
+    def top(self, k: int) -> list[tuple[str, float]]:
+        ranked = sorted(self.counters.items(), key=lambda entry: entry[1][0], reverse=True)
+        return [(item, count) for item, (count, _) in ranked[:k]]
+
+
+WINDOWS = ("hour", "day", "week", "trending", "all")
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+KEY_PREFIX = "search:trending"
+LOCK_KEY = f"{KEY_PREFIX}:lock"
+ALL_KEY = f"{KEY_PREFIX}:all"
+DECAYED_KEY = f"{KEY_PREFIX}:decayed"
+
+# пачки, не попавшие в сводки без блокировки; добавляются к следующей записи
+# Stapel, die ohne Sperre nicht in die Zusammenfassungen kamen; werden dem nächsten Schreiben hinzugefügt
+_deferred = Counter()
+_deferred_lock = threading.Lock()
+
+
+def _capacity() -> int:
+    return getattr(settings, "TRENDING_SEARCH_CAPACITY", 200)
+
+
+def _half_life() -> float:
+    return getattr(settings, "TRENDING_SEARCH_HALF_LIFE_HOURS", 24) * 3600
+
+
+def _bucket_start(moment: datetime, step: timedelta) -> datetime:
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if step == DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def _bucket_key(step: timedelta, start: datetime) -> str:
+    return f"{KEY_PREFIX}:{'h' if step == HOUR else 'd'}:{int(start.timestamp())}"
+
+
+@contextmanager
+def _lock(timeout: float = 5, wait: float = 2):
+    """Короткая блокировка через cache.add на время чтения-изменения-записи;
+    отдаёт, получена ли она / Kurze Sperre per cache.add für Lesen-Ändern-Schreiben;
+    liefert, ob sie erhalten wurde"""
+    deadline = time.monotonic() + wait
+    acquired = cache.add(LOCK_KEY, 1, timeout=timeout)
+    while not acquired and time.monotonic() < deadline:
+        time.sleep(0.01)
+        acquired = cache.add(LOCK_KEY, 1, timeout=timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(LOCK_KEY)
+
+
+class TrendingSearchService:
+    """
+    Инкрементальные top-K поисковые запросы: сводки Space-Saving в кэше
+    по часам и дням, всё время и «тренд» с экспоненциальным затуханием.
+    Чтение не зависит от размера SearchHistory.
+
+    Inkrementelle Top-K-Suchanfragen: Space-Saving-Zusammenfassungen im Cache
+    pro Stunde und Tag, Gesamtzeit und „Trend“ mit exponentiellem Abklingen.
+    Das Lesen hängt nicht von der Größe von SearchHistory ab.
+    """
+
+    @staticmethod
+    def record(counts: dict[str, int], now: Optional[datetime] = None) -> None:
+        """
+        Добавляет {запрос: число} во все сводки. Без блокировки сводки не
+        трогаются: пачка откладывается и добавляется к следующей записи.
+
+        Fügt {Anfrage: Anzahl} allen Zusammenfassungen hinzu. Ohne Sperre bleiben
+        die Zusammenfassungen unberührt: der Stapel wird zurückgestellt und dem
+        nächsten Schreiben hinzugefügt.
+        """
+        with _deferred_lock:
+            _deferred.update(counts)
+            counts = dict(_deferred)
+            _deferred.clear()
+        if not counts:
+            return
+        now = now or datetime.now(dt_timezone.utc)
+        capacity = _capacity()
+
+        with _lock() as acquired:
+            if not acquired:
+                logger.warning("Trending search lock busy, deferring %d keywords", len(counts))
+                with _deferred_lock:
+                    _deferred.update(counts)
+                return
+
+            hour_key = _bucket_key(HOUR, _bucket_start(now, HOUR))
+            day_key = _bucket_key(DAY, _bucket_start(now, DAY))
+            stored = cache.get_many([hour_key, day_key, ALL_KEY, DECAYED_KEY])
+
+            # часовые живут сутки, дневные — неделю (плюс запас на скользящее окно)
+            # Stunden-Buckets leben einen Tag, Tages-Buckets eine Woche (plus Reserve für das Gleitfenster)
+            for key, ttl in ((hour_key, DAY + 2 * HOUR), (day_key, 8 * DAY)):
+                summary = SpaceSaving(capacity, stored.get(key))
+                summary.update(counts)
+                cache.set(key, summary.counters, timeout=int(ttl.total_seconds()))
+
+            if ALL_KEY in stored:
+                summary = SpaceSaving(capacity, stored[ALL_KEY])
+                summary.update(counts)
+            else:
+                # после сброса кэша — из SearchHistory, где пачка уже записана
+                # nach einem Cache-Reset — aus SearchHistory, wo der Stapel bereits steht
+                summary = TrendingSearchService.bootstrap(capacity)
+            cache.set(ALL_KEY, summary.counters, timeout=None)
+
+            decayed = stored.get(DECAYED_KEY) or {"at": now.timestamp(), "counters": {}}
+            summary = SpaceSaving(capacity, decayed["counters"])
+            summary.scale(0.5 ** ((now.timestamp() - decayed["at"]) / _half_life()))
+            summary.update(counts)
+            cache.set(DECAYED_KEY, {"at": now.timestamp(), "counters": summary.counters}, timeout=None)
+
+    @staticmethod
+    def bootstrap(capacity: int) -> SpaceSaving:
+        """Сводка «всё время» из SearchHistory / Gesamtzeit-Zusammenfassung aus SearchHistory"""
+        rows = (
+            SearchHistory.objects
+            .values("keyword")
+            .annotate(total=Sum("search_count"))
+            .order_by("-total")[:capacity]
+        )
+        return SpaceSaving(capacity, {row["keyword"]: [row["total"], 0] for row in rows})
+
+    @staticmethod
+    def rebuild() -> None:
+        """
+        Пересчитывает сводку «всё время» из SearchHistory после массовой
+        вставки или удаления строк в обход record.
+
+        Berechnet die Gesamtzeit-Zusammenfassung aus SearchHistory neu, nachdem
+        Zeilen am record vorbei massenhaft eingefügt oder gelöscht wurden.
+        """
+        with _lock() as acquired:
+            if not acquired:
+                # без сводки её соберёт из БД следующая запись или чтение
+                # ohne Zusammenfassung baut sie das nächste Schreiben oder Lesen aus der DB
+                logger.warning("Trending search lock busy, dropping the all-time summary")
+                cache.delete(ALL_KEY)
+                return
+            summary = TrendingSearchService.bootstrap(_capacity())
+            cache.set(ALL_KEY, summary.counters, timeout=None)
+
+    @staticmethod
+    def top(window: str = "all", limit: int = 10, now: Optional[datetime] = None) -> list[dict]:
+        """
+        Top-limit запросов окна: hour/day/week — скользящее окно по корзинам
+        (самая старая корзина учитывается долей, ещё попадающей в окно),
+        trending — с затуханием, all — за всё время.
+
+        Top-limit-Anfragen des Fensters: hour/day/week — Gleitfenster über Buckets
+        (der älteste Bucket zählt mit dem Anteil, der noch ins Fenster fällt),
+        trending — mit Abklingen, all — über die gesamte Zeit.
+        """
+        now = now or datetime.now(dt_timezone.utc)
+        capacity = _capacity()
+
+        if window == "all":
+            counters = cache.get(ALL_KEY)
+            if counters is None:
+                summary = TrendingSearchService.bootstrap(capacity)
+                cache.set(ALL_KEY, summary.counters, timeout=None)
+            else:
+                summary = SpaceSaving(capacity, counters)
+        elif window == "trending":
+            decayed = cache.get(DECAYED_KEY) or {"at": now.timestamp(), "counters": {}}
+            summary = SpaceSaving(capacity, decayed["counters"])
+            summary.scale(0.5 ** ((now.timestamp() - decayed["at"]) / _half_life()))
+        else:
+            step, buckets = {"hour": (HOUR, 1), "day": (HOUR, 24), "week": (DAY, 7)}[window]
+            current = _bucket_start(now, step)
+            starts = [current - step * offset for offset in range(buckets + 1)]
+            # доля самой старой корзины, которая ещё внутри окна
+            # Anteil des ältesten Buckets, der noch im Fenster liegt
+            elapsed = (now - current) / step
+            weights = [1.0] * buckets + [1.0 - elapsed]
+            stored = cache.get_many([_bucket_key(step, start) for start in starts])
+            summary = SpaceSaving.merge(capacity, (
+                (SpaceSaving(capacity, stored[_bucket_key(step, start)]), weight)
+                for start, weight in zip(starts, weights)
+                if _bucket_key(step, start) in stored
+            ))
+
+        return [
+            {"keyword": keyword, "total": int(round(total))}
+            for keyword, total in summary.top(limit)
+            if round(total) > 0
+        ]
@@ -0,0 +1,40 @@
+from typing import Sequence
+
+from django.db import connection
+
+# строк в одном INSERT ... ON CONFLICT / Zeilen pro INSERT ... ON CONFLICT
+UPSERT_BATCH_SIZE = 500
+
+
+def upsert_increment(model, fields: Sequence[str], unique_fields: Sequence[str], count_field: str,
+                     rows: Sequence[tuple]) -> None:
+    """
+    Вставляет строки (значения в порядке fields) или прибавляет count_field к
+    существующей строке с теми же unique_fields: один INSERT ... ON CONFLICT
+    DO UPDATE (PostgreSQL, SQLite) / ON DUPLICATE KEY UPDATE (MySQL) на пачку.
+
+    Fügt Zeilen ein (Werte in der Reihenfolge von fields) oder addiert count_field
+    zur vorhandenen Zeile mit denselben unique_fields: ein INSERT ... ON CONFLICT
+    DO UPDATE (PostgreSQL, SQLite) / ON DUPLICATE KEY UPDATE (MySQL) pro Stapel.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = [quote(model._meta.get_field(name).column) for name in fields]
+    count = quote(model._meta.get_field(count_field).column)
+
+    if connection.vendor == "mysql":
+        conflict = f"ON DUPLICATE KEY UPDATE {count} = {count} + VALUES({count})"
+    else:
+        # PostgreSQL и SQLite / PostgreSQL und SQLite
+        target = ", ".join(quote(model._meta.get_field(name).column) for name in unique_fields)
+        conflict = f"ON CONFLICT ({target}) DO UPDATE SET {count} = {table}.{count} + EXCLUDED.{count}"
+
+    row_placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            chunk = rows[start:start + UPSERT_BATCH_SIZE]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"VALUES {', '.join([row_placeholder] * len(chunk))} {conflict}",
+                [value for row in chunk for value in row],
+            )
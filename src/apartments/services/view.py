@@ -1,36 +1,137 @@
-from django.db.models import F
+from collections import Counter
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
 from django.http import HttpRequest
 
+from src.apartments.models import Listing
 from src.apartments.models.listingview import ListingView
-from src.apartments.models.listing import Listing
+from src.apartments.services.buffer import WriteBehindBuffer, make_buffer
+from src.apartments.services.counters import ListingCounterService
+from src.apartments.services.upsert import upsert_increment
+from src.apartments.services.view_stats import ViewStatsService
+from src.monitoring import timed
+
+# ключ буфера просмотров: (listing_id, user_id | None, ip | None)
+# Schlüssel des View-Puffers: (listing_id, user_id | None, ip | None)
+ViewKey = tuple[int, Optional[int], Optional[str]]
+
+_buffer = None
+
+
+def _encode_key(key: ViewKey) -> str:
+    # "|" а не ":" — в IPv6-адресах есть двоеточия / "|" statt ":" — IPv6-Adressen enthalten Doppelpunkte
+    listing_id, user_id, ip_address = key
+    return f"{listing_id}|{user_id or ''}|{ip_address or ''}"
+
+
+def _decode_key(value: str) -> ViewKey:
+    listing_id, user_id, ip_address = value.split("|")
+    return int(listing_id), int(user_id) if user_id else None, ip_address or None
+
 
 class ViewService:
     @staticmethod
-    def record_view(listing: Listing, request: HttpRequest):
+    def buffer_enabled() -> bool:
+        return getattr(settings, "VIEW_BUFFER_ENABLED", True)
+
+    @staticmethod
+    def get_buffer() -> WriteBehindBuffer:
+        """
+        Буфер просмотров процесса: Redis, если кэш на Redis, иначе память.
+        View-Puffer des Prozesses: Redis, falls der Cache auf Redis läuft, sonst Speicher.
+        """
+        global _buffer
+        if _buffer is None:
+            _buffer = make_buffer(
+                "listing-views",
+                ViewService.write_views,
+                _encode_key,
+                _decode_key,
+                interval=getattr(settings, "VIEW_BUFFER_FLUSH_INTERVAL", 5.0),
+                max_keys=getattr(settings, "VIEW_BUFFER_MAX_KEYS", 1000),
+            )
+        return _buffer
+
+    @staticmethod
+    @timed("record_view")
+    def record_view(listing_id: int, request: HttpRequest):
         """
         Учитывает просмотр объявления.
-        Если пользователь уже просматривал это объявление, увеличивает счетчик.
-        Иначе создает новую запись.
+        Если буфер включён (VIEW_BUFFER_ENABLED), просмотр только добавляется
+        в буфер и записывается в БД пачкой позже, иначе — сразу:
+        если пользователь уже просматривал объявление, увеличивает счетчик,
+        иначе создает новую запись.
 
         Args:
-            listing: Объект объявления
+            listing_id: ID объявления
             request: Объект HTTP-запроса
-
-        Returns:
-            ListingView: Созданная или обновленная запись о просмотре
         """
         user = request.user if request.user.is_authenticated else None
-        ip_address = request.META.get('REMOTE_ADDR')
-        
-        # Создаем или обновляем запись о просмотре
-        view, created = ListingView.objects.get_or_create(
-            listing=listing,
-            user=user,
-            ip_address=ip_address,
-            defaults={'view_count': 1}
-        )
-        
-        # Если запись уже существовала, увеличиваем счетчик
-        if not created:
-            view.view_count = F('view_count') + 1
-            view.save(update_fields=['view_count'])
+        # тот же вид адреса, что сохранит GenericIPAddressField
+        # dieselbe Adressform, die GenericIPAddressField speichern würde
+        ip_address = ListingView._meta.get_field("ip_address").get_prep_value(request.META.get('REMOTE_ADDR'))
+
+        if ViewService.buffer_enabled():
+            ViewService.get_buffer().add((listing_id, user.pk if user else None, ip_address))
+            return
+
+        ViewService._write({(listing_id, user.pk if user else None, ip_address): 1})
+
+    @staticmethod
+    def flush_views() -> int:
+        """Сбрасывает буфер просмотров в БД, возвращает число ключей /
+        Schreibt den View-Puffer in die DB, gibt die Anzahl der Schlüssel zurück"""
+        return ViewService.get_buffer().flush()
+
+    @staticmethod
+    def write_views(batch: dict[ViewKey, int]) -> None:
+        """
+        Записывает пачку просмотров из буфера. Ключи удалённых
+        объявлений/пользователей отбрасываются.
+
+        Schreibt einen Stapel Aufrufe aus dem Puffer. Schlüssel gelöschter
+        Anzeigen/Benutzer werden verworfen.
+        """
+        listing_ids = set(Listing.objects.filter(pk__in={key[0] for key in batch}).values_list("pk", flat=True))
+        user_ids = {key[1] for key in batch if key[1] is not None}
+        if user_ids:
+            user_ids = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+        batch = {
+            key: count for key, count in batch.items()
+            if key[0] in listing_ids and (key[1] is None or key[1] in user_ids)
+        }
+        if batch:
+            ViewService._write(batch)
+
+    @staticmethod
+    def _write(batch: dict[ViewKey, int]) -> None:
+        """
+        ListingView — один INSERT ... ON CONFLICT по (listing, viewer_key) с
+        прибавлением view_count, views_count объявлений — один UPDATE, затем
+        почасовые/дневные агрегаты (ViewStatsService).
+
+        ListingView — ein INSERT ... ON CONFLICT auf (listing, viewer_key) mit
+        Addition von view_count, views_count der Anzeigen — ein UPDATE, danach
+        die Stunden-/Tagesaggregate (ViewStatsService).
+        """
+        with transaction.atomic():
+            upsert_increment(
+                ListingView,
+                fields=["listing_id", "user_id", "ip_address", "viewer_key", "view_count"],
+                unique_fields=["listing_id", "viewer_key"],
+                count_field="view_count",
+                rows=[
+                    (listing_id, user_id, ip_address, ListingView.key_for(user_id, ip_address), count)
+                    for (listing_id, user_id, ip_address), count in batch.items()
+                ],
+            )
+
+            totals = Counter()
+            for (listing_id, _, _), count in batch.items():
+                totals[listing_id] += count
+            ListingCounterService.add_views_bulk(totals)
+
+            ViewStatsService.record(batch)
@@ -0,0 +1,173 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import reduce
+from operator import or_
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from src.apartments.models import ListingViewBucket
+from src.apartments.services.hll import HyperLogLog
+from src.choices import ViewBucketGranularity
+
+# точность HLL по гранулярности: часовые скетчи 256 Б (≈6.5%), дневные 1 КБ (≈3.25%)
+# HLL-Präzision je Granularität: Stunden-Sketches 256 B (≈6.5%), Tages-Sketches 1 KB (≈3.25%)
+PRECISION = {
+    ViewBucketGranularity.HOUR: 8,
+    ViewBucketGranularity.DAY: 10,
+}
+STEP = {
+    ViewBucketGranularity.HOUR: timedelta(hours=1),
+    ViewBucketGranularity.DAY: timedelta(days=1),
+}
+
+
+def retention(granularity: str) -> timedelta:
+    """Сколько хранятся агрегаты / Wie lange Aggregate aufbewahrt werden"""
+    if granularity == ViewBucketGranularity.HOUR:
+        return timedelta(days=getattr(settings, "VIEW_STATS_HOUR_RETENTION_DAYS", 7))
+    return timedelta(days=getattr(settings, "VIEW_STATS_DAY_RETENTION_DAYS", 90))
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Начало часа/дня в UTC / Beginn der Stunde/des Tages in UTC"""
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if granularity == ViewBucketGranularity.DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def viewer_id(user_id: Optional[int], ip_address: Optional[str]) -> str:
+    if user_id is not None:
+        return f"u:{user_id}"
+    return f"ip:{ip_address or ''}"
+
+
+class ViewStatsService:
+    """Почасовые/дневные агрегаты просмотров объявлений /
+    Stündliche/tägliche Aggregate der Anzeigenaufrufe"""
+
+    @staticmethod
+    def record(batch: dict, moment: Optional[datetime] = None) -> None:
+        """
+        Добавляет пачку просмотров {(listing_id, user_id, ip): count} в текущие
+        часовой и дневной агрегаты: один SELECT ... FOR UPDATE, один bulk UPDATE
+        и один bulk INSERT.
+
+        Fügt einen Stapel Aufrufe {(listing_id, user_id, ip): count} zu den aktuellen
+        Stunden- und Tagesaggregaten hinzu: ein SELECT ... FOR UPDATE, ein bulk UPDATE
+        und ein bulk INSERT.
+        """
+        moment = moment or timezone.now()
+        per_listing = defaultdict(lambda: [0, set()])
+        for (listing_id, user_id, ip_address), count in batch.items():
+            entry = per_listing[listing_id]
+            entry[0] += count
+            entry[1].add(viewer_id(user_id, ip_address))
+        if not per_listing:
+            return
+
+        starts = {granularity: bucket_start(moment, granularity) for granularity in PRECISION}
+        # второй проход, если параллельный сброс успел создать тот же агрегат
+        # zweiter Durchlauf, falls ein paralleler Flush dasselbe Aggregat angelegt hat
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    ViewStatsService._apply(per_listing, starts)
+                return
+            except IntegrityError:
+                if attempt:
+                    raise
+
+    @staticmethod
+    def _apply(per_listing: dict, starts: dict) -> None:
+        current = reduce(or_, (
+            Q(granularity=granularity, bucket_start=start) for granularity, start in starts.items()
+        ))
+        existing = {
+            (bucket.listing_id, bucket.granularity): bucket
+            for bucket in ListingViewBucket.objects.select_for_update().filter(current, listing_id__in=per_listing)
+        }
+
+        updated, created = [], []
+        for listing_id, (views, viewers) in per_listing.items():
+            for granularity, start in starts.items():
+                bucket = existing.get((listing_id, granularity))
+                if bucket is None:
+                    sketch = HyperLogLog(precision=PRECISION[granularity])
+                    sketch.update(viewers)
+                    created.append(ListingViewBucket(
+                        listing_id=listing_id,
+                        granularity=granularity,
+                        bucket_start=start,
+                        views=views,
+                        viewers_sketch=sketch.to_bytes(),
+                    ))
+                else:
+                    sketch = HyperLogLog(bucket.viewers_sketch, precision=PRECISION[granularity])
+                    sketch.update(viewers)
+                    bucket.views = F("views") + views
+                    bucket.viewers_sketch = sketch.to_bytes()
+                    updated.append(bucket)
+
+        ListingViewBucket.objects.bulk_update(updated, ["views", "viewers_sketch"], batch_size=500)
+        ListingViewBucket.objects.bulk_create(created, batch_size=500)
+
+    @staticmethod
+    def series(listing_id: int, granularity: str, periods: int, now: Optional[datetime] = None) -> dict:
+        """
+        Ряд за последние periods часов/дней (пустые периоды — нули) и
+        уникальные зрители за весь диапазон из объединения скетчей.
+
+        Zeitreihe der letzten periods Stunden/Tage (leere Perioden — Nullen) und
+        eindeutige Betrachter im gesamten Bereich aus der Vereinigung der Sketches.
+        """
+        step = STEP[granularity]
+        last = bucket_start(now or timezone.now(), granularity)
+        first = last - step * (periods - 1)
+
+        buckets = {
+            bucket.bucket_start: bucket
+            for bucket in ListingViewBucket.objects.filter(
+                listing_id=listing_id,
+                granularity=granularity,
+                bucket_start__gte=first,
+                bucket_start__lte=last,
+            )
+        }
+
+        total = HyperLogLog(precision=PRECISION[granularity])
+        points = []
+        start = first
+        while start <= last:
+            bucket = buckets.get(start)
+            if bucket is None:
+                points.append({"start": start, "views": 0, "unique_viewers": 0})
+            else:
+                sketch = HyperLogLog(bucket.viewers_sketch, precision=PRECISION[granularity])
+                total.merge(sketch)
+                points.append({"start": start, "views": bucket.views, "unique_viewers": sketch.count()})
+            start += step
+
+        return {
+            "listing": listing_id,
+            "granularity": granularity,
+            "total_views": sum(point["views"] for point in points),
+            "unique_viewers": total.count(),
+            "series": points,
+        }
+
+    @staticmethod
+    def prune(now: Optional[datetime] = None) -> int:
+        """Удаляет агрегаты старше срока хранения / Löscht Aggregate älter als die Aufbewahrungsfrist"""
+        now = now or timezone.now()
+        deleted = 0
+        for granularity in PRECISION:
+            cutoff = bucket_start(now - retention(granularity), granularity)
+            deleted += ListingViewBucket.objects.filter(
+                granularity=granularity, bucket_start__lt=cutoff
+            ).delete()[0]
+        return deleted
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from src.apartments.models import Listing, Review
+from src.apartments.services import ListingCounterService, SearchIndexService, ListingCacheService
+from src.apartments.services.search_index import INDEXED_FIELDS
+
+
+@receiver(post_save, sender=Review)
+def increment_reviews_count(sender, instance, created, **kwargs):
+    """Увеличиваем reviews_count объявления при создании отзыва"""
+    if created:
+        ListingCounterService.add_reviews(instance.listing_id)
+
+
+@receiver(post_delete, sender=Review)
+def decrement_reviews_count(sender, instance, **kwargs):
+    """Уменьшаем reviews_count объявления при удалении отзыва"""
+    ListingCounterService.add_reviews(instance.listing_id, -1)
+
+
+@receiver(post_save, sender=Listing)
+def index_listing(sender, instance, update_fields=None, **kwargs):
+    """Обновляем поисковый индекс, если изменились индексируемые поля"""
+    if update_fields is not None and not INDEXED_FIELDS.intersection(update_fields):
+        return
+    SearchIndexService.index_listing(instance)
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_listing_cache(sender, **kwargs):
+    """Сбрасываем кэш ответов объявлений при изменении Listing/Review"""
+    ListingCacheService.invalidate()
@@ -1,3 +1,955 @@
-from django.test import TestCase
+import base64
+import json
+import threading
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from functools import partial
+from importlib.util import find_spec
+from io import StringIO
+from itertools import count
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from src.apartments.dtos import ListingDTO, ListingRowMapper
+from src.apartments.models import Listing, ListingSearchTerm, ListingViewBucket, Review, SearchHistory
+from src.apartments.models.listingview import ListingView
+from src.apartments.pagination import ListingKeysetPagination
+from src.apartments.services import (
+    ListingCacheService, ReviewService, SearchIndexService, SearchService, ViewService, ViewStatsService,
+)
+from src.apartments.services import trending
+from src.apartments.services.buffer import RedisWriteBehindBuffer, WriteBehindBuffer
+from src.apartments.services.hll import HyperLogLog
+from src.apartments.services.search_index import MAX_TERM_LENGTH, tokenize
+from src.apartments.services.trending import SpaceSaving, TrendingSearchService
+from src.benchmark import QueryBudgetTestCase, run_concurrently
+from src.booking.models import Booking
+from src.choices import BookingStatus, UserRole, ViewBucketGranularity
+from src.renderers import FastJSONRenderer
+
+
+class ListingQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Бюджеты запросов /listings/: число запросов не растёт с числом
+    объявлений, отзывов и арендодателей на странице.
+
+    Abfragebudgets von /listings/: die Anzahl der Abfragen wächst nicht mit der
+    Zahl der Anzeigen, Bewertungen und Vermieter auf der Seite.
+    """
+
+    serial = count()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = cls.make_user("budget_landlord", UserRole.LANDLORD)
+        cls.tenant = cls.make_user("budget_tenant", UserRole.TENANT)
+        cls.listing = cls.add_listing(cls.landlord)
+        cls.reviewed = cls.add_listing(cls.landlord)
+        cls.add_review(cls.listing)
+        Booking.objects.create(
+            listing=cls.reviewed, tenant=cls.tenant, start_date=date(2024, 1, 1), end_date=date(2024, 1, 3),
+            status=BookingStatus.CHECKED, cancellable_until=date(2023, 12, 29),
+        )
+
+    @staticmethod
+    def add_listing(landlord) -> Listing:
+        return Listing.objects.create(
+            landlord=landlord, title="Bright loft", description="quiet balcony", location="Berlin",
+            price=100, rooms=2, housing_type="apartment",
+        )
+
+    @classmethod
+    def add_review(cls, listing: Listing) -> Review:
+        tenant = cls.make_user(f"budget_reviewer_{next(cls.serial)}", UserRole.TENANT)
+        return Review.objects.create(tenant=tenant, listing=listing, rating=4, comment="nice")
+
+    def grow_listings(self):
+        # больше страницы и у разных арендодателей / mehr als eine Seite und bei verschiedenen Vermietern
+        for _ in range(12):
+            self.add_listing(self.make_user(f"budget_owner_{next(self.serial)}", UserRole.LANDLORD))
+
+    def grow_reviews(self):
+        for _ in range(12):
+            self.add_review(self.listing)
+
+    def test_list_anonymous(self):
+        client = self.client_for()
+        # COUNT + страница / COUNT + Seite
+        self.assertBudget(2, lambda: client.get("/api/v1/listings/"), grow=self.grow_listings)
+
+    def test_list_tenant(self):
+        client = self.client_for(self.tenant)
+        # + эпоха токена / + Token-Epoche
+        self.assertBudget(3, lambda: client.get("/api/v1/listings/"), grow=self.grow_listings)
+
+    def test_list_landlord(self):
+        client = self.client_for(self.landlord)
+        self.assertBudget(3, lambda: client.get("/api/v1/listings/"), grow=self.grow_listings)
+
+    @override_settings(LISTING_FAST_SERIALIZATION=False)
+    def test_list_with_listing_dto(self):
+        client = self.client_for()
+        # ListingDTO.landlord через select_related / ListingDTO.landlord über select_related
+        self.assertBudget(2, lambda: client.get("/api/v1/listings/"), grow=self.grow_listings)
+
+    def test_list_search(self):
+        client = self.client_for(self.tenant)
+        # + запись в историю поиска (upsert в savepoint) / + Eintrag in den Suchverlauf (Upsert im Savepoint)
+        self.assertBudget(
+            7, lambda: client.get("/api/v1/listings/", {"search": "loft"}),
+            grow=self.grow_listings,
+        )
+
+    def retrieve(self, client):
+        # первый просмотр создаёт строки просмотра и корзины, измеряется повторный
+        # der erste Aufruf legt Aufruf- und Bucket-Zeilen an, gemessen wird der wiederholte
+        path = f"/api/v1/listings/{self.listing.pk}/"
+        self.assertEqual(client.get(path).status_code, 200)
+        return lambda: client.get(path)
+
+    def test_retrieve_anonymous(self):
+        # объявление, последние отзывы, сводка + запись просмотра без буфера
+        # Anzeige, letzte Bewertungen, Übersicht + Schreiben des Aufrufs ohne Puffer
+        self.assertBudget(11, self.retrieve(self.client_for()), grow=self.grow_reviews)
+
+    def test_retrieve_tenant(self):
+        self.assertBudget(12, self.retrieve(self.client_for(self.tenant)), grow=self.grow_reviews)
+
+    def test_reviews(self):
+        client = self.client_for()
+        self.assertBudget(
+            2, lambda: client.get(f"/api/v1/listings/{self.listing.pk}/reviews/"), grow=self.grow_reviews
+        )
+
+    def test_my_listings(self):
+        client = self.client_for(self.landlord)
+
+        def grow():
+            for _ in range(12):
+                self.add_listing(self.landlord)
+
+        self.assertBudget(2, lambda: client.get("/api/v1/listings/my_listings/"), grow=grow)
+
+    def test_add_review(self):
+        client = self.client_for(self.tenant)
+        self.assertBudget(
+            6,
+            lambda: client.post(
+                f"/api/v1/listings/{self.reviewed.pk}/add_review/", {"rating": 5, "comment": "great"}, format="json"
+            ),
+            status=201,
+        )
+
+
+class ListingRowMapperTests(QueryBudgetTestCase):
+    """ListingRowMapper и FastJSONRenderer дают тот же JSON, что и ListingDTO /
+    ListingRowMapper und FastJSONRenderer liefern dasselbe JSON wie ListingDTO"""
+
+    @classmethod
+    def setUpTestData(cls):
+        landlord = cls.make_user("mapper_landlord", UserRole.LANDLORD)
+        for price, title in ((100, "Bright loft"), (Decimal("99.5"), "Zimmer – Köln\u2028"), (Decimal("1234567.89"), "Villa")):
+            Listing.objects.create(
+                landlord=landlord, title=title, description="", location="Berlin",
+                price=price, rooms=2, housing_type="apartment", views_count=7,
+            )
+        Listing.objects.filter(title="Villa").update(
+            is_active=False, created_at=datetime(2031, 3, 30, 23, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        )
+
+    def expected(self, include_is_active: bool) -> list[dict]:
+        request = mock.Mock(user=mock.Mock(is_staff=include_is_active))
+        data = ListingDTO(Listing.objects.order_by("id"), many=True, context={"request": request}).data
+        return [dict(row, landlord=dict(row["landlord"])) for row in data]
+
+    def mapped(self, include_is_active: bool) -> list[dict]:
+        mapper = ListingRowMapper(include_is_active=include_is_active)
+        return mapper.map_many(Listing.objects.order_by("id").values(*mapper.columns))
+
+    def test_mapper_matches_serializer(self):
+        with timezone.override("Europe/Berlin"):
+            for include_is_active in (False, True):
+                with self.subTest(include_is_active=include_is_active):
+                    self.assertEqual(self.mapped(include_is_active), self.expected(include_is_active))
+
+    def test_fast_renderer_matches_json_renderer(self):
+        data = self.mapped(include_is_active=True)
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertIn(b"\\u2028", FastJSONRenderer().render(data))
+
+
+class ReviewSummaryTests(QueryBudgetTestCase):
+    """Сводка и список отзывов объявления / Zusammenfassung und Liste der Bewertungen einer Anzeige"""
+
+    RATINGS = (5, 4, 4, 2, 5, 5, 1, 5, 3, 4, 5, 4)
+
+    @classmethod
+    def setUpTestData(cls):
+        landlord = cls.make_user("summary_landlord", UserRole.LANDLORD)
+        cls.listing = ListingQueryBudgetTests.add_listing(landlord)
+        cls.empty = ListingQueryBudgetTests.add_listing(landlord)
+        other = ListingQueryBudgetTests.add_listing(landlord)
+        started = datetime(2031, 1, 1, tzinfo=dt_timezone.utc)
+        for i, rating in enumerate(cls.RATINGS):
+            tenant = cls.make_user(f"summary_tenant_{i}", UserRole.TENANT)
+            review = Review.objects.create(tenant=tenant, listing=cls.listing, rating=rating, comment=f"review {i}")
+            Review.objects.filter(pk=review.pk).update(created_at=started + timedelta(days=i))
+            if i < 3:
+                Review.objects.create(tenant=tenant, listing=other, rating=1)
+
+    def test_summary_values(self):
+        self.assertEqual(ReviewService.summary(self.listing.pk), {
+            "count": 12,
+            "average_rating": 3.92,
+            "histogram": {"1": 1, "2": 1, "3": 1, "4": 4, "5": 5},
+        })
+        self.assertEqual(ReviewService.summary(self.empty.pk), {
+            "count": 0,
+            "average_rating": None,
+            "histogram": {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0},
+        })
+
+    def test_detail_embeds_summary_and_latest_reviews(self):
+        data = self.client_for().get(f"/api/v1/listings/{self.listing.pk}/").data
+
+        self.assertEqual(data["reviews_summary"], ReviewService.summary(self.listing.pk))
+        self.assertEqual([review["comment"] for review in data["reviews"]], [f"review {i}" for i in range(11, 6, -1)])
+        self.assertEqual(data["reviews"][0], {
+            "id": data["reviews"][0]["id"], "tenant": "summary_tenant_11", "rating": 4,
+            "comment": "review 11", "created_at": "2031-01-12 00:00:00",
+        })
+
+    def test_reviews_endpoint_pages_newest_first(self):
+        client = self.client_for()
+        first = client.get(f"/api/v1/listings/{self.listing.pk}/reviews/").data
+        second = client.get(first["next"]).data
+
+        comments = [review["comment"] for review in first["results"] + second["results"]]
+        self.assertEqual(comments, [f"review {i}" for i in range(11, -1, -1)])
+        self.assertEqual(len(first["results"]), 10)
+        self.assertIsNone(second["next"])
+        self.assertEqual([review["rating"] for review in second["results"]], [4, 5])
+
+
+class SearchQueryBudgetTests(QueryBudgetTestCase):
+    """Бюджеты запросов /search/ / Abfragebudgets von /search/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = cls.make_user("budget_searcher", UserRole.TENANT)
+        cls.keywords = count()
+        cls.add_searches(cls.tenant, 3)
+
+    @classmethod
+    def add_searches(cls, user, amount: int):
+        SearchHistory.objects.bulk_create(
+            SearchHistory(user=user, user_key=SearchHistory.key_for(user and user.pk), keyword=f"keyword {next(cls.keywords)}")
+            for _ in range(amount)
+        )
+
+    def test_popular(self):
+        client = self.client_for()
+        self.assertBudget(
+            1, lambda: client.get("/api/v1/search/popular/"),
+            grow=lambda: self.add_searches(None, 25),
+        )
+
+    def test_my(self):
+        client = self.client_for(self.tenant)
+        self.assertBudget(
+            2, lambda: client.get("/api/v1/search/my/"),
+            grow=lambda: self.add_searches(self.tenant, 25),
+        )
+
+
+class WriteBehindBufferTests(SimpleTestCase):
+    """Приращения буфера записываются ровно один раз / Puffer-Inkremente werden genau einmal geschrieben"""
+
+    def test_concurrent_adds_and_flushes_apply_each_increment_once(self):
+        applied = Counter()
+        lock = threading.Lock()
+
+        def callback(batch):
+            with lock:
+                applied.update(batch)
+
+        buffer = WriteBehindBuffer("test", callback, interval=3600, max_keys=7, background=False)
+
+        def worker(offset):
+            for i in range(500):
+                buffer.add((offset + i) % 20)
+                if i % 50 == 0:
+                    buffer.flush()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        buffer.flush()
+
+        self.assertEqual(sum(applied.values()), 8 * 500)
+        self.assertEqual(buffer.pending(), {})
+
+    def test_background_thread_survives_failed_flush(self):
+        buffer = WriteBehindBuffer("test", lambda batch: None, interval=0.01, background=True)
+        self.addCleanup(setattr, buffer, "interval", 3600)
+        calls = []
+        second = threading.Event()
+
+        def flush():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ConnectionError("redis is down")
+            second.set()
+            return 0
+
+        with mock.patch.object(buffer, "flush", flush):
+            with self.assertLogs("src.apartments.services.buffer", "ERROR"):
+                buffer.add("a")
+                self.assertTrue(second.wait(5))
+        self.assertTrue(buffer._thread.is_alive())
+
+    def test_failed_flush_keeps_increments(self):
+        calls = []
+
+        def callback(batch):
+            calls.append(batch)
+            if len(calls) == 1:
+                raise RuntimeError("database is down")
+
+        buffer = WriteBehindBuffer("test", callback, background=False)
+        buffer.add("a", 2)
+        with self.assertLogs("src.apartments.services.buffer", "ERROR"):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.pending(), {"a": 2})
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(calls[-1], {"a": 2})
+
+
+class SearchIndexTests(QueryBudgetTestCase):
+    """Инвертированный индекс объявлений / Invertierter Index der Anzeigen"""
+
+    @classmethod
+    def setUpTestData(cls):
+        landlord = cls.make_user("index_landlord", UserRole.LANDLORD)
+
+        def add(title, location, description=""):
+            return Listing.objects.create(
+                landlord=landlord, title=title, description=description, location=location,
+                price=100, rooms=2, housing_type="apartment",
+            )
+
+        cls.loft = add("Bright loft", "Berlin", "quiet balcony")
+        cls.studio = add("Cosy studio", "Berlin", "bright kitchen")
+        cls.house = add("Bright house", "Hamburg")
+
+    def search(self, query):
+        return set(SearchIndexService.search(Listing.objects.all(), query).values_list("pk", flat=True))
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Bright LOFT, 2 Zimmer — Straße"), ["bright", "loft", "zimmer", "strasse"])
+        self.assertEqual(tokenize("ＢＥＲＬＩＮ"), ["berlin"])
+        self.assertEqual(tokenize(None), [])
+        self.assertEqual(tokenize("x" * 100), ["x" * MAX_TERM_LENGTH])
+
+    def test_every_term_must_match_a_prefix(self):
+        self.assertEqual(self.search("bright"), {self.loft.pk, self.studio.pk, self.house.pk})
+        self.assertEqual(self.search("bri berl"), {self.loft.pk, self.studio.pk})
+        self.assertEqual(self.search("bright berlin balcony"), {self.loft.pk})
+        self.assertEqual(self.search("bright paris"), set())
+
+    def test_query_without_terms_matches_nothing(self):
+        for query in ("a", "x - y", "!!"):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), set())
+                response = self.client.get("/api/v1/listings/", {"search": query})
+                self.assertEqual(response.data["results"], [])
+        # пустой параметр фильтр не применяет / ein leerer Parameter filtert nicht
+        self.assertEqual(len(self.client.get("/api/v1/listings/", {"search": " "}).data["results"]), 3)
+
+    def test_results_are_ranked_by_field_weight(self):
+        response = self.client.get("/api/v1/listings/", {"search": "bright berlin"})
+
+        self.assertEqual(response.status_code, 200)
+        # в заголовке вес выше, чем в описании / im Titel wiegt ein Begriff mehr als in der Beschreibung
+        self.assertEqual([row["id"] for row in response.data["results"]], [self.loft.pk, self.studio.pk])
+
+    def test_edit_reindexes_listing(self):
+        self.loft.title = "Sunny penthouse"
+        self.loft.save()
+
+        self.assertEqual(self.search("penthouse"), {self.loft.pk})
+        self.assertEqual(self.search("loft"), set())
+
+    def test_delete_removes_terms(self):
+        pk = self.house.pk
+        self.house.delete()
+
+        self.assertFalse(ListingSearchTerm.objects.filter(listing_id=pk).exists())
+        self.assertEqual(self.search("hamburg"), set())
+
+    def test_rebuild_command(self):
+        ListingSearchTerm.objects.all().delete()
+        Listing.objects.filter(pk=self.studio.pk).update(title="Renamed flat")
+        out = StringIO()
+
+        call_command("rebuild_search_index", "--listing", str(self.studio.pk), stdout=out)
+        self.assertIn("Indexed 1 listings.", out.getvalue())
+        self.assertEqual(self.search("berlin"), {self.studio.pk})
+        self.assertEqual(self.search("renamed"), {self.studio.pk})
+
+        call_command("rebuild_search_index", "--chunk-size", "2", stdout=out)
+        self.assertIn("Indexed 3 listings.", out.getvalue())
+        self.assertEqual(self.search("berlin"), {self.loft.pk, self.studio.pk})
+        self.assertEqual(self.search("cosy"), set())
+
+
+class ListingKeysetPaginationTests(QueryBudgetTestCase):
+    """
+    Keyset-пагинация: стабильный порядок при равных ключах, переходы
+    вперёд и назад, 400 на испорченный курсор.
+
+    Keyset-Paginierung: stabile Reihenfolge bei gleichen Schlüsseln, Wechsel
+    vor und zurück, 400 bei manipuliertem Cursor.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        landlord = cls.make_user("keyset_landlord", UserRole.LANDLORD)
+        # три цены на 25 объявлений — много равных ключей / drei Preise für 25 Anzeigen — viele gleiche Schlüssel
+        Listing.objects.bulk_create(
+            Listing(
+                landlord=landlord, title=f"Keyset {n}", description="", location="Berlin",
+                price=100 + 50 * (n % 3), rooms=2, housing_type="apartment",
+            )
+            for n in range(25)
+        )
+        cls.by_price = list(Listing.objects.order_by("price", "id").values_list("id", flat=True))
+
+    def get(self, url_or_params):
+        if isinstance(url_or_params, str):
+            response = self.client.get(url_or_params)
+        else:
+            response = self.client.get("/api/v1/listings/", {"pagination": "cursor", **url_or_params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_next_links_cover_each_listing_once_in_order(self):
+        for ordering, expected in (("price", self.by_price), ("-price", self.by_price[::-1])):
+            with self.subTest(ordering=ordering):
+                page = self.get({"ordering": ordering})
+                self.assertIsNone(page["previous"])
+                seen = [row["id"] for row in page["results"]]
+                while page["next"]:
+                    page = self.get(page["next"])
+                    seen += [row["id"] for row in page["results"]]
+                self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_to_same_page(self):
+        first = self.get({"ordering": "price"})
+        second = self.get(first["next"])
+        third = self.get(second["next"])
+        self.assertIsNone(third["next"])
+
+        back_to_second = self.get(third["previous"])
+        self.assertEqual(back_to_second["results"], second["results"])
+        back_to_first = self.get(back_to_second["previous"])
+        self.assertEqual(back_to_first["results"], first["results"])
+        self.assertIsNone(back_to_first["previous"])
+        self.assertEqual(self.get(back_to_first["next"])["results"], second["results"])
+
+    def test_invalid_cursor_is_rejected(self):
+        def encode(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        cursors = {
+            "not base64": "%%%",
+            "bad padding": "abc",
+            "not json": base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+            "list": encode([1, 2]),
+            "missing id": encode({"o": "price", "v": "100"}),
+            "other ordering": ListingKeysetPagination.encode_cursor("-price", 100, 1),
+            "bad value": encode({"o": "price", "v": "cheap", "id": 1}),
+            "nan": encode({"o": "price", "v": "NaN", "id": 1}),
+            "huge id": encode({"o": "price", "v": "100", "id": 10 ** 30}),
+            "bad direction": encode({"o": "price", "v": "100", "id": 1, "r": 5}),
+        }
+        for name, cursor in cursors.items():
+            with self.subTest(name):
+                response = self.client.get("/api/v1/listings/", {"ordering": "price", "cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("cursor", response.data)
+
+
+@override_settings(LISTING_CACHE_TIMEOUT=60)
+class ListingCacheInvalidationTests(QueryBudgetTestCase):
+    """
+    Закэшированные ответы обновляются после фиксации изменений объявления;
+    бронирования сбрасывают только запросы с фильтром свободных дат.
+
+    Gecachte Antworten werden nach dem Commit von Anzeigenänderungen erneuert;
+    Buchungen verwerfen nur Anfragen mit dem Filter freier Daten.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = cls.make_user("cache_tenant", UserRole.TENANT)
+        cls.listing = ListingQueryBudgetTests.add_listing(cls.make_user("cache_landlord", UserRole.LANDLORD))
+
+    def setUp(self):
+        cache.clear()
+        self.client = self.client_for()
+
+    def titles(self, params=None):
+        return [row["title"] for row in self.client.get("/api/v1/listings/", params or {}).data["results"]]
+
+    def rename(self, title: str):
+        self.listing.title = title
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing.save()
+
+    def test_listing_edit_invalidates_list_and_detail(self):
+        detail = f"/api/v1/listings/{self.listing.pk}/"
+        self.assertEqual(self.titles(), ["Bright loft"])
+        self.assertEqual(self.client.get(detail).data["title"], "Bright loft")
+
+        self.rename("Quiet studio")
+
+        self.assertEqual(self.titles(), ["Quiet studio"])
+        self.assertEqual(self.client.get(detail).data["title"], "Quiet studio")
+
+    def test_version_changes_only_after_commit(self):
+        version = ListingCacheService.get_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.listing.save()
+            self.assertEqual(ListingCacheService.get_version(), version)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(ListingCacheService.get_version(), version)
+
+    def test_booking_invalidates_only_availability_queries(self):
+        dates = {"available_from": "2031-01-01", "available_to": "2031-01-05"}
+        self.assertEqual(self.titles(dates), ["Bright loft"])
+        version = ListingCacheService.get_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                listing=self.listing, tenant=self.tenant, start_date=date(2031, 1, 2), end_date=date(2031, 1, 4),
+                status=BookingStatus.CONFIRMED, cancellable_until=date(2030, 12, 30),
+            )
+
+        self.assertEqual(ListingCacheService.get_version(), version)
+        self.assertEqual(self.titles(dates), [])
+
+
+class ListingAvailabilityFilterTests(QueryBudgetTestCase):
+    """
+    Фильтр available_from/available_to исключает только объявления с активными
+    бронями, пересекающими полуоткрытое окно.
+
+    Der Filter available_from/available_to schließt nur Anzeigen mit aktiven
+    Buchungen aus, die das halboffene Fenster überschneiden.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        landlord = cls.make_user("available_landlord", UserRole.LANDLORD)
+        tenant = cls.make_user("available_tenant", UserRole.TENANT)
+        bookings = {
+            "pending": (BookingStatus.PENDING, date(2031, 1, 3), date(2031, 1, 6)),
+            "confirmed": (BookingStatus.CONFIRMED, date(2031, 1, 8), date(2031, 1, 12)),
+            "cancelled": (BookingStatus.CANCELLED, date(2031, 1, 5), date(2031, 1, 10)),
+            "rejected": (BookingStatus.REJECTED, date(2031, 1, 6), date(2031, 1, 7)),
+            "checkout on from": (BookingStatus.CONFIRMED, date(2031, 1, 1), date(2031, 1, 5)),
+            "checkin on to": (BookingStatus.CONFIRMED, date(2031, 1, 10), date(2031, 1, 12)),
+            "outside": (BookingStatus.CONFIRMED, date(2031, 2, 1), date(2031, 2, 5)),
+            "free": None,
+        }
+        for title, booking in bookings.items():
+            listing = Listing.objects.create(
+                landlord=landlord, title=title, description="", location="Berlin",
+                price=100, rooms=2, housing_type="apartment",
+            )
+            if booking:
+                status, start_date, end_date = booking
+                Booking.objects.create(
+                    listing=listing, tenant=tenant, status=status, start_date=start_date, end_date=end_date,
+                    cancellable_until=start_date,
+                )
+
+    def titles(self, **params):
+        response = self.client_for().get("/api/v1/listings/", params)
+        self.assertEqual(response.status_code, 200)
+        return {row["title"] for row in response.data["results"]}
+
+    def test_overlapping_active_bookings_are_excluded(self):
+        self.assertEqual(
+            self.titles(available_from="2031-01-05", available_to="2031-01-10"),
+            {"cancelled", "rejected", "checkout on from", "checkin on to", "outside", "free"},
+        )
+
+    def test_single_bound_is_one_night(self):
+        # [01-04, 01-05): выезд 01-05 ещё занимает ночь / Abreise am 01-05 belegt die Nacht noch
+        self.assertEqual(
+            self.titles(available_from="2031-01-04"),
+            {"confirmed", "cancelled", "rejected", "checkin on to", "outside", "free"},
+        )
+        self.assertEqual(self.titles(available_to="2031-01-05"), self.titles(available_from="2031-01-04"))
+
+    def test_empty_window_is_rejected(self):
+        response = self.client_for().get("/api/v1/listings/", {"available_from": "2031-01-05", "available_to": "2031-01-05"})
+        self.assertEqual(response.status_code, 400)
+
+
+class SearchWriteTests(TransactionTestCase):
+    """Пачка запросов пишется одним upsert / Ein Stapel Suchanfragen wird mit einem Upsert geschrieben"""
+
+    def setUp(self):
+        self.user = QueryBudgetTestCase.make_user("searcher", UserRole.TENANT)
+        self.batch = {(None, "berlin loft"): 2, (None, "hamburg"): 1, (self.user.pk, "berlin loft"): 3}
+
+    def assertRows(self, times: int):
+        rows = sorted(SearchHistory.objects.values_list("user_id", "keyword", "search_count"), key=str)
+        expected = [(None, "berlin loft", 2 * times), (None, "hamburg", times), (self.user.pk, "berlin loft", 3 * times)]
+        self.assertEqual(rows, sorted(expected, key=str))
+
+    def test_repeated_flushes_merge_anonymous_keywords(self):
+        for _ in range(3):
+            SearchService.write_searches(self.batch)
+        self.assertRows(3)
+
+    # параллельные записи в разные строки SQLite не поддерживает (database table is locked)
+    # parallele Schreibzugriffe auf verschiedene Zeilen unterstützt SQLite nicht (database table is locked)
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_concurrent_flushes_merge_anonymous_keywords(self):
+        result = run_concurrently(SearchService.write_searches, [[self.batch]] * 20, threads=4)
+
+        self.assertEqual(result["errors"], [])
+        self.assertRows(20)
+
+
+class ViewWriteTests(TestCase):
+    """Пачка просмотров пишется одним upsert / Ein Stapel Aufrufe wird mit einem Upsert geschrieben"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = QueryBudgetTestCase.make_user("viewer", UserRole.TENANT)
+        cls.listing = ListingQueryBudgetTests.add_listing(QueryBudgetTestCase.make_user("owner", UserRole.LANDLORD))
+
+    def test_repeated_batches_increment_existing_rows(self):
+        batch = {
+            (self.listing.pk, self.user.pk, "10.0.0.1"): 2,
+            (self.listing.pk, None, "10.0.0.2"): 3,
+            (self.listing.pk, None, None): 1,
+        }
+        ViewService.write_views(batch)
+        ViewService.write_views(batch)
+
+        views = {
+            (view.user_id, view.ip_address): view.view_count
+            for view in ListingView.objects.filter(listing=self.listing)
+        }
+        self.assertEqual(views, {(self.user.pk, "10.0.0.1"): 4, (None, "10.0.0.2"): 6, (None, None): 2})
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.views_count, 12)
+
+    def test_deleted_listing_is_dropped(self):
+        ViewService.write_views({(self.listing.pk + 1000, None, "10.0.0.3"): 1})
+        self.assertFalse(ListingView.objects.exists())
+
+
+class ReconcileCountersTests(TestCase):
+    """Команда восстанавливает испорченные счётчики / Der Befehl stellt verfälschte Zähler wieder her"""
+
+    @classmethod
+    def setUpTestData(cls):
+        landlord = QueryBudgetTestCase.make_user("reconcile_landlord", UserRole.LANDLORD)
+        cls.listings = [ListingQueryBudgetTests.add_listing(landlord) for _ in range(3)]
+        first, second, _ = cls.listings
+        for i in range(3):
+            tenant = QueryBudgetTestCase.make_user(f"reconcile_tenant_{i}", UserRole.TENANT)
+            Review.objects.create(tenant=tenant, listing=first, rating=5)
+            ListingView.objects.create(
+                listing=first, user=tenant, view_count=i + 1, viewer_key=ListingView.key_for(tenant.pk, None),
+            )
+        ListingView.objects.create(
+            listing=second, ip_address="10.0.0.9", view_count=4, viewer_key=ListingView.key_for(None, "10.0.0.9"),
+        )
+
+    def counters(self) -> list[tuple[int, int]]:
+        return [
+            (listing.views_count, listing.reviews_count)
+            for listing in Listing.objects.filter(pk__in=[listing.pk for listing in self.listings]).order_by("pk")
+        ]
+
+    def reconcile(self, *args) -> str:
+        out = StringIO()
+        call_command("reconcile_listing_counters", *args, stdout=out)
+        return out.getvalue()
+
+    def test_corrupted_counters_are_restored(self):
+        Listing.objects.filter(pk__in=[listing.pk for listing in self.listings]).update(views_count=99, reviews_count=7)
+
+        # chunk 2 при трёх объявлениях — два прохода / chunk 2 bei drei Anzeigen — zwei Durchläufe
+        output = self.reconcile("--chunk-size", "2")
+
+        self.assertEqual(self.counters(), [(6, 3), (4, 0), (0, 0)])
+        self.assertIn(f"Reconciled counters for {Listing.objects.count()} listings.", output)
+
+    def test_listing_option_limits_the_update(self):
+        first, second, third = self.listings
+        Listing.objects.filter(pk__in=[first.pk, third.pk]).update(views_count=99, reviews_count=7)
+
+        output = self.reconcile("--listing", str(first.pk))
+
+        self.assertEqual(self.counters(), [(6, 3), (0, 0), (99, 7)])
+        self.assertIn("Reconciled counters for 1 listings.", output)
+
+
+class HyperLogLogTests(SimpleTestCase):
+    """Оценка и объединение скетчей / Schätzung und Vereinigung der Sketches"""
+
+    @staticmethod
+    def sketch(values, precision=10):
+        sketch = HyperLogLog(precision=precision)
+        sketch.update(f"viewer-{value}" for value in values)
+        return sketch
+
+    def test_count_within_error_bound(self):
+        # стандартная ошибка ≈ 3.25%, допускаем три / Standardfehler ≈ 3.25%, drei sind erlaubt
+        for size in (10, 1000, 20000):
+            with self.subTest(size=size):
+                self.assertAlmostEqual(self.sketch(range(size)).count(), size, delta=max(1, size * 0.1))
+
+    def test_duplicates_do_not_count(self):
+        self.assertEqual(self.sketch(list(range(50)) * 20).count(), self.sketch(range(50)).count())
+
+    def test_merge_is_union(self):
+        first, second = self.sketch(range(6000)), self.sketch(range(3000, 9000))
+        union = HyperLogLog(first.to_bytes()).merge(second)
+
+        self.assertAlmostEqual(union.count(), 9000, delta=900)
+        self.assertEqual(union.to_bytes(), HyperLogLog(second.to_bytes()).merge(first).to_bytes())
+        self.assertEqual(HyperLogLog(first.to_bytes()).merge(first).count(), first.count())
+
+    def test_precision_mismatch(self):
+        with self.assertRaises(ValueError):
+            self.sketch(range(10)).merge(self.sketch(range(10), precision=8))
+        with self.assertRaises(ValueError):
+            HyperLogLog(bytes(10))
+
+
+class ViewStatsTests(TestCase):
+    """Почасовые и дневные агрегаты просмотров / Stündliche und tägliche Aufrufaggregate"""
+
+    moment = datetime(2031, 5, 10, 12, 30, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.listing = ListingQueryBudgetTests.add_listing(QueryBudgetTestCase.make_user("stats_owner", UserRole.LANDLORD))
+
+    def record(self, viewers, moment):
+        ViewStatsService.record({(self.listing.pk, None, viewer): 2 for viewer in viewers}, moment=moment)
+
+    def test_batches_roll_up_into_hour_and_day_buckets(self):
+        self.record(["10.0.0.1", "10.0.0.2"], self.moment)
+        self.record(["10.0.0.2", "10.0.0.3"], self.moment + timedelta(minutes=20))
+        self.record(["10.0.0.4"], self.moment + timedelta(hours=1))
+
+        buckets = {
+            (bucket.granularity, bucket.bucket_start.hour): bucket.views
+            for bucket in ListingViewBucket.objects.filter(listing=self.listing)
+        }
+        self.assertEqual(buckets, {
+            (ViewBucketGranularity.HOUR, 12): 8,
+            (ViewBucketGranularity.HOUR, 13): 2,
+            (ViewBucketGranularity.DAY, 0): 10,
+        })
+
+        hours = ViewStatsService.series(
+            self.listing.pk, ViewBucketGranularity.HOUR, 3, now=self.moment + timedelta(hours=1)
+        )
+        self.assertEqual([point["views"] for point in hours["series"]], [0, 8, 2])
+        self.assertEqual(hours["total_views"], 10)
+        # 256 регистров: при малом числе зрителей возможна коллизия
+        # 256 Register: bei wenigen Betrachtern ist eine Kollision möglich
+        self.assertAlmostEqual(hours["unique_viewers"], 4, delta=1)
+        self.assertEqual(hours["series"][0]["unique_viewers"], 0)
+
+        days = ViewStatsService.series(self.listing.pk, ViewBucketGranularity.DAY, 2, now=self.moment)
+        self.assertEqual([point["views"] for point in days["series"]], [0, 10])
+        self.assertAlmostEqual(days["unique_viewers"], 4, delta=1)
+
+    @override_settings(VIEW_STATS_HOUR_RETENTION_DAYS=1, VIEW_STATS_DAY_RETENTION_DAYS=3)
+    def test_prune_drops_expired_buckets(self):
+        now = timezone.now()
+        self.record(["10.0.0.1"], now - timedelta(days=5))
+        self.record(["10.0.0.1"], now - timedelta(days=2))
+        self.record(["10.0.0.1"], now)
+        out = StringIO()
+
+        call_command("prune_listing_view_stats", stdout=out)
+
+        # часовые старше суток и дневные старше трёх дней / Stunden älter als ein Tag und Tage älter als drei Tage
+        self.assertIn("Deleted 3 expired view buckets.", out.getvalue())
+        remaining = ListingViewBucket.objects.values_list("granularity", "bucket_start")
+        self.assertEqual(sorted(remaining), sorted([
+            (ViewBucketGranularity.HOUR, now.replace(minute=0, second=0, microsecond=0)),
+            (ViewBucketGranularity.DAY, (now - timedelta(days=2)).replace(hour=0, minute=0, second=0, microsecond=0)),
+            (ViewBucketGranularity.DAY, now.replace(hour=0, minute=0, second=0, microsecond=0)),
+        ]))
+
+
+class SpaceSavingTests(SimpleTestCase):
+    """Границы ошибки и взвешенное объединение / Fehlergrenzen und gewichtete Vereinigung"""
+
+    def test_counts_bound_true_frequency(self):
+        stream = ["a"] * 50 + ["b"] * 30 + [f"rare{i}" for i in range(40)] + ["a"] * 10 + ["c"] * 5
+        truth = Counter(stream)
+        summary = SpaceSaving(5)
+        for item in stream:
+            summary.add(item)
+
+        # частые элементы (> N/capacity) не теряются / häufige Elemente (> N/capacity) gehen nicht verloren
+        self.assertEqual([item for item, _ in summary.top(2)], ["a", "b"])
+        for item, (estimate, error) in summary.counters.items():
+            self.assertLessEqual(estimate - error, truth[item])
+            self.assertGreaterEqual(estimate, truth[item])
+        self.assertEqual(sum(estimate for estimate, _ in summary.counters.values()), len(stream))
+
+    def test_weighted_merge(self):
+        first = SpaceSaving(3, {"a": [10, 0], "b": [4, 1]})
+        second = SpaceSaving(3, {"a": [2, 0], "c": [8, 2], "d": [1, 0]})
+
+        merged = SpaceSaving.merge(3, [(first, 1.0), (second, 0.5)])
+
+        self.assertEqual(merged.counters, {"a": [11.0, 0.0], "b": [4.0, 1.0], "c": [4.0, 1.0]})
+
+
+@override_settings(TRENDING_SEARCH_CAPACITY=10, TRENDING_SEARCH_HALF_LIFE_HOURS=2)
+class TrendingSearchTests(TestCase):
+    """Окна популярных запросов по сводкам в кэше / Fenster der Top-Anfragen aus den Cache-Zusammenfassungen"""
+
+    now = datetime(2031, 5, 10, 12, 30, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        cache.clear()
+
+    def totals(self, window, now=None):
+        return {row["keyword"]: row["total"] for row in TrendingSearchService.top(window, now=now or self.now)}
+
+    def test_decay(self):
+        TrendingSearchService.record({"loft": 80, "studio": 8}, now=self.now)
+
+        self.assertEqual(self.totals("trending"), {"loft": 80, "studio": 8})
+        # два периода полураспада / zwei Halbwertszeiten
+        self.assertEqual(self.totals("trending", self.now + timedelta(hours=4)), {"loft": 20, "studio": 2})
+
+        TrendingSearchService.record({"studio": 30}, now=self.now + timedelta(hours=4))
+        self.assertEqual(
+            [row["keyword"] for row in TrendingSearchService.top("trending", now=self.now + timedelta(hours=4))],
+            ["studio", "loft"],
+        )
+
+    def test_sliding_window_weights_oldest_bucket(self):
+        TrendingSearchService.record({"loft": 10}, now=self.now - timedelta(hours=1))
+        TrendingSearchService.record({"loft": 4, "studio": 6}, now=self.now)
+
+        # в 12:30 от корзины 11:00 в часовое окно попадает половина
+        # um 12:30 fällt die Hälfte des 11:00-Buckets ins Stundenfenster
+        self.assertEqual(self.totals("hour"), {"loft": 9, "studio": 6})
+        self.assertEqual(self.totals("day"), {"loft": 14, "studio": 6})
+        self.assertEqual(self.totals("hour", self.now + timedelta(minutes=30)), {"loft": 4, "studio": 6})
+        self.assertEqual(self.totals("hour", self.now + timedelta(hours=2)), {})
+
+    def test_busy_lock_defers_batch(self):
+        self.assertTrue(cache.add(trending.LOCK_KEY, 1))
+        with mock.patch.object(trending, "_lock", partial(trending._lock, wait=0)):
+            with self.assertLogs("src.apartments.services.trending", "WARNING"):
+                TrendingSearchService.record({"loft": 3}, now=self.now)
+            # сводки не тронуты без блокировки / ohne Sperre bleiben die Zusammenfassungen unberührt
+            self.assertEqual(self.totals("hour"), {})
+
+            cache.delete(trending.LOCK_KEY)
+            TrendingSearchService.record({"studio": 1}, now=self.now)
+
+        self.assertEqual(self.totals("hour"), {"loft": 3, "studio": 1})
+
+    def test_rebuild_replaces_all_time_summary(self):
+        self.assertEqual(self.totals("all"), {})
+        # вставка в обход record / Einfügen am record vorbei
+        SearchHistory.objects.bulk_create([
+            SearchHistory(keyword="studio", search_count=7),
+            SearchHistory(keyword="loft", search_count=2),
+        ])
+        self.assertEqual(self.totals("all"), {})
+
+        TrendingSearchService.rebuild()
+        self.assertEqual(self.totals("all"), {"studio": 7, "loft": 2})
+
+
+REDIS_CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": settings.REDIS_URL}}
+
+
+@skipUnless(settings.REDIS_URL and find_spec("redis"), "needs REDIS_URL and the redis package")
+@override_settings(CACHES=REDIS_CACHES)
+class RedisWriteBehindBufferTests(SimpleTestCase):
+    """Общий буфер в Redis при нескольких сбрасывающих / Gemeinsamer Redis-Puffer bei mehreren Flushern"""
+
+    def make_buffer(self, callback):
+        buffer = RedisWriteBehindBuffer(
+            f"test-{uuid.uuid4().hex}", callback, encode=str, decode=int, max_keys=10 ** 6, background=False
+        )
+        self.addCleanup(buffer._client().delete, buffer.hash_key, buffer.processing_key, buffer.lock_key)
+        return buffer
+
+    def increment(self, buffer, keys):
+        for key in keys:
+            buffer._client().hincrby(buffer.hash_key, buffer.encode(key), 1)
+
+    def test_concurrent_flushes_apply_each_increment_once(self):
+        applied = Counter()
+        writing = threading.Event()
+        proceed = threading.Event()
+
+        def slow_callback(batch):
+            writing.set()
+            proceed.wait(5)
+            applied.update(batch)
+
+        buffer = self.make_buffer(slow_callback)
+        self.increment(buffer, [1, 1, 2])
+        first = threading.Thread(target=buffer.flush)
+        first.start()
+        self.assertTrue(writing.wait(5))
+
+        # второй процесс во время записи первого / ein zweiter Prozess während der erste schreibt
+        self.increment(buffer, [2, 3])
+        self.assertEqual(buffer.flush(), 0)
+        proceed.set()
+        first.join()
+        self.assertEqual(buffer.flush(), 2)
+
+        self.assertEqual(applied, Counter({1: 2, 2: 2, 3: 1}))
+        self.assertEqual(buffer.pending(), {})
+
+    def test_unfinished_processing_hash_is_retried(self):
+        applied = Counter()
+        buffer = self.make_buffer(applied.update)
+        self.increment(buffer, [5, 5])
+        # процесс упал после переименования / der Prozess ist nach dem Umbenennen abgestürzt
+        buffer._client().rename(buffer.hash_key, buffer.processing_key)
+        self.increment(buffer, [6])
+
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(applied, Counter({5: 2, 6: 1}))
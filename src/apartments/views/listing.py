@@ -1,17 +1,27 @@
+from datetime import timedelta
+
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.filters import SearchFilter, OrderingFilter
-from django_filters.rest_framework import DjangoFilterBackend, FilterSet, NumberFilter, CharFilter
-from django.db.models import Q, Count, Sum, Value
-from django.db.models.functions import Coalesce
+from django_filters.rest_framework import DjangoFilterBackend, FilterSet, NumberFilter, CharFilter, DateFilter
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
 
-from src.apartments.models import Listing
-from src.apartments.dtos import ListingDTO, ListingCompactDTO, ReviewCreateDTO, ReviewDTO, ListingDetailDTO
-from src.permissions import IsLandlordOrAdmin, IsTenant
-from src.apartments.services import ViewService, SearchService
+from src.apartments.filters import ListingSearchFilter, ListingOrderingFilter
+from src.apartments.models import Listing, ACTIVE_LISTINGS
+from src.apartments.pagination import ListingKeysetPagination, ReviewCursorPagination
+from src.apartments.dtos import ListingDTO, ListingCompactDTO, ReviewCreateDTO, ReviewDTO, ListingDetailDTO, ListingRowMapper
+from src.apartments.dtos import ListingViewStatsQueryDTO, ListingViewStatsDTO
+from src.apartments.dtos import ListingAvailabilityQueryDTO, ListingAvailabilityDTO
+from src.permissions import IsLandlordOrAdmin, IsListingOwnerOrAdmin, IsTenant
+from src.apartments.services import ViewService, SearchService, ListingCacheService, ReviewService, ViewStatsService
+from src.booking.models import Booking, ACTIVE_BOOKING_STATUSES
+from src.booking.services import AvailabilityService
+from src.choices import UserRole
+from src.throttling import ThrottleFirstMixin
 
 
 class ListingFilter(FilterSet):
@@ -21,6 +31,10 @@ class ListingFilter(FilterSet):
     max_rooms = NumberFilter(field_name="rooms", lookup_expr="lte")
     location = CharFilter(field_name="location", lookup_expr="icontains")
     housing_type = CharFilter(field_name="housing_type", lookup_expr="exact")
+    # свободен в [available_from, available_to) — см. filter_queryset
+    # frei in [available_from, available_to) — siehe filter_queryset
+    available_from = DateFilter(method="filter_available")
+    available_to = DateFilter(method="filter_available")
 
     class Meta:
         model = Listing
@@ -30,10 +44,46 @@ class ListingFilter(FilterSet):
             "min_rooms",
             "max_rooms",
             "location",
-            "housing_type"
+            "housing_type",
+            "available_from",
+            "available_to"
         ]
 
-class ListingViewSet(ModelViewSet):
+    def filter_available(self, queryset, name, value):
+        # обе границы применяются вместе в filter_queryset
+        # beide Grenzen werden zusammen in filter_queryset angewendet
+        return queryset
+
+    def filter_queryset(self, queryset):
+        """
+        Исключает объявления с активными бронированиями, пересекающими
+        [available_from, available_to), одним анти-джойном (NOT EXISTS по booking_overlap_idx).
+        Одна граница — одна ночь.
+
+        Schließt Anzeigen mit aktiven Buchungen aus, die [available_from, available_to)
+        überschneiden, per Anti-Join (NOT EXISTS über booking_overlap_idx).
+        Eine einzelne Grenze bedeutet eine Nacht.
+        """
+        queryset = super().filter_queryset(queryset)
+        start = self.form.cleaned_data.get("available_from")
+        end = self.form.cleaned_data.get("available_to")
+        if not start and not end:
+            return queryset
+
+        start = start or end - timedelta(days=1)
+        end = end or start + timedelta(days=1)
+        if end <= start:
+            raise ValidationError({"available_to": "Must be later than available_from."})
+
+        overlapping = Booking.objects.filter(
+            listing=OuterRef("pk"),
+            status__in=ACTIVE_BOOKING_STATUSES,
+            start_date__lt=end,
+            end_date__gt=start,
+        )
+        return queryset.filter(~Exists(overlapping))
+
+class ListingViewSet(ThrottleFirstMixin, ModelViewSet):
     """
     ViewSet для работы с объявлениями о недвижимости.
     Позволяет просматривать, создавать, обновлять и удалять объявления.
@@ -63,14 +113,29 @@ class ListingViewSet(ModelViewSet):
     permission_classes = [IsLandlordOrAdmin]
     filter_backends = [
         DjangoFilterBackend,
-        SearchFilter,
-        OrderingFilter
+        ListingSearchFilter,
+        ListingOrderingFilter
     ]
     filterset_class = ListingFilter
     search_fields = ["title", "description", "location"]  # Suche nach Schlüsselwörtern
     ordering_fields = ["price", "created_at", "views_count", "reviews_count"]  # Sortierung nach Preis und Erstellungsdatum
     ordering = ["-created_at"]  # standardmäßig neue Einträge zuerst
 
+    @property
+    def paginator(self):
+        """
+        Keyset-пагинация по запросу (?pagination=cursor), иначе стандартная.
+        Keyset-Paginierung auf Anfrage (?pagination=cursor), sonst die Standard-Paginierung.
+        """
+        if not hasattr(self, "_paginator"):
+            if self.request is not None and ListingKeysetPagination.is_requested(self.request):
+                self._paginator = ListingKeysetPagination()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_serializer_class(self):
         """
         Возвращает сериализатор в зависимости от действия.
@@ -113,22 +178,18 @@ class ListingViewSet(ModelViewSet):
         - Andere: nur aktive Anzeigen
         """
         user = self.request.user
-        qs = (
-            Listing.objects.all()
-            .annotate(
-                views_count=Coalesce(Sum("views__view_count"), Value(0)),
-                reviews_count=Count("reviews", distinct=True)
-            )
-        )
-
-        # --- сохраняем поисковый запрос ---
-        keyword = self.request.query_params.get("search")
-        if keyword:
-            SearchService.log_search(user, keyword)
+        # views_count / reviews_count — денормализованные поля модели
+        qs = Listing.objects.all()
+        if self.action == "list":
+            # арендодатель одним JOIN, а не запросом на каждую строку
+            qs = qs.select_related("landlord")
+        elif self.action == "retrieve":
+            # арендодатель и последние отзывы с арендаторами — без N+1
+            qs = qs.select_related("landlord").prefetch_related(ReviewService.latest_prefetch())
 
         if not user.is_authenticated:
             # nicht authentifizierte Benutzer sehen nur aktive Anzeigen
-            return qs.filter(is_active=True)
+            return qs.filter(ACTIVE_LISTINGS)
 
         if user.is_staff:
             # Administratoren sehen alle Anzeigen
@@ -136,10 +197,84 @@ class ListingViewSet(ModelViewSet):
 
         if hasattr(user, "profile") and user.profile.role == "landlord":
             # Vermieter sehen alle eigenen Anzeigen + andere aktive
-            return qs.filter(Q(is_active=True) | Q(landlord=user))
+            return qs.filter(ACTIVE_LISTINGS | Q(landlord=user))
 
         # andere (z.B. Mieter) sehen nur aktive Anzeigen
-        return qs.filter(is_active=True)
+        return qs.filter(ACTIVE_LISTINGS)
+
+    def is_response_cacheable(self, request) -> bool:
+        """
+        Кэшируем ответы только для анонимов и арендаторов — они видят одно и то же.
+        Nur Antworten für Anonyme und Mieter werden gecacht — sie sehen dasselbe.
+        """
+        if ListingCacheService.timeout() <= 0:
+            return False
+        user = request.user
+        if not user.is_authenticated:
+            return True
+        return not user.is_staff and hasattr(user, "profile") and user.profile.role == UserRole.TENANT
+
+    def cache_params(self):
+        """Параметры запроса, влияющие на ответ / Anfrageparameter, die die Antwort beeinflussen"""
+        return [
+            *self.filterset_class.base_filters,
+            ListingSearchFilter.search_param,
+            ListingOrderingFilter.ordering_param,
+            "page",
+            "pagination",
+            ListingKeysetPagination.cursor_query_param,
+            "format",
+        ]
+
+    @staticmethod
+    def is_first_page(request) -> bool:
+        """Первая страница выдачи, а не продолжение /
+        Erste Ergebnisseite, keine Folgeseite"""
+        params = request.query_params
+        if params.get(ListingKeysetPagination.cursor_query_param):
+            return False
+        return params.get("page", "1").strip() in ("", "1")
+
+    def list(self, request, *args, **kwargs):
+        """
+        Список объявлений с кэшированием ответа для анонимов и арендаторов.
+        Anzeigenliste mit Antwort-Cache für Anonyme und Mieter.
+        """
+        # --- сохраняем поисковый запрос (только первая страница) ---
+        keyword = request.query_params.get("search")
+        if keyword and self.is_first_page(request):
+            SearchService.log_search(request.user, keyword)
+
+        if not self.is_response_cacheable(request):
+            return self.list_response(request, *args, **kwargs)
+
+        key = ListingCacheService.make_key(request, "list", self.cache_params())
+        data = ListingCacheService.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = self.list_response(request, *args, **kwargs)
+        ListingCacheService.set(key, response.data)
+        return response
+
+    def list_response(self, request, *args, **kwargs):
+        """
+        Страница списка: строки из .values() через ListingRowMapper (тот же JSON,
+        что и ListingDTO) или ListingDTO, если LISTING_FAST_SERIALIZATION выключен.
+
+        Listenseite: Zeilen aus .values() über ListingRowMapper (dasselbe JSON
+        wie ListingDTO) oder ListingDTO, falls LISTING_FAST_SERIALIZATION deaktiviert ist.
+        """
+        if not getattr(settings, "LISTING_FAST_SERIALIZATION", True):
+            return super().list(request, *args, **kwargs)
+
+        mapper = ListingRowMapper(include_is_active=request.user.is_staff)
+        queryset = self.filter_queryset(self.get_queryset()).values(*mapper.columns)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(mapper.map_many(page))
+        return Response(mapper.map_many(queryset))
 
     def retrieve(self, request, *args, **kwargs):
         """
@@ -149,13 +284,26 @@ class ListingViewSet(ModelViewSet):
         Gibt die Details einer Anzeige zurück.
         Berücksichtigt Ansichten von authentifizierten und anonymen Benutzern.
         """
+        cacheable = self.is_response_cacheable(request)
+        if cacheable:
+            key = ListingCacheService.make_key(request, "retrieve", ["format"], pk=kwargs.get(self.lookup_field))
+            data = ListingCacheService.get(key)
+            if data is not None:
+                self._record_view(request, data["id"], data["landlord"]["id"])
+                return Response(data)
+
         listing = self.get_object()
-        
-        # Учитываем просмотр, если пользователь не владелец объявления
-        if not request.user.is_authenticated or request.user.id != listing.landlord_id:
-            ViewService.record_view(listing, request)
+        self._record_view(request, listing.pk, listing.landlord_id)
 
-        return super().retrieve(request, *args, **kwargs)
+        serializer = self.get_serializer(listing)
+        if cacheable:
+            ListingCacheService.set(key, serializer.data)
+        return Response(serializer.data)
+
+    def _record_view(self, request, listing_id, landlord_id):
+        # Учитываем просмотр, если пользователь не владелец объявления
+        if not request.user.is_authenticated or request.user.id != landlord_id:
+            ViewService.record_view(listing_id, request)
 
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
     def my_listings(self, request):
@@ -196,3 +344,60 @@ class ListingViewSet(ModelViewSet):
         serializer.is_valid(raise_exception=True)
         review = serializer.save()
         return Response(ReviewCreateDTO(review).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get"])
+    def reviews(self, request, pk=None):
+        """
+        Возвращает отзывы объявления с курсорной пагинацией (новые первыми).
+        
+        Gibt die Bewertungen der Anzeige mit Cursor-Paginierung zurück (neueste zuerst).
+        """
+        listing = self.get_object()
+
+        paginator = ReviewCursorPagination()
+        page = paginator.paginate_queryset(
+            ReviewService.reviews_queryset().filter(listing=listing), request, view=self
+        )
+        return paginator.get_paginated_response(ReviewDTO(page, many=True).data)
+
+    @action(detail=True, methods=["get"], permission_classes=[IsListingOwnerOrAdmin])
+    def view_stats(self, request, pk=None):
+        """
+        Статистика просмотров объявления по часам или дням из агрегатов
+        (без чтения сырых ListingView). Только владелец или администратор.
+
+        Aufrufstatistik der Anzeige pro Stunde oder Tag aus den Aggregaten
+        (ohne rohe ListingView zu lesen). Nur Eigentümer oder Administrator.
+
+        Параметры / Parameter:
+        - granularity: hour | day (по умолчанию day)
+        - periods: число периодов назад от текущего (48 часов / 30 дней)
+        """
+        listing = self.get_object()
+
+        query = ListingViewStatsQueryDTO(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        stats = ViewStatsService.series(listing.pk, **query.validated_data)
+        return Response(ListingViewStatsDTO(stats).data)
+
+    @action(detail=True, methods=["get"])
+    def availability(self, request, pk=None):
+        """
+        Календарь занятости объявления: слитые интервалы [start, end) активных
+        бронирований внутри [from, to). Из кэша по объявлению, без чтения Booking
+        на каждый запрос; видимость объявления — как у деталей.
+
+        Belegungskalender der Anzeige: zusammengeführte Intervalle [start, end) aktiver
+        Buchungen innerhalb [from, to). Aus dem Cache pro Anzeige, ohne Booking bei jeder
+        Anfrage zu lesen; Sichtbarkeit der Anzeige — wie bei den Details.
+
+        Параметры / Parameter:
+        - from: первая дата (по умолчанию сегодня)
+        - to: дата после последней (по умолчанию from + 31 день, не больше года)
+        """
+        listing = self.get_object()
+
+        query = ListingAvailabilityQueryDTO(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        calendar = AvailabilityService.calendar(listing.pk, **query.validated_data)
+        return Response(ListingAvailabilityDTO(calendar).data)
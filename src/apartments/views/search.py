@@ -2,22 +2,25 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from src.apartments.services import SearchService
-from src.apartments.dtos import SearchHistoryDTO, PopularSearchDTO
+from src.apartments.dtos import SearchHistoryDTO, PopularSearchDTO, PopularSearchQueryDTO
+from src.throttling import ThrottleFirstMixin
 
 
-class PopularSearchesAPIView(APIView):
-    """Вывод популярных запросов /
-    Ausgabe der beliebtesten Suchanfragen"""
+class PopularSearchesAPIView(ThrottleFirstMixin, APIView):
+    """Вывод популярных запросов за окно ?window=hour|day|week|trending|all /
+    Ausgabe der beliebtesten Suchanfragen im Fenster ?window=hour|day|week|trending|all"""
 
     permission_classes = [AllowAny]
 
     def get(self, request):
-        popular = SearchService.get_popular(limit=10)
+        query = PopularSearchQueryDTO(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        popular = SearchService.get_popular(limit=10, window=query.validated_data["window"])
         serializer = PopularSearchDTO(popular, many=True)
         return Response(serializer.data)
 
 
-class MySearchHistoryAPIView(APIView):
+class MySearchHistoryAPIView(ThrottleFirstMixin, APIView):
     """История поиска текущего арендатора /
     Suchhistorie des aktuellen Mieters"""
 
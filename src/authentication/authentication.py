@@ -0,0 +1,40 @@
+from rest_framework import HTTP_HEADER_ENCODING
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from src.authentication.services import PrincipalService, RequestTokenService
+
+
+class RoleJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication, которая берёт пользователя из claims токена
+    (id, is_staff, роль) без запросов к БД. Токены без claims или
+    с устаревшей эпохой проверяются как обычно — загрузкой User.
+
+    JWTAuthentication, die den Benutzer aus den Token-Claims
+    (id, is_staff, Rolle) ohne DB-Abfragen nimmt. Tokens ohne Claims oder
+    mit veralteter Epoche werden wie gewohnt geprüft — durch Laden des Users.
+
+    Токен, уже проверенный JWTAuthMiddleware, повторно не декодируется.
+    Ein bereits von JWTAuthMiddleware geprüftes Token wird nicht erneut dekodiert.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = (
+            RequestTokenService.recall(request._request, raw_token.decode(HTTP_HEADER_ENCODING))
+            or self.get_validated_token(raw_token)
+        )
+        return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        principal = PrincipalService.from_token(validated_token)
+        if principal is not None:
+            return principal
+        return super().get_user(validated_token)
@@ -0,0 +1,49 @@
+import hashlib
+import math
+from typing import Iterable, Optional
+
+HASH_BITS = 64
+
+
+class BloomFilter:
+    """
+    Фильтр Блума: «точно нет» или «возможно да» в фиксированной памяти.
+    Размер и число хеш-функций — из ожидаемого числа элементов и доли
+    ложных срабатываний; ложноотрицательных ответов не бывает.
+
+    Bloom-Filter: „sicher nicht“ oder „vielleicht ja“ bei festem Speicherbedarf.
+    Größe und Anzahl der Hashfunktionen ergeben sich aus der erwarteten Elementzahl
+    und der Falsch-Positiv-Rate; falsch negative Antworten gibt es nicht.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01, bits: Optional[bytes] = None):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        # m = -n·ln p / (ln 2)², k = m/n · ln 2
+        self.size = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits else bytearray((self.size + 7) // 8)
+        if len(self.bits) != (self.size + 7) // 8:
+            raise ValueError(f"Expected {(self.size + 7) // 8} bytes, got {len(self.bits)}")
+
+    def _positions(self, value: str):
+        # двойное хеширование (Kirsch–Mitzenmacher): h1 + i·h2
+        # Doppeltes Hashing (Kirsch–Mitzenmacher): h1 + i·h2
+        digest = hashlib.blake2b(value.encode(), digest_size=2 * HASH_BITS // 8).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def update(self, values: Iterable[str]) -> None:
+        for value in values:
+            self.add(value)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.bits)
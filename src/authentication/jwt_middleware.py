@@ -4,7 +4,9 @@ import time
 
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from rest_framework.exceptions import PermissionDenied
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken, TokenError
+from rest_framework_simplejwt.tokens import AccessToken, TokenError
+
+from src.authentication.services import PrincipalService, RequestTokenService, RoleRefreshToken
 
 
 class JWTAuthMiddleware:
@@ -21,17 +23,22 @@ class JWTAuthMiddleware:
             access_cookie = request.COOKIES.get("access")
             refresh_cookie = request.COOKIES.get("refresh")
 
-            minted_access: Optional[str] = None
+            minted_access: Optional[AccessToken] = None
             access_expiry_dt: Optional[datetime] = None
 
             if access_cookie:
                 # Авторизация через access / Authentifizierung mit Access
                 request.META["HTTP_AUTHORIZATION"] = f"Bearer {access_cookie}"
+                # разбираем и проверяем один раз на запрос / einmal pro Anfrage parsen und prüfen
+                access = self._parse_access(access_cookie)
 
-                if self._is_access_expiring(access_cookie) and refresh_cookie:
-                    # access скоро истечет → обновляем через refresh
-                    # Access läuft bald ab → mit Refresh erneuern
+                if self._needs_new_access(access) and refresh_cookie:
+                    # access скоро истечет или его роль устарела → обновляем через refresh
+                    # Access läuft bald ab oder seine Rolle ist veraltet → mit Refresh erneuern
                     minted_access, access_expiry_dt = self._mint_new_access(refresh_cookie)
+                elif access is not None:
+                    # DRF-аутентификация возьмёт этот же объект / die DRF-Authentifizierung nimmt dasselbe Objekt
+                    RequestTokenService.remember(request, access_cookie, access)
 
             elif refresh_cookie:
                 # access нет, но refresh жив → выпускаем новый access
@@ -39,14 +46,16 @@ class JWTAuthMiddleware:
                 minted_access, access_expiry_dt = self._mint_new_access(refresh_cookie)
 
             if minted_access:
-                request.META["HTTP_AUTHORIZATION"] = f"Bearer {minted_access}"
+                minted = str(minted_access)
+                request.META["HTTP_AUTHORIZATION"] = f"Bearer {minted}"
+                RequestTokenService.remember(request, minted, minted_access)
 
             response = self.get_response(request)
 
             if minted_access:
                 response.set_cookie(
                     key="access",
-                    value=minted_access,
+                    value=minted,
                     httponly=True,
                     secure=True,
                     samesite="Lax",
@@ -63,27 +72,37 @@ class JWTAuthMiddleware:
             response.delete_cookie("refresh")
             return response
 
-    def _mint_new_access(self, refresh_token: str) -> tuple[Optional[str], Optional[datetime]]:
-        # Выпуск нового access-токена
-        # Ausstellung eines neuen Access-Tokens
+    def _mint_new_access(self, refresh_token: str) -> tuple[Optional[AccessToken], Optional[datetime]]:
+        # Выпуск нового access-токена (claims роли — актуальные)
+        # Ausstellung eines neuen Access-Tokens (Rollen-Claims — aktuell)
         try:
-            refresh = RefreshToken(refresh_token)
-            new_access = str(refresh.access_token)
-            exp_ts = AccessToken(new_access).get("exp")
-            expiry = datetime.fromtimestamp(exp_ts, timezone.utc)
-            return new_access, expiry
+            # отзыв проверяется через фильтр Блума / Widerruf wird über den Bloom-Filter geprüft
+            refresh = RoleRefreshToken(refresh_token)
+            access = PrincipalService.access_for_refresh(refresh)
+            expiry = datetime.fromtimestamp(access["exp"], timezone.utc)
+            return access, expiry
         except TokenError:
             # refresh истёк → выбрасываем исключение
             # Refresh ist abgelaufen → Ausnahme werfen
             raise PermissionDenied("Refresh token expired, user logged out")
 
-    def _is_access_expiring(self, access_token_str: str) -> bool:
-        # Проверяем, скоро ли истечет access
-        # Prüfen, ob Access bald abläuft
+    @staticmethod
+    def _parse_access(access_token_str: str) -> Optional[AccessToken]:
+        # Единственная проверка подписи access за запрос; None — токен недействителен
+        # Einzige Signaturprüfung des Access pro Anfrage; None — Token ungültig
+        try:
+            return AccessToken(access_token_str)
+        except TokenError:
+            return None
+
+    def _needs_new_access(self, token: Optional[AccessToken]) -> bool:
+        # Проверяем, скоро ли истечет access и актуальны ли его claims роли
+        # Prüfen, ob Access bald abläuft und ob seine Rollen-Claims aktuell sind
+        if token is None:
+            return True
         try:
-            token = AccessToken(access_token_str)
             exp_ts = int(token.get("exp"))
-            now_ts = int(time.time())
-            return exp_ts <= now_ts + self.refresh_window_seconds
-        except Exception:
+        except (TypeError, ValueError):
             return True
+        now_ts = int(time.time())
+        return exp_ts <= now_ts + self.refresh_window_seconds or not PrincipalService.is_current(token)
@@ -0,0 +1,95 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from src.authentication.authentication import RoleJWTAuthentication
+from src.authentication.jwt_middleware import JWTAuthMiddleware
+from src.authentication.services import RoleRefreshToken
+from src.benchmark import measure, summarize, rolled_back, seed_users
+from src.choices import UserRole
+from src.permissions import IsTenant
+
+
+class LegacyCookieMiddleware:
+    """Обработка cookie до изменений: access декодируется ради проверки срока, затем снова в DRF /
+    Cookie-Verarbeitung vor den Änderungen: Access wird für die Ablaufprüfung dekodiert, danach erneut in DRF"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        access_cookie = request.COOKIES.get("access")
+        if access_cookie:
+            request.META["HTTP_AUTHORIZATION"] = f"Bearer {access_cookie}"
+            AccessToken(access_cookie).get("exp")
+        return self.get_response(request)
+
+
+def make_view(authentication_classes, permission_classes):
+    class BenchView(APIView):
+        def get(self, request):
+            return Response({"id": request.user.id})
+
+    BenchView.authentication_classes = authentication_classes
+    BenchView.permission_classes = permission_classes
+    return BenchView.as_view()
+
+
+class Command(BaseCommand):
+    help = (
+        "Microbenchmark of per-request authentication overhead (middleware + DRF authentication "
+        "+ IsTenant permission) before and after decode-once JWT handling, for the cookie path "
+        "and the Authorization header path. Overhead is p50 minus an unauthenticated baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=2000, help="Timed requests per case.")
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+
+        with rolled_back():
+            user_id = seed_users(1, prefix="bench_auth_", role=UserRole.TENANT)[0]
+            access = str(RoleRefreshToken.for_user(User.objects.get(pk=user_id)).access_token)
+
+            before = make_view([JWTAuthentication], [IsAuthenticated, IsTenant])
+            after = make_view([RoleJWTAuthentication], [IsAuthenticated, IsTenant])
+            cases = [
+                ("baseline", "no auth", JWTAuthMiddleware(make_view([], [AllowAny])), {}),
+                ("cookie", "before", LegacyCookieMiddleware(before), {"cookie": access}),
+                ("cookie", "after", JWTAuthMiddleware(after), {"cookie": access}),
+                ("header", "before", LegacyCookieMiddleware(before), {"header": access}),
+                ("header", "after", JWTAuthMiddleware(after), {"header": access}),
+            ]
+
+            baseline = None
+            for path, name, handler, token in cases:
+                def run():
+                    request = factory.get("/bench/")
+                    if "cookie" in token:
+                        request.COOKIES["access"] = token["cookie"]
+                    if "header" in token:
+                        request.META["HTTP_AUTHORIZATION"] = f"Bearer {token['header']}"
+                    response = handler(request)
+                    assert response.status_code == 200, response.status_code
+                    return response
+
+                stats = summarize(measure(run, repeat=options["repeat"], warmup=50))
+                # запросы в установившемся режиме (эпоха уже в кэше)
+                # Abfragen im eingeschwungenen Zustand (Epoche bereits im Cache)
+                with CaptureQueriesContext(connection) as queries:
+                    run()
+                if baseline is None:
+                    baseline = stats["p50"]
+                self.stdout.write(
+                    f"{path:<8} {name:<8} queries={len(queries):<2} "
+                    f"p50={stats['p50'] * 1000:8.1f}us  p95={stats['p95'] * 1000:8.1f}us  "
+                    f"overhead={(stats['p50'] - baseline) * 1000:8.1f}us"
+                )
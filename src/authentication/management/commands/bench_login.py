@@ -0,0 +1,66 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from src.authentication.services import LoginService
+from src.authentication.views import LoginUserAPIView
+from src.benchmark import measure, summarize, percentile, rolled_back, seed_users
+from src.choices import UserRole
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark POST /users/login/ with a per-step breakdown (authenticate, tokens, last_login) "
+        "taken from the Server-Timing header, and the number of queries per login. "
+        "Compares the buffered last_login write with an immediate UPDATE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50, help="Users to log in round-robin.")
+        parser.add_argument("--repeat", type=int, default=200, help="Timed logins per case.")
+
+    def handle(self, *args, **options):
+        view = LoginUserAPIView.as_view()
+        factory = APIRequestFactory()
+
+        # буфер сбрасывается явно — фоновый поток не увидит данные в откатываемой транзакции
+        # Der Puffer wird explizit geleert — ein Hintergrund-Thread sähe die Daten der zurückgerollten Transaktion nicht
+        with rolled_back(), override_settings(LOGIN_SERVER_TIMING=True, WRITE_BEHIND_BACKGROUND_FLUSH=False):
+            user_ids = seed_users(options["users"], prefix="bench_login_", role=UserRole.TENANT)
+            usernames = [f"bench_login_{i}" for i in range(len(user_ids))]
+
+            for name, buffered in (("immediate", False), ("buffered", True)):
+                steps = defaultdict(list)
+                turn = iter(range(10 ** 9))
+
+                def run():
+                    username = usernames[next(turn) % len(usernames)]
+                    request = factory.post(
+                        "/api/v1/users/login/", {"username": username, "password": "benchmark"}, format="json"
+                    )
+                    response = view(request)
+                    assert response.status_code == 200, response.data
+                    for part in response["Server-Timing"].split(", "):
+                        step, duration = part.split(";dur=")
+                        steps[step].append(float(duration))
+
+                with override_settings(LAST_LOGIN_BUFFER_ENABLED=buffered):
+                    stats = summarize(measure(run, repeat=options["repeat"]))
+                    with CaptureQueriesContext(connection) as queries:
+                        run()
+                    if buffered:
+                        LoginService.flush_last_logins()
+
+                self.stdout.write(
+                    f"{name:<10} queries={len(queries):<2} p50={stats['p50']:8.2f}ms  p95={stats['p95']:8.2f}ms"
+                )
+                for step, durations in steps.items():
+                    durations.sort()
+                    self.stdout.write(
+                        f"  {step:<14} p50={percentile(durations, 50):8.2f}ms  "
+                        f"p95={percentile(durations, 95):8.2f}ms"
+                    )
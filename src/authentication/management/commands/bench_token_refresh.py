@@ -0,0 +1,76 @@
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from src.authentication.services import PrincipalService, RoleRefreshToken, TokenBlacklistService
+from src.benchmark import measure, summarize, rolled_back, seed_users
+from src.choices import UserRole
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark minting an access token from a refresh cookie (JWTAuthMiddleware._mint_new_access) "
+        "with a large token blacklist: the BlacklistedToken query on every refresh vs. the Bloom-filter "
+        "pre-check. Also reports the Bloom filter false-positive rate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--blacklisted", type=int, default=200000, help="Revoked tokens to seed.")
+        parser.add_argument("--repeat", type=int, default=1000, help="Timed refreshes per case.")
+
+    def handle(self, *args, **options):
+        if not TokenBlacklistService.enabled():
+            self.stdout.write("Bloom filter is disabled without a shared cache; both cases query the DB.")
+        try:
+            with rolled_back():
+                count = options["blacklisted"]
+                self.stdout.write(f"Seeding {count} blacklisted tokens...")
+                user_ids = seed_users(100, prefix="bench_refresh_", role=UserRole.TENANT)
+                expires = timezone.now() + timedelta(hours=1)
+                for start in range(0, count, 10000):
+                    stop = min(start + 10000, count)
+                    OutstandingToken.objects.bulk_create(
+                        OutstandingToken(user_id=user_ids[i % len(user_ids)], jti=uuid.uuid4().hex,
+                                         token="", expires_at=expires)
+                        for i in range(start, stop)
+                    )
+                seeded = OutstandingToken.objects.filter(user_id__in=user_ids, blacklistedtoken__isnull=True)
+                BlacklistedToken.objects.bulk_create(
+                    (BlacklistedToken(token_id=token_id) for token_id in seeded.values_list("pk", flat=True)),
+                    batch_size=10000,
+                )
+                TokenBlacklistService.rebuild()
+
+                refresh = str(RoleRefreshToken.for_user(User.objects.get(pk=user_ids[0])))
+
+                cases = [
+                    ("DB blacklist check", lambda: RefreshToken(refresh).access_token),
+                    ("Bloom pre-check", lambda: PrincipalService.access_for_refresh(RoleRefreshToken(refresh))),
+                ]
+                for name, run in cases:
+                    stats = summarize(measure(run, repeat=options["repeat"], warmup=10))
+                    with CaptureQueriesContext(connection) as queries:
+                        run()
+                    self.stdout.write(
+                        f"{name:<20} queries={len(queries)}  "
+                        f"p50={stats['p50'] * 1000:8.1f}us  p95={stats['p95'] * 1000:8.1f}us"
+                    )
+
+                probes = 100000
+                bloom = TokenBlacklistService.bloom()
+                false_positives = sum(uuid.uuid4().hex in bloom for _ in range(probes))
+                self.stdout.write(
+                    f"Bloom filter: {count} revoked jti, false positives {false_positives / probes:.2%} "
+                    f"(target {TokenBlacklistService.ERROR_RATE:.0%})"
+                )
+        finally:
+            # фильтр и версия в общем кэше описывали откаченные строки — заново из БД
+            # Filter und Version im gemeinsamen Cache beschrieben zurückgerollte Zeilen — neu aus der DB
+            TokenBlacklistService.rebuild()
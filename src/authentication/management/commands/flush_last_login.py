@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from src.authentication.services import LoginService
+
+
+class Command(BaseCommand):
+    help = (
+        "Flush buffered logins into User.last_login. "
+        "With the Redis buffer this drains the shared buffer of all processes; "
+        "the in-memory buffer is per process and flushes itself."
+    )
+
+    def handle(self, *args, **options):
+        flushed = LoginService.flush_last_logins()
+        self.stdout.write(self.style.SUCCESS(f"Flushed {flushed} buffered logins."))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from src.authentication.services import TokenBlacklistService, TokenRevocationService
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired OutstandingToken rows (and their BlacklistedToken rows) in small "
+        "id-ordered chunks, each in its own short transaction. Safe to interrupt: rerun, or pass "
+        "--after-id with the last printed id to resume. Rebuilds the blacklist Bloom filter "
+        "afterwards. Run daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Tokens deleted per transaction.")
+        parser.add_argument("--sleep", type=float, default=0.05, help="Pause between chunks, seconds.")
+        parser.add_argument("--max-chunks", type=int, default=0, help="Stop after N chunks (0 - no limit).")
+        parser.add_argument("--after-id", type=int, default=0, help="Resume after this OutstandingToken id.")
+
+    def handle(self, *args, **options):
+        # граница фиксирована на весь прогон / die Grenze ist für den gesamten Lauf fest
+        cutoff = timezone.now()
+        after_id = options["after_id"]
+        total = chunks = 0
+
+        while not options["max_chunks"] or chunks < options["max_chunks"]:
+            deleted, last_id = TokenRevocationService.purge_expired_chunk(cutoff, after_id, options["chunk_size"])
+            if not deleted:
+                break
+            total += deleted
+            chunks += 1
+            after_id = last_id
+            self.stdout.write(f"Deleted {total} expired tokens, last id {after_id}")
+            time.sleep(options["sleep"])
+
+        if total:
+            TokenBlacklistService.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} expired outstanding tokens in {chunks} chunks."))
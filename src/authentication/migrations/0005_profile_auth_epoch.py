@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_alter_profile_options_alter_profile_role_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='auth_epoch',
+            field=models.PositiveIntegerField(default=0, verbose_name='Auth epoch'),
+        ),
+    ]
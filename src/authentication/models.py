@@ -19,12 +19,32 @@ class Profile(models.Model):
         choices=UserRole.choices,
         verbose_name="User role",
     )
+
+    # растёт при смене роли/is_staff/is_active — токены со старой эпохой не доверяются
+    # wächst bei Änderung von Rolle/is_staff/is_active — Tokens mit alter Epoche gelten nicht
+    auth_epoch = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Auth epoch",
+    )
     
     class Meta:
         verbose_name = "Profile"
         verbose_name_plural = "Profiles"
         ordering = ['user__username']
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # снимок роли при загрузке — для сравнения без запроса при сохранении
+        # Schnappschuss der Rolle beim Laden — zum Vergleich ohne Abfrage beim Speichern
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_role = instance.__dict__.get("role")
+        return instance
+
+    def role_changed(self) -> bool:
+        """Роль изменилась после загрузки (для не загруженных из БД — True) /
+        Rolle seit dem Laden geändert (für nicht aus der DB geladene — True)"""
+        return not hasattr(self, "_loaded_role") or self._loaded_role != self.__dict__.get("role")
+
     def __str__(self) -> str:
         """String representation of the profile."""
         return f"{self.user.username} ({self.get_role_display()})"
@@ -0,0 +1,475 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.http import HttpRequest
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+
+from src.apartments.services.buffer import make_buffer
+from src.authentication.bloom import BloomFilter
+from src.authentication.models import Profile
+from src.monitoring import timed
+
+logger = logging.getLogger(__name__)
+
+# claims, которые читает principal / Claims, die der Principal liest
+ROLE_CLAIM = "role"
+STAFF_CLAIM = "is_staff"
+PROFILE_CLAIM = "profile_id"
+EPOCH_CLAIM = "auth_epoch"
+
+# атрибут HttpRequest с уже проверенным access-токеном (JWTAuthMiddleware -> RoleJWTAuthentication)
+# HttpRequest-Attribut mit dem bereits geprüften Access-Token (JWTAuthMiddleware -> RoleJWTAuthentication)
+REQUEST_TOKEN_ATTR = "_jwt_access"
+
+# кэши в памяти процесса: сброс эпохи не виден другим процессам
+# Caches im Prozessspeicher: das Zurücksetzen der Epoche sehen andere Prozesse nicht
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+class AuthEpochService:
+    """
+    Эпоха авторизации пользователя: Profile.auth_epoch, зеркало в кэше.
+    Любая смена роли, is_staff или is_active увеличивает её, и токены
+    со старой эпохой перестают обслуживаться без БД.
+
+    Autorisierungsepoche des Benutzers: Profile.auth_epoch, gespiegelt im Cache.
+    Jede Änderung von Rolle, is_staff oder is_active erhöht sie, und Tokens
+    mit alter Epoche werden nicht mehr ohne DB bedient.
+    """
+
+    @staticmethod
+    def cache_key(user_id: int) -> str:
+        return f"auth:epoch:{user_id}"
+
+    @staticmethod
+    def cache_timeout() -> int:
+        """
+        TTL эпохи в кэше. Он же — окно, в котором процесс с устаревшей копией
+        ещё доверяет claims, поэтому без общего кэша он короткий (по умолчанию 0).
+
+        TTL der Epoche im Cache. Zugleich das Fenster, in dem ein Prozess mit
+        veralteter Kopie den Claims noch vertraut, daher ohne gemeinsamen Cache
+        kurz (standardmäßig 0).
+        """
+        if isinstance(caches["default"], PROCESS_LOCAL_CACHES):
+            return getattr(settings, "AUTH_EPOCH_LOCAL_CACHE_TIMEOUT", 0)
+        return getattr(settings, "AUTH_EPOCH_CACHE_TIMEOUT", 300)
+
+    @staticmethod
+    def current(user_id: int) -> Optional[int]:
+        """Эпоха из кэша, при промахе — из БД; None, если профиля нет /
+        Epoche aus dem Cache, bei Fehlschlag aus der DB; None, wenn kein Profil existiert"""
+        timeout = AuthEpochService.cache_timeout()
+        key = AuthEpochService.cache_key(user_id)
+        epoch = cache.get(key) if timeout > 0 else None
+        if epoch is None:
+            epoch = Profile.objects.filter(user_id=user_id).values_list("auth_epoch", flat=True).first()
+            if epoch is not None and timeout > 0:
+                cache.set(key, epoch, timeout=timeout)
+        return epoch
+
+    @staticmethod
+    def bump(user_id: int) -> None:
+        """Увеличивает эпоху; кэш сбрасывается после фиксации /
+        Erhöht die Epoche; der Cache wird nach dem Commit geleert"""
+        Profile.objects.filter(user_id=user_id).update(auth_epoch=F("auth_epoch") + 1)
+        transaction.on_commit(lambda: cache.delete(AuthEpochService.cache_key(user_id)))
+
+
+class PrincipalService:
+    """
+    Principal из claims access-токена: User и Profile собираются через from_db
+    (остальные поля отложены и подгрузятся при обращении), так что
+    request.user.id / is_staff / profile.role не обращаются к БД.
+
+    Principal aus den Claims des Access-Tokens: User und Profile werden per from_db
+    aufgebaut (andere Felder sind zurückgestellt und werden bei Zugriff nachgeladen),
+    sodass request.user.id / is_staff / profile.role die DB nicht berühren.
+    """
+
+    @staticmethod
+    def stamp(token: Token, user: User) -> Token:
+        """Записывает роль, is_staff и эпоху пользователя в токен /
+        Schreibt Rolle, is_staff und Epoche des Benutzers in das Token"""
+        try:
+            profile = user.profile
+        except Profile.DoesNotExist:
+            profile = None
+        token[STAFF_CLAIM] = user.is_staff
+        token[ROLE_CLAIM] = profile.role if profile else None
+        token[PROFILE_CLAIM] = profile.pk if profile else None
+        token[EPOCH_CLAIM] = profile.auth_epoch if profile else None
+        return token
+
+    @staticmethod
+    def is_current(token: Token) -> bool:
+        """Claims есть и эпоха совпадает с текущей (результат запоминается в токене) /
+        Claims vorhanden und die Epoche stimmt mit der aktuellen überein (Ergebnis wird im Token gemerkt)"""
+        current = getattr(token, "_epoch_current", None)
+        if current is None:
+            current = (
+                token.get(EPOCH_CLAIM) is not None
+                and api_settings.USER_ID_CLAIM in token
+                and AuthEpochService.current(token[api_settings.USER_ID_CLAIM]) == token[EPOCH_CLAIM]
+            )
+            token._epoch_current = current
+        return current
+
+    @staticmethod
+    def from_token(token: Token) -> Optional[User]:
+        """Principal без запросов к БД или None, если claims устарели /
+        Principal ohne DB-Abfragen oder None, wenn die Claims veraltet sind"""
+        if not PrincipalService.is_current(token):
+            return None
+
+        # simplejwt хранит id строкой; без приведения obj.user == request.user ложно
+        # simplejwt speichert die id als String; ohne Umwandlung ist obj.user == request.user falsch
+        user_id = User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+        # значения в порядке concrete_fields / Werte in der Reihenfolge von concrete_fields
+        user = User.from_db(DEFAULT_DB_ALIAS, ["id", "is_staff", "is_active"], [user_id, token[STAFF_CLAIM], True])
+        if token.get(PROFILE_CLAIM) is None:
+            # hasattr(user, "profile") -> False без запроса / ohne Abfrage
+            user._state.fields_cache["profile"] = None
+            return user
+
+        profile = Profile.from_db(
+            DEFAULT_DB_ALIAS,
+            ["id", "user_id", "role", "auth_epoch"],
+            [token[PROFILE_CLAIM], user_id, token[ROLE_CLAIM], token[EPOCH_CLAIM]],
+        )
+        profile._state.fields_cache["user"] = user
+        user._state.fields_cache["profile"] = profile
+        return user
+
+    @staticmethod
+    @timed("token_refresh")
+    def access_for_refresh(refresh: RefreshToken) -> Token:
+        """
+        Access-токен из refresh. Если claims refresh устарели (роль сменилась
+        после входа), они перечитываются из БД; неактивный или удалённый
+        пользователь — TokenError.
+
+        Access-Token aus dem Refresh-Token. Sind die Claims des Refresh veraltet
+        (Rolle nach der Anmeldung geändert), werden sie aus der DB neu gelesen;
+        inaktiver oder gelöschter Benutzer — TokenError.
+        """
+        access = refresh.access_token
+        if PrincipalService.is_current(access):
+            return access
+
+        user = (
+            User.objects.select_related("profile")
+            .filter(pk=access.get(api_settings.USER_ID_CLAIM), is_active=True)
+            .first()
+        )
+        if user is None:
+            raise TokenError("User not found or inactive")
+        return PrincipalService.stamp(access, user)
+
+
+class RequestTokenService:
+    """
+    Проверенный access-токен запроса: middleware разбирает cookie один раз,
+    DRF-аутентификация берёт тот же объект, если строка токена совпадает.
+
+    Geprüftes Access-Token der Anfrage: die Middleware parst das Cookie einmal,
+    die DRF-Authentifizierung nimmt dasselbe Objekt, wenn die Token-Zeichenkette übereinstimmt.
+    """
+
+    @staticmethod
+    def remember(request: HttpRequest, raw_token: str, token: Token) -> None:
+        setattr(request, REQUEST_TOKEN_ATTR, (raw_token, token))
+
+    @staticmethod
+    def recall(request: HttpRequest, raw_token: str) -> Optional[Token]:
+        remembered = getattr(request, REQUEST_TOKEN_ATTR, None)
+        if remembered is not None and remembered[0] == raw_token:
+            return remembered[1]
+        return None
+
+
+@contextmanager
+def _lock(key: str, timeout: float = 5, wait: float = 2):
+    """Короткая блокировка через cache.add; отдаёт, получена ли она /
+    Kurze Sperre per cache.add; liefert, ob sie erhalten wurde"""
+    deadline = time.monotonic() + wait
+    acquired = cache.add(key, 1, timeout=timeout)
+    while not acquired and time.monotonic() < deadline:
+        time.sleep(0.01)
+        acquired = cache.add(key, 1, timeout=timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(key)
+
+
+class TokenBlacklistService:
+    """
+    Фильтр Блума по jti отозванных (и ещё не истёкших) refresh-токенов в кэше,
+    локальная копия в процессе сверяется по версии. «Точно нет» — токен
+    не проверяется в BlacklistedToken; «возможно да» — обычная проверка в БД.
+    jti добавляется в фильтр при сохранении BlacklistedToken (сигнал) или
+    массовом отзыве и ещё раз после фиксации, так что отозванный токен никогда
+    не проходит мимо проверки. Без блокировки фильтр не переписывается, а
+    помечается устаревшим — следующая проверка перестроит его из БД.
+    Без общего кэша (LocMem) фильтр другого процесса не виден, поэтому
+    предварительная проверка выключена и каждый refresh идёт в БД.
+
+    Bloom-Filter über die jti widerrufener (noch nicht abgelaufener) Refresh-Tokens im Cache,
+    die lokale Kopie im Prozess wird per Version abgeglichen. „Sicher nicht“ — das Token
+    wird nicht in BlacklistedToken geprüft; „vielleicht ja“ — normale Prüfung in der DB.
+    Die jti kommt beim Speichern eines BlacklistedToken (Signal) oder beim Massenwiderruf
+    und nach dem Commit erneut in den Filter, sodass ein widerrufenes Token nie an der
+    Prüfung vorbeikommt. Ohne Sperre wird der Filter nicht überschrieben, sondern als
+    veraltet markiert — die nächste Prüfung baut ihn aus der DB neu auf.
+    Ohne gemeinsamen Cache (LocMem) ist der Filter anderer Prozesse nicht sichtbar, daher
+    ist die Vorprüfung ausgeschaltet und jeder Refresh geht in die DB.
+    """
+
+    BLOOM_KEY = "auth:blacklist:bloom"
+    VERSION_KEY = "auth:blacklist:version"
+    STALE_KEY = "auth:blacklist:stale"
+    LOCK_KEY = "auth:blacklist:lock"
+    ERROR_RATE = 0.01
+
+    # (версия, фильтр) процесса / (Version, Filter) des Prozesses
+    _local: Optional[tuple[int, BloomFilter]] = None
+
+    @staticmethod
+    def capacity() -> int:
+        return getattr(settings, "TOKEN_BLACKLIST_BLOOM_CAPACITY", 100000)
+
+    @staticmethod
+    def enabled() -> bool:
+        """Фильтр общий для всех процессов / Der Filter ist für alle Prozesse gemeinsam"""
+        return not isinstance(caches["default"], PROCESS_LOCAL_CACHES)
+
+    @classmethod
+    def bloom(cls) -> BloomFilter:
+        """Актуальный фильтр: локальный, из кэша или перестроенный из БД /
+        Aktueller Filter: lokal, aus dem Cache oder aus der DB neu aufgebaut"""
+        state = cache.get_many([cls.VERSION_KEY, cls.STALE_KEY])
+        if cls.STALE_KEY in state:
+            return cls.rebuild()
+        version = state.get(cls.VERSION_KEY)
+        local = cls._local
+        if version is not None and local is not None and local[0] == version:
+            return local[1]
+
+        stored = cache.get(cls.BLOOM_KEY) if version is not None else None
+        if stored is None:
+            return cls.rebuild()
+        bloom = BloomFilter(stored["capacity"], cls.ERROR_RATE, stored["bits"])
+        cls._local = (version, bloom)
+        return bloom
+
+    @classmethod
+    def might_be_blacklisted(cls, jti: str) -> bool:
+        if not cls.enabled():
+            return True
+        return jti in cls.bloom()
+
+    @classmethod
+    def add(cls, jtis: Iterable[str]) -> None:
+        """Добавляет jti в общий фильтр / Fügt jti dem gemeinsamen Filter hinzu"""
+        jtis = list(jtis)
+        if not jtis or not cls.enabled():
+            return
+        with _lock(cls.LOCK_KEY) as acquired:
+            if not acquired:
+                # чтение-изменение-запись без блокировки потеряло бы чужие jti
+                # Lesen-Ändern-Schreiben ohne Sperre würde fremde jti verlieren
+                logger.warning("Token blacklist lock busy, marking the Bloom filter stale")
+                cache.set(cls.STALE_KEY, 1, timeout=None)
+                return
+            stored = cache.get(cls.BLOOM_KEY)
+            if stored is None or stored["count"] + len(jtis) > stored["capacity"]:
+                # нет фильтра или он переполнен — заново из БД (с запасом)
+                # kein Filter oder er ist voll — neu aus der DB (mit Reserve)
+                cls._rebuild(jtis)
+                return
+            bloom = BloomFilter(stored["capacity"], cls.ERROR_RATE, stored["bits"])
+            bloom.update(jtis)
+            cls._store(bloom, stored["count"] + len(jtis))
+
+    @classmethod
+    def add_on_commit(cls, jtis: Iterable[str]) -> None:
+        """До записи в БД и ещё раз после фиксации (на случай перестройки между ними) /
+        Vor dem Schreiben in die DB und nach dem Commit erneut (falls dazwischen neu aufgebaut wird)"""
+        jtis = list(jtis)
+        cls.add(jtis)
+        transaction.on_commit(lambda: cls.add(jtis))
+
+    @classmethod
+    def rebuild(cls) -> BloomFilter:
+        """Перестраивает фильтр из BlacklistedToken / Baut den Filter aus BlacklistedToken neu auf"""
+        with _lock(cls.LOCK_KEY) as acquired:
+            if not acquired:
+                # фильтр только для этой проверки, кэш не трогаем
+                # Filter nur für diese Prüfung, der Cache bleibt unberührt
+                return cls._build()[0]
+            return cls._rebuild()
+
+    @classmethod
+    def _rebuild(cls, extra: Iterable[str] = ()) -> BloomFilter:
+        # пометку снимаем до чтения БД: поздняя пометка переживёт эту перестройку
+        # Markierung vor dem DB-Lesen entfernen: eine spätere Markierung überlebt diesen Neuaufbau
+        cache.delete(cls.STALE_KEY)
+        bloom, count = cls._build(extra)
+        cls._store(bloom, count)
+        return bloom
+
+    @classmethod
+    def _build(cls, extra: Iterable[str] = ()) -> tuple[BloomFilter, int]:
+        jtis = list(
+            OutstandingToken.objects
+            .filter(blacklistedtoken__isnull=False, expires_at__gt=timezone.now())
+            .values_list("jti", flat=True)
+            .iterator(chunk_size=10000)
+        )
+        jtis.extend(extra)
+        bloom = BloomFilter(max(cls.capacity(), 2 * len(jtis)), cls.ERROR_RATE)
+        bloom.update(jtis)
+        return bloom, len(jtis)
+
+    @classmethod
+    def _store(cls, bloom: BloomFilter, count: int) -> None:
+        version = time.time_ns()
+        cache.set(cls.BLOOM_KEY, {"capacity": bloom.capacity, "count": count, "bits": bloom.to_bytes()}, timeout=None)
+        cache.set(cls.VERSION_KEY, version, timeout=None)
+        cls._local = (version, bloom)
+
+
+class TokenRevocationService:
+    """Массовый отзыв и очистка refresh-токенов / Massenwiderruf und Bereinigung von Refresh-Tokens"""
+
+    @staticmethod
+    def revoke_user_tokens(user_id: int) -> int:
+        """
+        Отзывает все неистёкшие refresh-токены пользователя: один SELECT и один
+        bulk INSERT (уже отозванные пропускаются), jti — в фильтр Блума.
+
+        Widerruft alle nicht abgelaufenen Refresh-Tokens des Benutzers: ein SELECT und ein
+        bulk INSERT (bereits widerrufene werden übersprungen), jti — in den Bloom-Filter.
+        """
+        tokens = list(
+            OutstandingToken.objects
+            .filter(user_id=user_id, expires_at__gt=timezone.now())
+            .values_list("pk", "jti")
+        )
+        if not tokens:
+            return 0
+        with transaction.atomic():
+            TokenBlacklistService.add_on_commit(jti for _, jti in tokens)
+            BlacklistedToken.objects.bulk_create(
+                [BlacklistedToken(token_id=pk) for pk, _ in tokens],
+                batch_size=1000,
+                ignore_conflicts=True,
+            )
+        return len(tokens)
+
+    @staticmethod
+    def purge_expired_chunk(cutoff, after_id: int, chunk_size: int) -> tuple[int, Optional[int]]:
+        """
+        Удаляет до chunk_size истёкших OutstandingToken с id > after_id (и их
+        BlacklistedToken каскадом) в короткой транзакции. Возвращает
+        (удалено, последний id) — по нему продолжается следующая порция.
+
+        Löscht bis zu chunk_size abgelaufene OutstandingToken mit id > after_id (und ihre
+        BlacklistedToken per Kaskade) in einer kurzen Transaktion. Gibt
+        (gelöscht, letzte id) zurück — damit wird die nächste Portion fortgesetzt.
+        """
+        ids = list(
+            OutstandingToken.objects
+            .filter(pk__gt=after_id, expires_at__lt=cutoff)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:chunk_size]
+        )
+        if not ids:
+            return 0, None
+        with transaction.atomic():
+            OutstandingToken.objects.filter(pk__in=ids).delete()
+        return len(ids), ids[-1]
+
+
+_last_login_buffer = None
+
+
+class LoginService:
+    """Запись last_login при входе / Schreiben von last_login bei der Anmeldung"""
+
+    @staticmethod
+    def buffer_enabled() -> bool:
+        return getattr(settings, "LAST_LOGIN_BUFFER_ENABLED", True)
+
+    @staticmethod
+    def get_buffer():
+        """Буфер входов процесса (см. make_buffer) / Anmeldepuffer des Prozesses (siehe make_buffer)"""
+        global _last_login_buffer
+        if _last_login_buffer is None:
+            _last_login_buffer = make_buffer(
+                "last-login",
+                LoginService.write_last_logins,
+                str,
+                int,
+                interval=getattr(settings, "LAST_LOGIN_FLUSH_INTERVAL", 5.0),
+                max_keys=getattr(settings, "LAST_LOGIN_MAX_KEYS", 1000),
+            )
+        return _last_login_buffer
+
+    @staticmethod
+    def record_login(user_id: int) -> None:
+        """
+        Отмечает вход: в буфер (last_login = время сброса, точность — интервал
+        сброса) или сразу одним UPDATE — без User.save и его сигналов.
+
+        Vermerkt die Anmeldung: im Puffer (last_login = Zeitpunkt des Flushs, Genauigkeit —
+        Flush-Intervall) oder sofort per UPDATE — ohne User.save und seine Signale.
+        """
+        if LoginService.buffer_enabled():
+            LoginService.get_buffer().add(user_id)
+        else:
+            LoginService.write_last_logins({user_id: 1})
+
+    @staticmethod
+    def flush_last_logins() -> int:
+        return LoginService.get_buffer().flush()
+
+    @staticmethod
+    def write_last_logins(batch: dict[int, int]) -> None:
+        """Один UPDATE на пачку пользователей / Ein UPDATE pro Benutzerstapel"""
+        if batch:
+            User.objects.filter(pk__in=list(batch)).update(last_login=timezone.now())
+
+
+class RoleRefreshToken(RefreshToken):
+    """
+    Refresh-токен с claims роли; проверка отзыва идёт в БД только
+    при срабатывании фильтра Блума (без общего кэша — всегда).
+
+    Refresh-Token mit Rollen-Claims; die Widerrufsprüfung geht nur
+    bei einem Treffer des Bloom-Filters in die DB (ohne gemeinsamen Cache immer).
+    """
+
+    @classmethod
+    @timed("token_mint")
+    def for_user(cls, user: User) -> "RoleRefreshToken":
+        return PrincipalService.stamp(super().for_user(user), user)
+
+    def check_blacklist(self) -> None:
+        if TokenBlacklistService.might_be_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
@@ -1,8 +1,14 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
 
 from src.authentication.models import Profile
+from src.authentication.services import AuthEpochService, TokenBlacklistService
+
+# поля, попадающие в claims токена / Felder, die in die Token-Claims eingehen
+USER_AUTH_FIELDS = ("is_staff", "is_active")
+PROFILE_AUTH_FIELDS = ("role",)
 
 
 @receiver(post_save, sender=User)
@@ -14,5 +20,58 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
-    """Сохраняем профиль при сохранении пользователя"""
-    instance.profile.save()
\ No newline at end of file
+    """Сохраняем профиль при сохранении пользователя — только если он загружен
+    и роль в нём изменилась (без лишних SELECT/UPDATE при каждом User.save)"""
+    if User.profile.is_cached(instance) and instance.profile is not None and instance.profile.role_changed():
+        instance.profile.save()
+
+
+def _auth_fields_changed(instance, fields, update_fields) -> bool:
+    """Сравнивает поля claims с сохранёнными в БД /
+    Vergleicht die Claim-Felder mit den in der DB gespeicherten"""
+    if instance._state.adding or instance.pk is None:
+        return False
+    if update_fields is not None and not set(update_fields) & set(fields):
+        return False
+    if isinstance(instance, Profile) and hasattr(instance, "_loaded_role"):
+        # снимок из from_db — без запроса / Schnappschuss aus from_db — ohne Abfrage
+        return instance.role_changed()
+    loaded = [field for field in fields if field in instance.__dict__]
+    if not loaded:
+        return False
+    stored = type(instance)._base_manager.filter(pk=instance.pk).values_list(*loaded).first()
+    return stored is not None and stored != tuple(getattr(instance, field) for field in loaded)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Profile)
+def detect_auth_change(sender, instance, update_fields=None, **kwargs):
+    """Запоминаем, изменились ли роль, is_staff или is_active /
+    Merken, ob sich Rolle, is_staff oder is_active geändert haben"""
+    fields = USER_AUTH_FIELDS if sender is User else PROFILE_AUTH_FIELDS
+    instance._auth_changed = _auth_fields_changed(instance, fields, update_fields)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def bump_auth_epoch(sender, instance, **kwargs):
+    """Новая эпоха — claims выданных токенов больше не доверяются /
+    Neue Epoche — Claims ausgestellter Tokens gelten nicht mehr"""
+    if getattr(instance, "_auth_changed", False):
+        instance._auth_changed = False
+        AuthEpochService.bump(instance.pk if sender is User else instance.user_id)
+
+
+@receiver(post_save, sender=Profile)
+def snapshot_profile_role(sender, instance, **kwargs):
+    """Сохранённая роль — новый снимок для role_changed() /
+    Gespeicherte Rolle — neuer Schnappschuss für role_changed()"""
+    instance._loaded_role = instance.__dict__.get("role")
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_to_blacklist_filter(sender, instance, created, **kwargs):
+    """jti в фильтр Блума при любом отзыве (сервис, админка, OutstandingToken) /
+    jti in den Bloom-Filter bei jedem Widerruf (Service, Admin, OutstandingToken)"""
+    if created:
+        TokenBlacklistService.add_on_commit([instance.token.jti])
@@ -0,0 +1,458 @@
+import uuid
+from datetime import timedelta
+from functools import partial
+from io import StringIO
+from itertools import count
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from src.apartments.models import Listing
+from src.authentication.models import Profile
+from src.authentication import services
+from src.authentication.bloom import BloomFilter
+from src.authentication.services import (
+    AuthEpochService, LoginService, PrincipalService, RoleRefreshToken, TokenBlacklistService,
+    TokenRevocationService,
+)
+from src.benchmark import QueryBudgetTestCase
+from src.choices import UserRole
+
+
+class UserQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Бюджеты запросов /users/: профиль загружается в том же запросе.
+    Abfragebudgets von /users/: das Profil wird in derselben Abfrage geladen.
+    """
+
+    serial = count()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = cls.make_user("budget_admin", is_staff=True)
+        cls.tenant = cls.make_user("budget_tenant", UserRole.TENANT)
+
+    @classmethod
+    def add_users(cls, amount: int):
+        for _ in range(amount):
+            cls.make_user(f"budget_user_{next(cls.serial)}", UserRole.LANDLORD)
+
+    def test_list(self):
+        client = self.client_for(self.admin)
+        # эпоха токена, COUNT, страница с профилями / Token-Epoche, COUNT, Seite mit Profilen
+        self.assertBudget(3, lambda: client.get("/api/v1/users/"), grow=lambda: self.add_users(12))
+
+    def test_detail(self):
+        client = self.client_for(self.tenant)
+        self.assertBudget(2, lambda: client.get(f"/api/v1/users/{self.tenant.pk}/"))
+
+    def test_detail_by_admin(self):
+        client = self.client_for(self.admin)
+        self.assertBudget(2, lambda: client.get(f"/api/v1/users/{self.tenant.pk}/"))
+
+    def test_my(self):
+        client = self.client_for(self.tenant)
+        # эпоха токена + пользователь с профилем / Token-Epoche + Benutzer mit Profil
+        self.assertBudget(2, lambda: client.get("/api/v1/users/my"))
+
+
+class AuthEpochTests(QueryBudgetTestCase):
+    """
+    Уже выданный access-токен перестаёт действовать по claims после смены
+    роли, is_staff или is_active.
+
+    Ein bereits ausgestelltes Access-Token gilt nach Änderung von Rolle,
+    is_staff oder is_active nicht mehr anhand seiner Claims.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = cls.make_user("epoch_tenant", UserRole.TENANT)
+        cls.admin = cls.make_user("epoch_admin", is_staff=True)
+        cls.listing = Listing.objects.create(
+            landlord=cls.make_user("epoch_landlord", UserRole.LANDLORD), title="Epoch", description="",
+            location="Berlin", price=100, rooms=2, housing_type="apartment",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def book(self, client):
+        payload = {"listing": self.listing.pk, "start_date": "2031-01-01", "end_date": "2031-01-03"}
+        return client.post("/api/v1/bookings/", payload, format="json")
+
+    def test_role_change(self):
+        client = self.client_for(self.tenant)
+        profile = Profile.objects.get(user=self.tenant)
+        profile.role = UserRole.LANDLORD
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+
+        # бронировать может только арендатор / buchen darf nur ein Mieter
+        self.assertEqual(self.book(client).status_code, 403)
+
+    def test_deactivation(self):
+        client = self.client_for(self.tenant)
+        self.tenant.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tenant.save()
+
+        response = client.get("/api/v1/users/my")
+        # первый аутентификатор — сессия, поэтому 403, а не 401 / der erste Authentifikator ist die Sitzung, daher 403 statt 401
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data["code"], "user_inactive")
+
+    def test_staff_change(self):
+        client = self.client_for(self.admin)
+        self.assertEqual(client.get("/api/v1/users/").status_code, 200)
+        self.admin.is_staff = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.save()
+
+        self.assertEqual(client.get("/api/v1/users/").status_code, 403)
+
+    def test_epoch_bumped_by_another_process(self):
+        # другой процесс меняет роль; кэш этого процесса не сбрасывается
+        # ein anderer Prozess ändert die Rolle; der Cache dieses Prozesses wird nicht geleert
+        client = self.client_for(self.tenant)
+        self.assertEqual(client.get("/api/v1/users/my").status_code, 200)
+        Profile.objects.filter(user=self.tenant).update(role=UserRole.LANDLORD, auth_epoch=F("auth_epoch") + 1)
+
+        self.assertEqual(self.book(client).status_code, 403)
+
+    def test_string_user_id_claim(self):
+        token = AccessToken(str(RoleRefreshToken.for_user(self.tenant).access_token))
+        self.assertIsInstance(token["user_id"], str)
+
+        principal = PrincipalService.from_token(token)
+
+        self.assertEqual(principal.pk, self.tenant.pk)
+        self.assertEqual(principal, self.tenant)
+        self.assertEqual(principal.profile.role, UserRole.TENANT)
+
+
+class AuthEpochCacheTimeoutTests(SimpleTestCase):
+    """TTL эпохи зависит от того, общий ли кэш / Der Epochen-TTL hängt davon ab, ob der Cache gemeinsam ist"""
+
+    def tearDown(self):
+        cache.close()
+
+    @override_settings(AUTH_EPOCH_CACHE_TIMEOUT=300, AUTH_EPOCH_LOCAL_CACHE_TIMEOUT=0)
+    def test_process_local_cache_is_not_trusted(self):
+        self.assertEqual(AuthEpochService.cache_timeout(), 0)
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://x"}},
+        AUTH_EPOCH_CACHE_TIMEOUT=300,
+    )
+    def test_shared_cache(self):
+        self.assertEqual(AuthEpochService.cache_timeout(), 300)
+
+
+class BloomFilterTests(SimpleTestCase):
+    """Без ложноотрицательных, ложноположительные — около error_rate /
+    Keine falsch Negativen, falsch Positive etwa bei error_rate"""
+
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        members = [uuid.uuid4().hex for _ in range(2000)]
+        bloom = BloomFilter(len(members), 0.01)
+        bloom.update(members)
+
+        restored = BloomFilter(len(members), 0.01, bloom.to_bytes())
+        self.assertTrue(all(member in restored for member in members))
+        false_positives = sum(uuid.uuid4().hex in restored for _ in range(5000))
+        self.assertLess(false_positives / 5000, 0.03)
+
+    def test_rejects_bits_of_other_size(self):
+        with self.assertRaises(ValueError):
+            BloomFilter(1000, 0.01, bytes(10))
+
+
+# общий кэш (Redis) в тестах на LocMem / gemeinsamer Cache (Redis) in Tests auf LocMem
+shared_blacklist_filter = mock.patch.object(TokenBlacklistService, "enabled", staticmethod(lambda: True))
+
+
+@shared_blacklist_filter
+class TokenBlacklistTests(QueryBudgetTestCase):
+    """
+    Отозванный refresh-токен отклоняется всегда: и после вытеснения фильтра
+    из кэша, и после смены его версии другим процессом.
+
+    Ein widerrufenes Refresh-Token wird immer abgelehnt: auch nachdem der Filter
+    aus dem Cache verdrängt oder seine Version von einem anderen Prozess geändert wurde.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = cls.make_user("blacklist_tenant", UserRole.TENANT)
+
+    def setUp(self):
+        cache.clear()
+        TokenBlacklistService._local = None
+        self.addCleanup(setattr, TokenBlacklistService, "_local", None)
+
+    def revoke(self):
+        refresh = RoleRefreshToken.for_user(self.tenant)
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh.blacklist()
+        return str(refresh)
+
+    def assertRejected(self, raw):
+        with self.assertRaises(TokenError):
+            RoleRefreshToken(raw)
+
+    def test_revoked_token_is_rejected(self):
+        raw = self.revoke()
+        valid = str(RoleRefreshToken.for_user(self.tenant))
+
+        self.assertRejected(raw)
+        RoleRefreshToken(valid)
+
+    def test_revoked_token_cannot_refresh_access(self):
+        self.client.cookies["refresh"] = self.revoke()
+
+        response = self.client.get("/api/v1/users/my")
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_rejected_after_filter_is_evicted(self):
+        raw = self.revoke()
+        cache.delete(TokenBlacklistService.BLOOM_KEY)
+        self.assertRejected(raw)
+
+        cache.clear()
+        self.assertRejected(raw)
+
+    def test_rejected_after_another_process_changes_version(self):
+        first = self.revoke()
+        stale_copy = TokenBlacklistService._local
+        # другой процесс отзывает токен; у этого процесса остаётся старая копия
+        # ein anderer Prozess widerruft ein Token; dieser Prozess behält die alte Kopie
+        second = self.revoke()
+        TokenBlacklistService._local = stale_copy
+
+        self.assertRejected(second)
+        self.assertRejected(first)
+
+    def test_row_written_through_orm_is_rejected(self):
+        refresh = RoleRefreshToken.for_user(self.tenant)
+        raw = str(refresh)
+        RoleRefreshToken(raw)
+        # как админка simplejwt или OutstandingToken.blacklist() / wie der simplejwt-Admin oder OutstandingToken.blacklist()
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=refresh["jti"]))
+
+        self.assertRejected(raw)
+
+    def test_rebuild_before_commit_keeps_token(self):
+        refresh = RoleRefreshToken.for_user(self.tenant)
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh.blacklist()
+            # перестройка между записью и фиксацией не видит новый BlacklistedToken
+            # ein Neuaufbau zwischen Schreiben und Commit sieht das neue BlacklistedToken nicht
+            TokenBlacklistService._rebuild()
+
+        self.assertRejected(str(refresh))
+
+    def test_busy_lock_marks_filter_stale(self):
+        TokenBlacklistService.bloom()
+        self.assertTrue(cache.add(TokenBlacklistService.LOCK_KEY, 1))
+        with mock.patch.object(services, "_lock", partial(services._lock, wait=0)):
+            with self.assertLogs("src.authentication.services", "WARNING"):
+                raw = self.revoke()
+            # блокировка всё ещё занята — фильтр только для этой проверки
+            # die Sperre ist noch belegt — Filter nur für diese Prüfung
+            self.assertRejected(raw)
+
+            cache.delete(TokenBlacklistService.LOCK_KEY)
+            self.assertRejected(raw)
+        self.assertIsNone(cache.get(TokenBlacklistService.STALE_KEY))
+
+
+class RequestTokenTests(QueryBudgetTestCase):
+    """
+    Access-токен декодируется один раз за запрос: middleware, троттлинг
+    и DRF-аутентификация делят один объект.
+
+    Das Access-Token wird einmal pro Anfrage dekodiert: Middleware, Drosselung
+    und DRF-Authentifizierung teilen sich ein Objekt.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = cls.make_user("decode_tenant", UserRole.TENANT)
+
+    def decodes(self, client) -> int:
+        with mock.patch.object(TokenBackend, "decode", autospec=True, side_effect=TokenBackend.decode) as decode:
+            self.assertEqual(client.get("/api/v1/users/my").status_code, 200)
+        return decode.call_count
+
+    def test_cookie_token_is_decoded_once(self):
+        self.client.cookies["access"] = str(RoleRefreshToken.for_user(self.tenant).access_token)
+        self.assertEqual(self.decodes(self.client), 1)
+
+    def test_bearer_token_is_decoded_once(self):
+        self.assertEqual(self.decodes(self.client_for(self.tenant)), 1)
+
+    @override_settings(THROTTLE_ENABLED=True)
+    def test_throttle_and_authentication_share_the_token(self):
+        self.assertEqual(self.decodes(self.client_for(self.tenant)), 1)
+
+
+@override_settings(
+    LAST_LOGIN_BUFFER_ENABLED=True, LOGIN_SERVER_TIMING=True,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class LoginTests(QueryBudgetTestCase):
+    """Server-Timing и отложенный last_login при входе / Server-Timing und verzögertes last_login bei der Anmeldung"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.make_user("login_tenant", UserRole.TENANT)
+        cls.user.set_password("secret")
+        cls.user.save()
+
+    def setUp(self):
+        # свой буфер на тест, без фонового потока / eigener Puffer pro Test, ohne Hintergrund-Thread
+        patcher = mock.patch.object(services, "_last_login_buffer", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login(self):
+        response = self.client.post("/api/v1/users/login/", {"username": "login_tenant", "password": "secret"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def last_login(self):
+        return User.objects.values_list("last_login", flat=True).get(pk=self.user.pk)
+
+    def test_server_timing_header(self):
+        steps = [part.split(";")[0] for part in self.login()["Server-Timing"].split(", ")]
+        self.assertEqual(steps, ["authenticate", "tokens", "last_login"])
+
+        with override_settings(LOGIN_SERVER_TIMING=False):
+            self.assertNotIn("Server-Timing", self.login())
+
+    def test_last_login_is_written_on_flush(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.login()
+        self.assertFalse([query for query in queries if query["sql"].startswith("UPDATE")])
+        self.assertIsNone(self.last_login())
+
+        self.assertEqual(LoginService.flush_last_logins(), 1)
+        self.assertIsNotNone(self.last_login())
+
+    @override_settings(LAST_LOGIN_BUFFER_ENABLED=False)
+    def test_without_buffer_last_login_is_written_at_once(self):
+        self.login()
+        self.assertIsNotNone(self.last_login())
+
+
+@shared_blacklist_filter
+class TokenRevocationTests(QueryBudgetTestCase):
+    """Массовый отзыв и очистка токенов / Massenwiderruf und Bereinigung von Tokens"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = cls.make_user("revoke_tenant", UserRole.TENANT)
+        cls.other = cls.make_user("revoke_other", UserRole.TENANT)
+
+    def setUp(self):
+        cache.clear()
+        TokenBlacklistService._local = None
+        self.addCleanup(setattr, TokenBlacklistService, "_local", None)
+
+    def add_expired(self, user, amount: int) -> list[OutstandingToken]:
+        expired = timezone.now() - timedelta(days=1)
+        return OutstandingToken.objects.bulk_create(
+            OutstandingToken(user=user, jti=uuid.uuid4().hex, token="", expires_at=expired)
+            for _ in range(amount)
+        )
+
+    def test_revoke_user_tokens_blacklists_all_outstanding(self):
+        raws = [str(RoleRefreshToken.for_user(self.tenant)) for _ in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            RoleRefreshToken(raws[0]).blacklist()
+        other = str(RoleRefreshToken.for_user(self.other))
+        self.add_expired(self.tenant, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(TokenRevocationService.revoke_user_tokens(self.tenant.pk), 3)
+
+        self.assertEqual(BlacklistedToken.objects.filter(token__user=self.tenant).count(), 3)
+        for raw in raws:
+            with self.assertRaises(TokenError):
+                RoleRefreshToken(raw)
+            self.client.cookies["refresh"] = raw
+            self.assertEqual(self.client.get("/api/v1/users/my").status_code, 401)
+        RoleRefreshToken(other)
+
+        # повторный отзыв пропускает уже отозванные / ein erneuter Widerruf überspringt bereits widerrufene
+        with self.captureOnCommitCallbacks(execute=True):
+            TokenRevocationService.revoke_user_tokens(self.tenant.pk)
+        self.assertEqual(BlacklistedToken.objects.filter(token__user=self.tenant).count(), 3)
+
+    def test_purge_removes_only_expired_tokens(self):
+        expired = self.add_expired(self.tenant, 5)
+        BlacklistedToken.objects.bulk_create(BlacklistedToken(token=token) for token in expired[:2])
+        valid = RoleRefreshToken.for_user(self.tenant)
+        with self.captureOnCommitCallbacks(execute=True):
+            valid.blacklist()
+        kept = RoleRefreshToken.for_user(self.other)
+
+        out = StringIO()
+        call_command("purge_expired_tokens", chunk_size=2, sleep=0, stdout=out)
+
+        self.assertIn("Deleted 5 expired outstanding tokens in 3 chunks.", out.getvalue())
+        self.assertEqual(
+            set(OutstandingToken.objects.values_list("jti", flat=True)), {valid["jti"], kept["jti"]},
+        )
+        self.assertEqual(list(BlacklistedToken.objects.values_list("token__jti", flat=True)), [valid["jti"]])
+        with self.assertRaises(TokenError):
+            RoleRefreshToken(str(valid))
+        RoleRefreshToken(str(kept))
+
+    def test_purge_resumes_after_id(self):
+        expired = self.add_expired(self.tenant, 4)
+
+        call_command("purge_expired_tokens", chunk_size=1, sleep=0, max_chunks=1, stdout=StringIO())
+        self.assertEqual(OutstandingToken.objects.count(), 3)
+        call_command("purge_expired_tokens", sleep=0, after_id=expired[2].pk, stdout=StringIO())
+
+        self.assertEqual(list(OutstandingToken.objects.values_list("pk", flat=True)), [expired[1].pk, expired[2].pk])
+
+
+class LocalCacheBlacklistTests(QueryBudgetTestCase):
+    """Без общего кэша отзыв проверяется в БД / Ohne gemeinsamen Cache wird der Widerruf in der DB geprüft"""
+
+    def test_row_from_another_worker_is_rejected(self):
+        self.assertFalse(TokenBlacklistService.enabled())
+        tenant = self.make_user("local_blacklist_tenant", UserRole.TENANT)
+        refresh = RoleRefreshToken.for_user(tenant)
+        raw = str(refresh)
+        RoleRefreshToken(raw)
+
+        # другой процесс пишет строку; сигналы этого процесса не срабатывают
+        # ein anderer Prozess schreibt die Zeile; die Signale dieses Prozesses laufen nicht
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=OutstandingToken.objects.get(jti=refresh["jti"]))])
+
+        with self.assertRaises(TokenError):
+            RoleRefreshToken(raw)
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://x"}},
+    )
+    def test_shared_cache_enables_filter(self):
+        self.addCleanup(cache.close)
+        self.assertTrue(TokenBlacklistService.enabled())
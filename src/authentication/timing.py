@@ -0,0 +1,24 @@
+import time
+from contextlib import contextmanager
+
+
+class StepTimer:
+    """
+    Длительность шагов запроса для заголовка Server-Timing.
+    Dauer der Anfrageschritte für den Server-Timing-Header.
+    """
+
+    def __init__(self):
+        self.steps: list[tuple[str, float]] = []
+
+    @contextmanager
+    def step(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, (time.perf_counter() - started) * 1000))
+
+    def header(self) -> str:
+        """authenticate;dur=52.1, tokens;dur=1.3 (миллисекунды / Millisekunden)"""
+        return ", ".join(f"{name};dur={duration:.1f}" for name, duration in self.steps)
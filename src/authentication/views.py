@@ -5,14 +5,13 @@ from rest_framework.generics import (
     RetrieveUpdateDestroyAPIView
 )
 from rest_framework import permissions
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from django.utils.timezone import make_aware
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
 from rest_framework import status
 from rest_framework.exceptions import NotAuthenticated
 
@@ -23,11 +22,14 @@ from src.authentication.dtos import (
     UpdateUserDTO,
     ChangePasswordDTO
 )
+from src.authentication.services import LoginService, RoleRefreshToken, TokenRevocationService
+from src.authentication.timing import StepTimer
 from src.permissions.users import IsAdminOrSelf, IsAnonymous
+from src.throttling import LoginThrottle, ThrottleFirstMixin
 
 
 # Список пользователей + регистрация
-class UserListCreateView(ListCreateAPIView):
+class UserListCreateView(ThrottleFirstMixin, ListCreateAPIView):
     """
     API endpoint для работы со списком пользователей.
     - GET: возвращает список пользователей (только для администраторов)
@@ -37,7 +39,9 @@ class UserListCreateView(ListCreateAPIView):
     - GET: Gibt eine Liste der Benutzer zurück (nur für Administratoren)
     - POST: Registriert einen neuen Benutzer
     """
-    queryset = User.objects.all()
+    # профиль (роль) одним JOIN, а не запросом на каждую строку
+    # Profil (Rolle) per JOIN statt einer Abfrage pro Zeile
+    queryset = User.objects.select_related("profile").order_by("id")
 
     def get_serializer_class(self):
         """
@@ -67,7 +71,7 @@ class UserListCreateView(ListCreateAPIView):
             return [IsAnonymous()]  # регистрация доступна всем
         return [permissions.IsAdminUser()]  # список пользователей виден только админам
 
-class UserRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
+class UserRetrieveUpdateDestroyView(ThrottleFirstMixin, RetrieveUpdateDestroyAPIView):
     """
     API endpoint для работы с конкретным пользователем.
     - GET: просмотр профиля
@@ -79,7 +83,7 @@ class UserRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
     - PATCH: Teilweise Aktualisierung
     - DELETE: Deaktivierung des Benutzers
     """
-    queryset = User.objects.all()
+    queryset = User.objects.select_related("profile")
     permission_classes = [IsAdminOrSelf]
 
     def get_serializer_class(self):
@@ -100,9 +104,9 @@ class UserRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
         instance.is_active = False
         instance.save()
 
-        tokens = OutstandingToken.objects.filter(user=instance)
-        for token in tokens:
-            BlacklistedToken.objects.get_or_create(token=token)
+        # один SELECT и один bulk INSERT вместо get_or_create на каждый токен
+        # ein SELECT und ein bulk INSERT statt get_or_create pro Token
+        TokenRevocationService.revoke_user_tokens(instance.pk)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -112,7 +116,7 @@ class UserRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
             status=status.HTTP_204_NO_CONTENT,
         )
 
-class LoginUserAPIView(APIView):
+class LoginUserAPIView(ThrottleFirstMixin, APIView):
     """
     API для аутентификации пользователя.
     Принимает username и password, возвращает JWT-токены в HttpOnly куках.
@@ -129,24 +133,38 @@ class LoginUserAPIView(APIView):
     - password: Passwort
     """
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginThrottle]
 
     def post(self, request: Request, *args, **kwargs) -> Response:
         login, password = request.data.get('username'), request.data.get('password')
+        # длительность шагов входа (хеширование пароля, токены, last_login)
+        # Dauer der Anmeldeschritte (Passwort-Hashing, Tokens, last_login)
+        timer = StepTimer()
 
         try:
-            user = authenticate(
-                request=request,
-                username=login,
-                password=password
-            )
+            with timer.step("authenticate"):
+                user = authenticate(
+                    request=request,
+                    username=login,
+                    password=password
+                )
 
             if not user:
-                return Response({'error': 'Invalid username or password'},status=status.HTTP_401_UNAUTHORIZED)
+                response = Response({'error': 'Invalid username or password'},status=status.HTTP_401_UNAUTHORIZED)
+                return self.with_timing(response, timer)
 
             response = Response({"detail": "Login successful"},status=status.HTTP_200_OK)
 
-            refresh = RefreshToken.for_user(user)
-            access = refresh.access_token
+            with timer.step("tokens"):
+                # роль, is_staff и эпоха — в claims, чтобы запросы не читали User/Profile
+                # Rolle, is_staff und Epoche in den Claims, damit Anfragen User/Profile nicht lesen
+                refresh = RoleRefreshToken.for_user(user)
+                access = refresh.access_token
+
+            with timer.step("last_login"):
+                # UPDATE пачкой через буфер, без User.save и повторного сохранения профиля
+                # UPDATE stapelweise über den Puffer, ohne User.save und erneutes Speichern des Profils
+                LoginService.record_login(user.pk)
 
             refresh_exp = make_aware(
                 datetime.fromtimestamp(refresh.payload['exp'])
@@ -173,7 +191,7 @@ class LoginUserAPIView(APIView):
                 expires=access_exp
             )
 
-            return response
+            return self.with_timing(response, timer)
 
         except Exception as e:
             return Response(
@@ -183,8 +201,16 @@ class LoginUserAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    @staticmethod
+    def with_timing(response: Response, timer: StepTimer) -> Response:
+        """Заголовок Server-Timing, если LOGIN_SERVER_TIMING включён /
+        Server-Timing-Header, falls LOGIN_SERVER_TIMING aktiviert ist"""
+        if getattr(settings, "LOGIN_SERVER_TIMING", False):
+            response["Server-Timing"] = timer.header()
+        return response
+
 
-class LogoutUserAPIView(APIView):
+class LogoutUserAPIView(ThrottleFirstMixin, APIView):
     """
     API для выхода пользователя из системы.
     Отзывает refresh-токен и удаляет куки аутентификации.
@@ -197,7 +223,7 @@ class LogoutUserAPIView(APIView):
         try:
             refresh_token = request.COOKIES.get('refresh')
             if refresh_token:
-                token = RefreshToken(refresh_token)
+                token = RoleRefreshToken(refresh_token)
                 token.blacklist()
 
             response = Response(status=status.HTTP_200_OK)
@@ -213,7 +239,7 @@ class LogoutUserAPIView(APIView):
             response.delete_cookie('refresh')
             return response
 
-class ChangePasswordAPIView(APIView):
+class ChangePasswordAPIView(ThrottleFirstMixin, APIView):
     """
     API для изменения пароля пользователя.
     Требует аутентификации.
@@ -239,7 +265,7 @@ class ChangePasswordAPIView(APIView):
         serializer.save()
         return Response({"detail": "Password successfully changed"}, status=status.HTTP_200_OK)
 
-class CurrentUserAPIView(APIView):
+class CurrentUserAPIView(ThrottleFirstMixin, APIView):
     """
     Возвращает сведения о текущем аутентифицированном пользователе.
     
@@ -269,5 +295,8 @@ class CurrentUserAPIView(APIView):
             # стандартное сообщение DRF
             raise NotAuthenticated()
 
+        # у principal из токена загружены только id, is_staff и is_active
+        # der Principal aus dem Token hat nur id, is_staff und is_active geladen
+        user = User.objects.select_related("profile").get(pk=user.pk)
         serializer = DetailedUserDTO(user)
         return Response(serializer.data)
@@ -0,0 +1,19 @@
+from src.benchmark.timing import measure, summarize, percentile, rolled_back
+from src.benchmark.concurrency import run_concurrently
+from src.benchmark.fixtures import seed_users, seed_listings, seed_bookings
+from src.benchmark.budget import QueryBudgetTestCase
+from src.benchmark.caches import flush_write_buffers, forget_cached_rows
+
+__all__ = [
+    'measure',
+    'summarize',
+    'percentile',
+    'rolled_back',
+    'seed_users',
+    'seed_listings',
+    'seed_bookings',
+    'run_concurrently',
+    'QueryBudgetTestCase',
+    'flush_write_buffers',
+    'forget_cached_rows'
+]
@@ -0,0 +1,63 @@
+from typing import Callable, Optional
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APIClient, APITestCase
+
+from src.authentication.services import RoleRefreshToken
+
+# без буферов, троттлинга и кэшей ответов: каждый запрос делает одну и ту же работу
+# ohne Puffer, Drosselung und Antwort-Caches: jede Anfrage erledigt dieselbe Arbeit
+BUDGET_SETTINGS = {
+    "THROTTLE_ENABLED": False,
+    "LISTING_CACHE_TIMEOUT": 0,
+    "LISTING_AVAILABILITY_CACHE_TIMEOUT": 0,
+    "VIEW_BUFFER_ENABLED": False,
+    "SEARCH_LOG_BUFFER_ENABLED": False,
+    "LAST_LOGIN_BUFFER_ENABLED": False,
+    "WRITE_BEHIND_BACKGROUND_FLUSH": False,
+    "PROFILER_ENABLED": False,
+}
+
+
+@override_settings(**BUDGET_SETTINGS)
+class QueryBudgetTestCase(APITestCase):
+    """
+    Бюджет SQL-запросов на маршрут. Кэш очищается перед каждым замером,
+    поэтому аутентифицированный запрос включает чтение эпохи из БД.
+    assertBudget(..., grow=...) повторяет замер после добавления строк —
+    бюджет не должен зависеть от их числа (N+1).
+
+    SQL-Abfragebudget pro Route. Der Cache wird vor jeder Messung geleert,
+    daher enthält eine authentifizierte Anfrage das Lesen der Epoche aus der DB.
+    assertBudget(..., grow=...) wiederholt die Messung nach dem Hinzufügen von
+    Zeilen — das Budget darf nicht von deren Anzahl abhängen (N+1).
+    """
+
+    @staticmethod
+    def make_user(username: str, role: Optional[str] = None, is_staff: bool = False) -> User:
+        # без пароля: хеширование PBKDF2 не нужно / ohne Passwort: kein PBKDF2-Hashing nötig
+        user = User.objects.create_user(username, is_staff=is_staff)
+        if role:
+            user.profile.role = role
+            user.profile.save()
+        return User.objects.select_related("profile").get(pk=user.pk)
+
+    @staticmethod
+    def client_for(user: Optional[User] = None) -> APIClient:
+        client = APIClient()
+        if user is not None:
+            access = RoleRefreshToken.for_user(user).access_token
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return client
+
+    def assertBudget(self, budget: int, send: Callable, status: int = 200, grow: Optional[Callable] = None):
+        for step in ("initial", "grown") if grow else ("initial",):
+            if step == "grown":
+                grow()
+            cache.clear()
+            with self.subTest(step=step), self.assertNumQueries(budget):
+                response = send()
+            self.assertEqual(response.status_code, status, getattr(response, "data", None))
+        return response
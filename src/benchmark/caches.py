@@ -0,0 +1,40 @@
+from typing import Iterable
+
+from django.core.cache import cache
+
+from src.apartments.services import ListingCacheService, SearchService, ViewService
+from src.authentication.services import AuthEpochService, LoginService
+from src.booking.services import AvailabilityService
+
+
+def flush_write_buffers() -> dict:
+    """
+    Сбрасывает буферы отложенной записи в БД (просмотры, поиск, last_login),
+    возвращает число ключей по буферам.
+
+    Schreibt die Write-Behind-Puffer in die DB (Aufrufe, Suche, last_login),
+    gibt die Anzahl der Schlüssel pro Puffer zurück.
+    """
+    return {
+        "views": ViewService.flush_views(),
+        "searches": SearchService.flush_searches(),
+        "last_login": LoginService.flush_last_logins(),
+    }
+
+
+def forget_cached_rows(listing_ids: Iterable[int] = (), user_ids: Iterable[int] = ()) -> None:
+    """
+    Удаляет из кэша только то, что зависит от вставленных или откаченных
+    строк: версии кэша объявлений, календари занятости и эпохи пользователей.
+    Буферы, сводки trending и остальные ключи общего кэша не трогаются.
+
+    Entfernt aus dem Cache nur, was von eingefügten oder zurückgerollten Zeilen
+    abhängt: Versionen des Anzeigen-Caches, Belegungskalender und Benutzer-Epochen.
+    Puffer, Trending-Zusammenfassungen und andere Schlüssel des gemeinsamen
+    Caches bleiben unberührt.
+    """
+    ListingCacheService.reset()
+    keys = [AvailabilityService.cache_key(pk) for pk in listing_ids]
+    keys += [AuthEpochService.cache_key(pk) for pk in user_ids]
+    for start in range(0, len(keys), 1000):
+        cache.delete_many(keys[start:start + 1000])
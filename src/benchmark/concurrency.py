@@ -0,0 +1,50 @@
+import threading
+import time
+from typing import Callable, Sequence
+
+from django.db import connection
+
+
+def run_concurrently(worker: Callable, jobs: Sequence[Sequence], threads: int,
+                     rejected: tuple[type[Exception], ...] = ()) -> dict:
+    """
+    Выполняет worker(*job) для всех jobs в threads потоках, стартующих одновременно
+    (барьер). Исключения из rejected считаются отказами, прочие — ошибками.
+    Возвращает {"ok", "rejected", "errors", "seconds"}.
+
+    Führt worker(*job) für alle jobs in threads gleichzeitig startenden Threads aus
+    (Barriere). Ausnahmen aus rejected zählen als Ablehnungen, andere als Fehler.
+    Gibt {"ok", "rejected", "errors", "seconds"} zurück.
+    """
+    barrier = threading.Barrier(threads + 1)
+    lock = threading.Lock()
+    result = {"ok": 0, "rejected": 0, "errors": []}
+
+    def run(thread_jobs):
+        try:
+            barrier.wait()
+            for job in thread_jobs:
+                try:
+                    worker(*job)
+                    outcome = "ok"
+                except rejected:
+                    outcome = "rejected"
+                except Exception as exc:
+                    with lock:
+                        result["errors"].append(exc)
+                    continue
+                with lock:
+                    result[outcome] += 1
+        finally:
+            # у каждого потока своё соединение / jeder Thread hat eine eigene Verbindung
+            connection.close()
+
+    workers = [threading.Thread(target=run, args=(jobs[i::threads],)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    result["seconds"] = time.perf_counter() - started
+    return result
@@ -0,0 +1,361 @@
+import itertools
+import random
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from src.apartments.models import Listing, ListingSearchTerm, ListingView, ListingViewBucket, Review, SearchHistory
+from src.authentication.models import Profile
+from src.benchmark.fixtures import LOCATIONS, VOCABULARY, seed_users
+from src.booking.models import Booking
+from src.choices import BookingStatus, HousingType, UserRole
+
+# доля бронирований по месяцам: пик летом и в декабре
+# Anteil der Buchungen pro Monat: Spitze im Sommer und im Dezember
+MONTH_WEIGHTS = (3, 3, 4, 5, 6, 9, 11, 11, 7, 5, 4, 7)
+# средняя цена за ночь по городу / mittlerer Preis pro Nacht je Stadt
+LOCATION_PRICES = {
+    "Berlin": 95, "Hamburg": 90, "Munich": 130, "Cologne": 80,
+    "Frankfurt": 105, "Leipzig": 60, "Dresden": 65, "Bremen": 70,
+}
+RATING_WEIGHTS = (3, 4, 10, 33, 50)
+HOUSING_WEIGHTS = {
+    HousingType.APARTMENT: 55, HousingType.ROOM: 20, HousingType.STUDIO: 15, HousingType.HOUSE: 10,
+}
+
+
+def zipf_cum_weights(count: int, exponent: float) -> list[float]:
+    """Накопленные веса Zipf: ранг r весит 1 / r^s / Kumulierte Zipf-Gewichte: Rang r wiegt 1 / r^s"""
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """
+    Временно отключает auto_now_add, чтобы bulk_create сохранил заданные даты.
+    Schaltet auto_now_add vorübergehend ab, damit bulk_create die gesetzten Daten speichert.
+    """
+    saved = [(field, field.auto_now_add) for field in fields]
+    for field, _ in saved:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now_add in saved:
+            field.auto_now_add = auto_now_add
+
+
+class DatasetGenerator:
+    """
+    Синтетические данные в масштабе продакшена: популярность объявлений по
+    Zipf, сезонные брони, отзывы к завершённым броням, просмотры и история
+    поиска. Детерминирован по seed; вставка — bulk_create порциями, без
+    post_save сигналов (профили создаются отдельным bulk_create).
+
+    Synthetische Daten im Produktionsmaßstab: Beliebtheit der Anzeigen nach Zipf,
+    saisonale Buchungen, Bewertungen abgeschlossener Buchungen, Aufrufe und
+    Suchverlauf. Deterministisch durch seed; Einfügen per bulk_create in Portionen,
+    ohne post_save-Signale (Profile werden per eigenem bulk_create angelegt).
+    """
+
+    def __init__(self, prefix: str = "seed_", seed: int = 0, batch_size: int = 5000,
+                 zipf_exponent: float = 1.1, today: Optional[date] = None,
+                 log: Callable[[str], None] = lambda message: None):
+        self.prefix = prefix
+        self.seed = seed
+        self.batch_size = batch_size
+        self.zipf_exponent = zipf_exponent
+        self.today = today or timezone.localdate()
+        self.log = log
+        self.landlord_ids: list[int] = []
+        self.tenant_ids: list[int] = []
+        self.listing_ids: list[int] = []
+        self._listing_weights: list[float] = []
+
+    def rng(self, stream: str) -> random.Random:
+        # свой генератор на шаг: объёмы одного шага не меняют данные другого
+        # eigener Generator pro Schritt: Mengen eines Schritts ändern die Daten eines anderen nicht
+        return random.Random(f"{self.seed}:{stream}")
+
+    def aware(self, day: date, rng: random.Random) -> datetime:
+        moment = datetime.combine(day, time(rng.randint(7, 23), rng.randint(0, 59)))
+        return timezone.make_aware(moment) if settings.USE_TZ else moment
+
+    def insert(self, model, rows, **options) -> int:
+        """bulk_create порциями, каждая в своей транзакции / bulk_create in Portionen, jede in eigener Transaktion"""
+        total = 0
+        rows = iter(rows)
+        while chunk := list(itertools.islice(rows, self.batch_size)):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, batch_size=self.batch_size, **options)
+            total += len(chunk)
+        self.log(f"{model.__name__}: {total}")
+        return total
+
+    def exists(self) -> bool:
+        return User.objects.filter(username__startswith=self.prefix).exists()
+
+    def listings(self):
+        # без pk__in на миллион id / ohne pk__in über eine Million ids
+        return Listing.objects.filter(landlord__username__startswith=f"{self.prefix}landlord_")
+
+    def delete(self) -> int:
+        """
+        Удаляет ранее засеянные данные с этим префиксом набором DELETE по
+        подзапросам в порядке внешних ключей: без каскада ORM, который загрузил
+        бы каждую строку и её связи в память.
+
+        Löscht früher erzeugte Daten mit diesem Präfix per DELETE über
+        Unterabfragen in Fremdschlüssel-Reihenfolge: ohne ORM-Kaskade, die jede
+        Zeile samt Beziehungen in den Speicher laden würde.
+        """
+        users = User.objects.filter(username__startswith=self.prefix).values("pk")
+        listings = Listing.objects.filter(landlord__in=users).values("pk")
+        querysets = [
+            Review.objects.filter(Q(listing__in=listings) | Q(tenant__in=users)),
+            ListingView.objects.filter(Q(listing__in=listings) | Q(user__in=users)),
+            ListingViewBucket.objects.filter(listing__in=listings),
+            ListingSearchTerm.objects.filter(listing__in=listings),
+            Booking.objects.filter(Q(listing__in=listings) | Q(tenant__in=users)),
+            SearchHistory.objects.filter(user__in=users),
+            Profile.objects.filter(user__in=users),
+            LogEntry.objects.filter(user__in=users),
+            User.groups.through.objects.filter(user__in=users),
+            User.user_permissions.through.objects.filter(user__in=users),
+            Listing.objects.filter(landlord__in=users),
+        ]
+        with transaction.atomic():
+            deleted = sum(queryset._raw_delete(queryset.db) for queryset in querysets)
+            # токены остаются, как при on_delete=SET_NULL / Token bleiben wie bei on_delete=SET_NULL
+            OutstandingToken.objects.filter(user__in=users).update(user=None)
+            # подзапрос по той же таблице в DELETE не поддерживается MySQL
+            # eine Unterabfrage auf dieselbe Tabelle im DELETE unterstützt MySQL nicht
+            user_ids = list(users.values_list("pk", flat=True))
+            for start in range(0, len(user_ids), self.batch_size):
+                chunk = User.objects.filter(pk__in=user_ids[start:start + self.batch_size])
+                deleted += chunk._raw_delete(chunk.db)
+        self.log(f"Deleted {deleted} rows")
+        return deleted
+
+    def generate(self, users: int, listings: int, bookings: int, views: int, searches: int,
+                 landlord_share: float = 0.05, review_share: float = 0.35) -> dict:
+        landlords = max(1, int(users * landlord_share))
+        self.seed_users(landlords, users - landlords)
+        return {
+            "users": users,
+            "listings": self.seed_listings(listings),
+            **self.seed_bookings(bookings, review_share),
+            "listing_views": self.seed_views(views),
+            "search_history": self.seed_searches(searches),
+        }
+
+    def seed_users(self, landlords: int, tenants: int) -> None:
+        self.landlord_ids = seed_users(landlords, f"{self.prefix}landlord_", UserRole.LANDLORD, self.batch_size)
+        self.tenant_ids = seed_users(tenants, f"{self.prefix}tenant_", UserRole.TENANT, self.batch_size)
+        self.log(f"User/Profile: {landlords} landlords, {tenants} tenants")
+
+    def popular_listings(self, rng: random.Random, count: int) -> Counter:
+        """count выборок объявлений по Zipf / count Zipf-Stichproben von Anzeigen"""
+        picks = Counter()
+        for start in range(0, count, self.batch_size):
+            k = min(self.batch_size, count - start)
+            picks.update(rng.choices(self.listing_ids, cum_weights=self._listing_weights, k=k))
+        return picks
+
+    def seed_listings(self, count: int) -> int:
+        rng = self.rng("listings")
+        # у нескольких арендодателей много объявлений / wenige Vermieter haben viele Anzeigen
+        landlord_weights = zipf_cum_weights(len(self.landlord_ids), self.zipf_exponent)
+        housing_types, housing_weights = zip(*HOUSING_WEIGHTS.items())
+        first_day = self.today - timedelta(days=730)
+
+        def build(i):
+            location = rng.choice(LOCATIONS)
+            housing_type = rng.choices(housing_types, housing_weights)[0]
+            rooms = 1 if housing_type in (HousingType.ROOM, HousingType.STUDIO) else rng.randint(1, 6)
+            price = LOCATION_PRICES[location] * rng.lognormvariate(0, 0.35) * (0.6 + 0.25 * rooms)
+            return Listing(
+                landlord_id=rng.choices(self.landlord_ids, cum_weights=landlord_weights)[0],
+                title=f"{' '.join(rng.sample(VOCABULARY, 2)).capitalize()} {housing_type} in {location}",
+                description=" ".join(rng.choices(VOCABULARY, k=rng.randint(8, 30))),
+                location=location,
+                price=Decimal(max(15, round(price))),
+                rooms=rooms,
+                housing_type=housing_type,
+                is_active=rng.random() > 0.08,
+                cancellation_deadline_days=rng.choice((1, 3, 3, 7, 14)),
+                created_at=self.aware(first_day + timedelta(days=rng.randint(0, 730)), rng),
+            )
+
+        with explicit_timestamps(Listing._meta.get_field("created_at")):
+            inserted = self.insert(Listing, (build(i) for i in range(count)))
+
+        self.listing_ids = list(self.listings().order_by("id").values_list("id", flat=True))
+        # ранги популярности перемешаны — популярность не зависит от id
+        # Beliebtheitsränge gemischt — die Beliebtheit hängt nicht von der id ab
+        rng.shuffle(self.listing_ids)
+        self._listing_weights = zipf_cum_weights(len(self.listing_ids), self.zipf_exponent)
+        return inserted
+
+    def booking_window(self, rng: random.Random, first_day: date) -> date:
+        month = rng.choices(range(12), MONTH_WEIGHTS)[0]
+        year = first_day.year + rng.randint(0, 1)
+        start = date(year, month + 1, 1) + timedelta(days=rng.randint(0, 27))
+        return start if start >= first_day else start.replace(year=start.year + 1)
+
+    def booking_status(self, rng: random.Random, start_date: date, end_date: date) -> str:
+        if end_date <= self.today:
+            return rng.choices((BookingStatus.CHECKED, BookingStatus.CANCELLED, BookingStatus.REJECTED), (75, 15, 10))[0]
+        if start_date <= self.today:
+            return BookingStatus.CONFIRMED
+        return rng.choices((BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.CANCELLED), (40, 50, 10))[0]
+
+    def seed_bookings(self, count: int, review_share: float) -> dict:
+        """
+        Брони распределены по объявлениям по Zipf, даты — по сезонным весам
+        месяцев в окне [сегодня − 1 год, сегодня + 1 год). Пересечения
+        отбрасываются, поэтому популярные объявления заполняются целиком и
+        броней может выйти меньше count.
+
+        Buchungen sind nach Zipf auf die Anzeigen verteilt, Daten nach saisonalen
+        Monatsgewichten im Fenster [heute − 1 Jahr, heute + 1 Jahr). Überschneidungen
+        werden verworfen, daher sind beliebte Anzeigen ausgebucht und es können
+        weniger als count Buchungen entstehen.
+        """
+        rng = self.rng("bookings")
+        first_day = self.today - timedelta(days=365)
+        last_day = self.today + timedelta(days=365)
+        deadlines = dict(self.listings().values_list("id", "cancellation_deadline_days"))
+        reviews = []
+
+        def build():
+            for listing_id, picks in sorted(self.popular_listings(rng, count).items()):
+                windows = []
+                for _ in range(picks):
+                    nights = min(1 + int(rng.expovariate(1 / 3)), 28)
+                    start_date = self.booking_window(rng, first_day)
+                    windows.append((start_date, start_date + timedelta(days=nights)))
+                windows.sort()
+
+                busy_until = first_day
+                reviewers = set()
+                for start_date, end_date in windows:
+                    if start_date < busy_until or end_date > last_day:
+                        continue
+                    busy_until = end_date
+                    tenant_id = rng.choice(self.tenant_ids)
+                    status = self.booking_status(rng, start_date, end_date)
+                    if status == BookingStatus.CHECKED and tenant_id not in reviewers and rng.random() < review_share:
+                        reviewers.add(tenant_id)
+                        reviews.append(Review(
+                            tenant_id=tenant_id,
+                            listing_id=listing_id,
+                            rating=rng.choices(range(1, 6), RATING_WEIGHTS)[0],
+                            comment=" ".join(rng.choices(VOCABULARY, k=rng.randint(0, 15))) or None,
+                            created_at=self.aware(min(end_date + timedelta(days=rng.randint(0, 14)), self.today), rng),
+                        ))
+                    yield Booking(
+                        listing_id=listing_id,
+                        tenant_id=tenant_id,
+                        start_date=start_date,
+                        end_date=end_date,
+                        status=status,
+                        cancellable_until=start_date - timedelta(days=deadlines[listing_id]),
+                        created_at=self.aware(start_date - timedelta(days=rng.randint(1, 90)), rng),
+                    )
+
+        with explicit_timestamps(Booking._meta.get_field("created_at"), Review._meta.get_field("created_at")):
+            inserted = self.insert(Booking, build())
+            reviewed = self.insert(Review, reviews)
+        return {"bookings": inserted, "reviews": reviewed}
+
+    def seed_views(self, count: int, anonymous_share: float = 0.3) -> int:
+        """
+        Строки ListingView (уникальны по listing, viewer_key): число зрителей
+        объявления — по Zipf, зрители внутри объявления без повторов.
+
+        ListingView-Zeilen (eindeutig pro listing, viewer_key): die Zuschauerzahl einer
+        Anzeige folgt Zipf, Zuschauer innerhalb einer Anzeige ohne Wiederholung.
+        """
+        rng = self.rng("views")
+        users = self.tenant_ids + self.landlord_ids
+
+        def build():
+            for listing_id, viewers in sorted(self.popular_listings(rng, count).items()):
+                anonymous = round(viewers * anonymous_share)
+                for user_id in rng.sample(users, min(viewers - anonymous, len(users))):
+                    yield ListingView(
+                        listing_id=listing_id,
+                        user_id=user_id,
+                        viewer_key=ListingView.key_for(user_id, None),
+                        view_count=1 + int(rng.expovariate(0.7)),
+                    )
+                for address in rng.sample(range(1, 1 << 24), anonymous):
+                    ip_address = f"10.{address >> 16}.{(address >> 8) & 255}.{address & 255}"
+                    yield ListingView(
+                        listing_id=listing_id,
+                        ip_address=ip_address,
+                        viewer_key=ListingView.key_for(None, ip_address),
+                        view_count=1 + int(rng.expovariate(0.7)),
+                    )
+
+        return self.insert(ListingView, build())
+
+    def seed_searches(self, count: int) -> int:
+        """
+        SearchHistory (уникальна по keyword, user): запросы из городов и
+        словаря, популярность запросов по Zipf; анонимные — по строке на запрос.
+
+        SearchHistory (eindeutig pro keyword, user): Anfragen aus Städten und dem
+        Vokabular, Beliebtheit der Anfragen nach Zipf; anonyme — eine Zeile pro Anfrage.
+        """
+        rng = self.rng("searches")
+        keywords = [location.lower() for location in LOCATIONS] + VOCABULARY + [
+            f"{location.lower()} {word}" for location in LOCATIONS for word in VOCABULARY
+        ]
+        rng.shuffle(keywords)
+        keyword_weights = zipf_cum_weights(len(keywords), self.zipf_exponent)
+        per_user = max(1, count // max(len(self.tenant_ids), 1))
+        first_day = self.today - timedelta(days=180)
+
+        def row(user_id, keyword, searches):
+            return SearchHistory(
+                user_id=user_id, user_key=SearchHistory.key_for(user_id), keyword=keyword, search_count=searches,
+                created_at=self.aware(first_day + timedelta(days=rng.randint(0, 180)), rng),
+            )
+
+        anonymous = keywords[: max(1, count // 10)]
+
+        def build():
+            produced = len(anonymous)
+            for user_id in self.tenant_ids:
+                if produced >= count:
+                    return
+                # не больше четверти словаря — хвост Zipf выбирается редко
+                # höchstens ein Viertel des Vokabulars — das Zipf-Ende wird selten gezogen
+                wanted = min(1 + int(rng.expovariate(1 / per_user)), len(keywords) // 4, count - produced)
+                chosen = set()
+                while len(chosen) < wanted:
+                    chosen.update(rng.choices(keywords, cum_weights=keyword_weights, k=wanted - len(chosen)))
+                for keyword in sorted(chosen):
+                    produced += 1
+                    yield row(user_id, keyword, 1 + int(rng.expovariate(0.5)))
+
+        with explicit_timestamps(SearchHistory._meta.get_field("created_at")):
+            # анонимные строки общие для всех префиксов: повторный посев их перезаписывает
+            # anonyme Zeilen sind allen Präfixen gemeinsam: erneutes Seeding überschreibt sie
+            total = self.insert(
+                SearchHistory, [row(None, keyword, 1 + int(rng.expovariate(0.01))) for keyword in anonymous],
+                update_conflicts=True, unique_fields=["keyword", "user_key"], update_fields=["search_count", "created_at"],
+            )
+            return total + self.insert(SearchHistory, build())
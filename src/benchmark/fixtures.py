@@ -0,0 +1,100 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+
+from src.apartments.models import Listing
+from src.authentication.models import Profile
+from src.booking.models import Booking
+from src.choices import BookingStatus, HousingType
+
+LOCATIONS = ["Berlin", "Hamburg", "Munich", "Cologne", "Frankfurt", "Leipzig", "Dresden", "Bremen"]
+VOCABULARY = [
+    "bright", "quiet", "spacious", "cozy", "modern", "renovated", "central", "balcony", "garden",
+    "terrace", "kitchen", "parking", "elevator", "furnished", "view", "park", "station", "river",
+    "family", "student", "loft", "attic", "sunny", "wifi", "pets", "fireplace", "sauna", "garage",
+]
+
+
+def seed_users(count: int, prefix: str, role: Optional[str] = None, batch_size: int = 1000) -> list[int]:
+    """
+    Создаёт пользователей через bulk_create (без post_save сигналов) и их профили.
+    Erstellt Benutzer per bulk_create (ohne post_save-Signale) und deren Profile.
+    """
+    password = make_password("benchmark")
+    User.objects.bulk_create(
+        (User(username=f"{prefix}{i}", password=password) for i in range(count)),
+        batch_size=batch_size,
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith=prefix).order_by("id").values_list("id", flat=True)
+    )
+    if role:
+        Profile.objects.bulk_create(
+            (Profile(user_id=user_id, role=role) for user_id in user_ids),
+            batch_size=batch_size,
+        )
+    return user_ids
+
+
+def seed_listings(count: int, landlord_ids: list[int], seed: int = 0, batch_size: int = 1000) -> None:
+    """
+    Создаёт count объявлений со случайными (детерминированными по seed) полями.
+    Erstellt count Anzeigen mit zufälligen (durch seed deterministischen) Feldern.
+    """
+    rng = random.Random(seed)
+    housing_types = HousingType.values
+
+    def build(i):
+        location = rng.choice(LOCATIONS)
+        return Listing(
+            landlord_id=rng.choice(landlord_ids),
+            title=f"Listing {i} in {location}",
+            description=" ".join(rng.choices(VOCABULARY, k=12)),
+            location=location,
+            price=Decimal(rng.randint(20, 500)),
+            rooms=rng.randint(1, 6),
+            housing_type=rng.choice(housing_types),
+        )
+
+    # порциями, чтобы не держать миллион объектов в памяти
+    # in Portionen, um nicht eine Million Objekte im Speicher zu halten
+    for start in range(0, count, batch_size):
+        stop = min(start + batch_size, count)
+        Listing.objects.bulk_create([build(i) for i in range(start, stop)])
+
+
+def seed_bookings(count: int, listing_ids: list[int], tenant_ids: list[int], seed: int = 0,
+                  start: date = date(2024, 1, 1), batch_size: int = 5000) -> None:
+    """
+    Создаёт count бронирований: у каждого объявления — цепочка непересекающихся
+    броней от start (1–14 ночей, промежутки 0–10 дней) со случайными статусами.
+
+    Erstellt count Buchungen: pro Anzeige eine Kette nicht überlappender Buchungen
+    ab start (1–14 Nächte, Lücken 0–10 Tage) mit zufälligen Status.
+    """
+    rng = random.Random(seed)
+    statuses = BookingStatus.values
+    # следующая свободная дата по объявлению / nächstes freies Datum pro Anzeige
+    cursors = dict.fromkeys(listing_ids, start)
+
+    def build(i):
+        listing_id = listing_ids[i % len(listing_ids)]
+        start_date = cursors[listing_id] + timedelta(days=rng.randint(0, 10))
+        end_date = start_date + timedelta(days=rng.randint(1, 14))
+        cursors[listing_id] = end_date
+        return Booking(
+            listing_id=listing_id,
+            tenant_id=rng.choice(tenant_ids),
+            start_date=start_date,
+            end_date=end_date,
+            status=rng.choice(statuses),
+            cancellable_until=start_date - timedelta(days=3),
+        )
+
+    for offset in range(0, count, batch_size):
+        stop = min(offset + batch_size, count)
+        Booking.objects.bulk_create([build(i) for i in range(offset, stop)])
@@ -0,0 +1,245 @@
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from itertools import cycle
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from src.apartments.services import ListingCounterService, SearchIndexService
+from src.benchmark.dataset import DatasetGenerator
+from src.benchmark.timing import summarize
+from src.booking.models import Booking
+from src.choices import BookingStatus
+
+PASSWORD = "benchmark"
+# брони сценариев — далеко после дат набора данных / Szenario-Buchungen — weit nach den Daten des Datensatzes
+FUTURE = date(2031, 1, 1)
+
+
+@dataclass
+class BenchmarkWorld:
+    """Набор данных, общий для сценариев / Für die Szenarien gemeinsamer Datensatz"""
+    generator: DatasetGenerator
+    listing_ids: list[int] = field(default_factory=list)
+    tenant: str = ""
+    landlord: str = ""
+    landlord_listing_ids: list[int] = field(default_factory=list)
+
+
+class Scenario:
+    """
+    Сценарий: op() — одна операция пользователя из requests_per_op HTTP-запросов
+    через настоящий URLconf и middleware. prepare(ops) готовит данные на ops операций.
+
+    Szenario: op() — eine Benutzeroperation aus requests_per_op HTTP-Anfragen
+    über die echte URLconf und Middleware. prepare(ops) bereitet Daten für ops Operationen vor.
+    """
+    name = ""
+    requests_per_op = 1
+
+    def __init__(self, world: BenchmarkWorld):
+        self.world = world
+        self.client = Client()
+
+    def prepare(self, ops: int) -> None:
+        pass
+
+    def op(self) -> None:
+        raise NotImplementedError
+
+    def login(self, client: Client, username: str) -> None:
+        response = client.post(
+            "/api/v1/users/login/", {"username": username, "password": PASSWORD}, content_type="application/json"
+        )
+        assert response.status_code == 200, (response.status_code, response.content[:200])
+
+    @staticmethod
+    def expect(response, status: int = 200):
+        assert response.status_code == status, (response.status_code, response.content[:200])
+        return response
+
+
+class AnonymousBrowse(Scenario):
+    """Список объявлений без входа: фильтры, сортировки, поиск / Anzeigenliste ohne Anmeldung: Filter, Sortierung, Suche"""
+    name = "anonymous_browse"
+    QUERIES = [
+        {},
+        {"location": "berlin"},
+        {"min_price": "50", "max_price": "150"},
+        {"housing_type": "apartment", "ordering": "price"},
+        {"min_rooms": "2", "ordering": "-views_count"},
+        {"search": "balcony"},
+        {"search": "munich quiet"},
+        {"page": "3"},
+    ]
+
+    def prepare(self, ops: int) -> None:
+        self.params = cycle(self.QUERIES)
+
+    def op(self) -> None:
+        self.expect(self.client.get("/api/v1/listings/", next(self.params)))
+
+
+class ListingDetail(Scenario):
+    """Карточка объявления, популярные чаще (Zipf) / Anzeigendetail, beliebte häufiger (Zipf)"""
+    name = "listing_detail"
+
+    def prepare(self, ops: int) -> None:
+        rng = self.world.generator.rng("bench:detail")
+        active = set(self.world.listing_ids)
+        ids = [pk for pk in self.world.generator.popular_listings(rng, ops * 2).elements() if pk in active]
+        rng.shuffle(ids)
+        self.ids = cycle(ids)
+
+    def op(self) -> None:
+        self.expect(self.client.get(f"/api/v1/listings/{next(self.ids)}/"))
+
+
+class TenantBooking(Scenario):
+    """Арендатор создаёт бронь на свободные даты / Mieter legt eine Buchung für freie Daten an"""
+    name = "tenant_booking_create"
+
+    def prepare(self, ops: int) -> None:
+        self.login(self.client, self.world.tenant)
+        listing_ids = self.world.listing_ids[:50]
+        self.jobs = iter(
+            (listing_ids[i % len(listing_ids)], FUTURE + timedelta(days=3 * (i // len(listing_ids))))
+            for i in range(ops)
+        )
+
+    def op(self) -> None:
+        listing_id, start_date = next(self.jobs)
+        payload = {"listing": listing_id, "start_date": str(start_date), "end_date": str(start_date + timedelta(days=2))}
+        self.expect(self.client.post("/api/v1/bookings/", payload, content_type="application/json"), 201)
+
+
+class LandlordTransitions(Scenario):
+    """Арендодатель подтверждает или отклоняет ожидающие брони / Vermieter bestätigt oder lehnt ausstehende Buchungen ab"""
+    name = "landlord_status_transitions"
+
+    def prepare(self, ops: int) -> None:
+        self.login(self.client, self.world.landlord)
+        listing_ids = self.world.landlord_listing_ids
+        tenant_id = self.world.generator.tenant_ids[-1]
+        first = FUTURE + timedelta(days=2000)
+        Booking.objects.bulk_create(
+            Booking(
+                listing_id=listing_ids[i % len(listing_ids)],
+                tenant_id=tenant_id,
+                start_date=first + timedelta(days=3 * (i // len(listing_ids))),
+                end_date=first + timedelta(days=3 * (i // len(listing_ids)) + 2),
+                status=BookingStatus.PENDING,
+                cancellable_until=first,
+            )
+            for i in range(ops)
+        )
+        self.pending = iter(
+            Booking.objects.filter(listing_id__in=listing_ids, status=BookingStatus.PENDING, start_date__gte=first)
+            .order_by("id").values_list("id", flat=True)
+        )
+        self.statuses = cycle((BookingStatus.CONFIRMED, BookingStatus.REJECTED))
+
+    def op(self) -> None:
+        payload = json.dumps({"status": next(self.statuses)})
+        self.expect(self.client.patch(f"/api/v1/bookings/{next(self.pending)}/", payload, content_type="application/json"))
+
+
+class LoginRefresh(Scenario):
+    """
+    Вход, затем запрос только с refresh-cookie — middleware выпускает новый access.
+    Anmeldung, dann eine Anfrage nur mit Refresh-Cookie — die Middleware stellt ein neues Access aus.
+    """
+    name = "login_refresh"
+    requests_per_op = 2
+
+    def op(self) -> None:
+        client = Client()
+        self.login(client, self.world.tenant)
+        del client.cookies["access"]
+        response = self.expect(client.get("/api/v1/users/my"))
+        assert "access" in response.cookies, "access token was not refreshed"
+
+
+SCENARIOS = [AnonymousBrowse, ListingDetail, TenantBooking, LandlordTransitions, LoginRefresh]
+
+
+def build_world(generator: DatasetGenerator, users: int, listings: int, bookings: int,
+                views: int, searches: int) -> BenchmarkWorld:
+    generator.generate(users=users, listings=listings, bookings=bookings, views=views, searches=searches)
+    ListingCounterService.reconcile(generator.listings())
+    SearchIndexService.rebuild(generator.listings())
+
+    active = generator.listings().filter(is_active=True)
+    # первый арендодатель — с наибольшим числом объявлений (Zipf) / der erste Vermieter hat die meisten Anzeigen (Zipf)
+    landlord_id = generator.landlord_ids[0]
+    return BenchmarkWorld(
+        generator=generator,
+        listing_ids=list(active.order_by("id").values_list("id", flat=True)),
+        tenant=f"{generator.prefix}tenant_0",
+        landlord=f"{generator.prefix}landlord_0",
+        landlord_listing_ids=list(active.filter(landlord_id=landlord_id).values_list("id", flat=True)),
+    )
+
+
+def run_scenario(scenario: Scenario, repeat: int, warmup: int, query_samples: int) -> dict:
+    """
+    Латентность операций без учёта запросов, затем отдельный проход с
+    подсчётом SQL (CaptureQueriesContext замедляет курсор).
+
+    Latenz der Operationen ohne Abfragezählung, danach ein eigener Durchlauf
+    mit SQL-Zählung (CaptureQueriesContext verlangsamt den Cursor).
+    """
+    scenario.prepare(warmup + repeat + query_samples)
+    for _ in range(warmup):
+        scenario.op()
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        scenario.op()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(query_samples):
+            scenario.op()
+
+    stats = summarize(samples)
+    requests = repeat * scenario.requests_per_op
+    return {
+        "ops": repeat,
+        "requests": requests,
+        "throughput_rps": round(requests / (sum(samples) / 1000), 1) if samples else 0.0,
+        "p50_ms": round(stats["p50"], 3),
+        "p95_ms": round(stats["p95"], 3),
+        "p99_ms": round(stats["p99"], 3),
+        "queries_per_request": round(len(queries) / max(query_samples * scenario.requests_per_op, 1), 2),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, query_slack: float = 0.5) -> list[str]:
+    """
+    Регрессии относительно baseline: p50/p95 больше чем на tolerance, число
+    запросов на запрос больше чем на query_slack (сбросы буферов по времени
+    дают дробный разброс; N+1 добавляет запрос на строку).
+
+    Regressionen gegenüber der Baseline: p50/p95 um mehr als tolerance höher,
+    Abfragen pro Anfrage um mehr als query_slack höher (zeitgesteuerte Puffer-Flushes
+    streuen um Bruchteile; N+1 fügt eine Abfrage pro Zeile hinzu).
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            limit = base[metric] * (1 + tolerance)
+            if result[metric] > limit:
+                regressions.append(f"{name}: {metric} {result[metric]:.2f} > {limit:.2f} ({base[metric]:.2f} + {tolerance:.0%})")
+        if result["queries_per_request"] > base["queries_per_request"] + query_slack:
+            regressions.append(
+                f"{name}: queries_per_request {result['queries_per_request']} > {base['queries_per_request']}"
+            )
+    return regressions
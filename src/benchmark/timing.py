@@ -0,0 +1,54 @@
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+from django.db import transaction
+
+
+@contextmanager
+def rolled_back(using: str = "default"):
+    """
+    Выполняет блок в транзакции и откатывает её — данные бенчмарка не остаются в БД.
+    Führt den Block in einer Transaktion aus und rollt sie zurück — Benchmark-Daten bleiben nicht in der DB.
+    """
+    with transaction.atomic(using=using):
+        yield
+        transaction.set_rollback(True, using=using)
+
+
+def measure(fn: Callable, repeat: int = 5, warmup: int = 1) -> list[float]:
+    """
+    Вызывает fn repeat раз и возвращает длительности в миллисекундах.
+    Ruft fn repeat-mal auf und gibt die Dauer in Millisekunden zurück.
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Перцентиль методом ближайшего ранга / Perzentil nach der Nearest-Rank-Methode"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples: list[float]) -> dict:
+    """Сводка по замерам (мс) / Zusammenfassung der Messwerte (ms)"""
+    return {
+        "runs": len(samples),
+        "min": min(samples) if samples else 0.0,
+        "mean": sum(samples) / len(samples) if samples else 0.0,
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples) if samples else 0.0,
+    }
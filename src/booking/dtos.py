@@ -1,7 +1,8 @@
-from datetime import timedelta, date
+from datetime import date
 from rest_framework.serializers import ModelSerializer, ValidationError
 
 from src.booking.models import Booking
+from src.booking.services import BookingService, OVERLAP_MESSAGE
 from src.choices import BookingStatus
 
 class BookingBaseDTO(ModelSerializer):
@@ -42,14 +43,9 @@ class BookingCreateDTO(BookingBaseDTO):
             raise ValidationError("End date cannot be earlier than start date.")
 
         # 2. Проверка пересечений с другими активными бронированиями
-        overlapping = Booking.objects.filter(
-            listing=listing,
-            status__in=[BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.CHECKED],
-            start_date__lt=end_date,  # начало раньше конца нового
-            end_date__gt=start_date  # окончание позже начала нового
-        )
-        if overlapping.exists():
-            raise ValidationError("This listing is already booked for the selected dates.")
+        # (быстрый отказ; окончательная проверка — под блокировкой в BookingService)
+        if BookingService.has_overlap(listing.pk, start_date, end_date):
+            raise ValidationError(OVERLAP_MESSAGE)
 
         # Статус всегда pending
         if "status" in attrs and new_status != BookingStatus.PENDING:
@@ -58,13 +54,14 @@ class BookingCreateDTO(BookingBaseDTO):
         return attrs
 
     def create(self, validated_data):
-        # При создании автоматически устанавливаем cancellable_until
-        start_date = validated_data["start_date"]
-        listing = validated_data["listing"]
-        validated_data["cancellable_until"] = start_date - timedelta(days=listing.cancellation_deadline_days)
-        validated_data["status"] = BookingStatus.PENDING
-        validated_data["tenant"] = self.context["request"].user
-        return super().create(validated_data)
+        # Проверка пересечений и вставка — под блокировкой объявления,
+        # cancellable_until и статус pending устанавливает сервис
+        return BookingService.create_booking(
+            tenant=validated_data.get("tenant") or self.context["request"].user,
+            listing=validated_data["listing"],
+            start_date=validated_data["start_date"],
+            end_date=validated_data["end_date"],
+        )
 
 class BookingUpdateDTO(BookingBaseDTO):
     """Unified serializer for updating bookings"""
@@ -0,0 +1,82 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from src.apartments.models import Listing
+from src.benchmark import run_concurrently, seed_users, seed_listings
+from src.booking.models import Booking, ACTIVE_BOOKING_STATUSES
+from src.booking.services import BookingService
+
+PREFIX = "bench_concurrency_"
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress BookingService.create_booking from parallel threads: one hot listing "
+        "vs. many cold listings. Reports throughput and checks that no listing is double booked. "
+        "Threads need committed data, so the seeded rows are deleted afterwards instead of rolled back. "
+        "SQLite allows a single writer, so the cold scenario reports 'database is locked' errors there."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8, help="Parallel threads.")
+        parser.add_argument("--attempts", type=int, default=2000, help="Booking attempts per scenario.")
+        parser.add_argument("--listings", type=int, default=500, help="Listings for the cold scenario.")
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(f"Users with prefix {PREFIX!r} already exist, remove them first.")
+
+        landlord_ids = seed_users(1, prefix=f"{PREFIX}landlord_")
+        tenant_ids = seed_users(options["threads"], prefix=f"{PREFIX}tenant_")
+        try:
+            seed_listings(options["listings"], landlord_ids)
+            listing_ids = list(Listing.objects.filter(landlord_id__in=landlord_ids).values_list("pk", flat=True))
+            rng = random.Random(0)
+            start = date.today() + timedelta(days=30)
+
+            def job(listing_id):
+                return [rng.choice(tenant_ids), listing_id, start + timedelta(days=rng.randint(0, 180)), rng.randint(1, 7)]
+
+            scenarios = {
+                "hot": [job(listing_ids[0]) for _ in range(options["attempts"])],
+                "cold": [job(rng.choice(listing_ids[1:])) for _ in range(options["attempts"])],
+            }
+            for name, jobs in scenarios.items():
+                result = run_concurrently(self.book, jobs, options["threads"], rejected=(ValidationError,))
+                self.stdout.write(
+                    f"{name:<5} threads={options['threads']}  attempts={len(jobs)}  "
+                    f"created={result['ok']}  conflicts={result['rejected']}  errors={len(result['errors'])}  "
+                    f"{len(jobs) / result['seconds']:8.0f} attempts/s"
+                )
+                for error in result["errors"][:3]:
+                    self.stdout.write(self.style.WARNING(f"  {type(error).__name__}: {error}"))
+
+            double_booked = [listing_id for listing_id in listing_ids if self.overlaps(listing_id)]
+            if double_booked:
+                raise CommandError(f"Double bookings on listings {double_booked[:10]}.")
+            self.stdout.write(self.style.SUCCESS("No listing is double booked."))
+        finally:
+            Booking.objects.filter(listing__landlord_id__in=landlord_ids).delete()
+            Listing.objects.filter(landlord_id__in=landlord_ids).delete()
+            User.objects.filter(username__startswith=PREFIX).delete()
+
+    @staticmethod
+    def book(tenant_id: int, listing_id: int, start_date: date, nights: int):
+        BookingService.create_booking(
+            tenant=User(pk=tenant_id),
+            listing=Listing.objects.only("pk", "cancellation_deadline_days").get(pk=listing_id),
+            start_date=start_date,
+            end_date=start_date + timedelta(days=nights),
+        )
+
+    @staticmethod
+    def overlaps(listing_id: int) -> bool:
+        bookings = list(
+            Booking.objects.filter(listing_id=listing_id, status__in=ACTIVE_BOOKING_STATUSES)
+            .order_by("start_date").values_list("start_date", "end_date")
+        )
+        return any(previous_end > next_start for (_, previous_end), (next_start, _) in zip(bookings, bookings[1:]))
@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import QueryDict
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from src.apartments.models import Listing, ACTIVE_LISTINGS
+from src.apartments.views import ListingViewSet
+from src.apartments.views.listing import ListingFilter
+from src.benchmark import measure, summarize, rolled_back, seed_users, seed_listings, seed_bookings
+from src.booking.models import Booking
+
+INDEX_NAME = "booking_overlap_idx"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark GET /listings/?available_from=&available_to= (NOT EXISTS anti-join "
+        "over Booking) on a seeded dataset and check the plan uses booking_overlap_idx."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=10000, help="Listings to seed.")
+        parser.add_argument("--bookings", type=int, default=1000000, help="Bookings to seed, e.g. 5000000.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per date range.")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.stdout.write(f"Seeding {options['listings']} listings and {options['bookings']} bookings...")
+            landlord_ids = seed_users(100, prefix="bench_avail_landlord_")
+            tenant_ids = seed_users(1000, prefix="bench_avail_tenant_")
+            seed_listings(options["listings"], landlord_ids)
+            listing_ids = list(Listing.objects.filter(landlord_id__in=landlord_ids).values_list("pk", flat=True))
+            seed_bookings(options["bookings"], listing_ids, tenant_ids)
+            if connection.vendor in ("sqlite", "postgresql"):
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+
+            # диапазоны: внутри плотно забронированного периода и далеко после него
+            # Bereiche: innerhalb des dicht gebuchten Zeitraums und weit danach
+            last_end = Booking.objects.order_by("-end_date").values_list("end_date", flat=True).first()
+            ranges = [
+                (date(2024, 3, 1), date(2024, 3, 4)),
+                (date(2024, 6, 1), date(2024, 6, 15)),
+                (last_end + timedelta(days=30), last_end + timedelta(days=31)),
+            ]
+
+            view = ListingViewSet.as_view({"get": "list"})
+            factory = APIRequestFactory()
+            for start, end in ranges:
+                params = {"available_from": start.isoformat(), "available_to": end.isoformat()}
+
+                def run():
+                    with override_settings(LISTING_CACHE_TIMEOUT=0):
+                        response = view(factory.get("/api/v1/listings/", params))
+                    assert response.status_code == 200, response.data
+                    return response
+
+                stats = summarize(measure(run, repeat=options["repeat"]))
+                count = run().data["count"]
+                self.stdout.write(
+                    f"{start} .. {end}  free={count:<7} "
+                    f"p50={stats['p50']:9.2f}ms  p95={stats['p95']:9.2f}ms"
+                )
+
+            queryset = ListingFilter(
+                data=QueryDict(mutable=True) | {"available_from": "2024-03-01", "available_to": "2024-03-04"},
+                queryset=Listing.objects.filter(ACTIVE_LISTINGS),
+            ).qs
+            plan = queryset.explain(format="JSON") if connection.vendor == "mysql" else queryset.explain()
+            self.stdout.write(plan)
+            if INDEX_NAME not in plan:
+                raise CommandError(f"The availability anti-join does not use {INDEX_NAME}.")
+            self.stdout.write(self.style.SUCCESS(f"The availability anti-join uses {INDEX_NAME}."))
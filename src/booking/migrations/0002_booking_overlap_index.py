@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['listing', 'status', 'start_date', 'end_date'], name='booking_overlap_idx'),
+        ),
+    ]
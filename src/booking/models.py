@@ -4,6 +4,9 @@ from django.contrib.auth.models import User
 from src.apartments.models import Listing
 from src.choices import BookingStatus
 
+# статусы, которые занимают даты объявления / Status, die die Daten der Anzeige belegen
+ACTIVE_BOOKING_STATUSES = (BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.CHECKED)
+
 
 class Booking(models.Model):
     listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="bookings")
@@ -14,5 +17,12 @@ class Booking(models.Model):
     cancellable_until = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # проверка пересечений: listing = ? AND status IN (...) AND start_date < ? AND end_date > ?
+            # Überschneidungsprüfung: listing = ? AND status IN (...) AND start_date < ? AND end_date > ?
+            models.Index(fields=["listing", "status", "start_date", "end_date"], name="booking_overlap_idx"),
+        ]
+
     def __str__(self):
         return f"{self.tenant.username} -> {self.listing.title} ({self.start_date} to {self.end_date})"
@@ -0,0 +1,191 @@
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import date, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from src.apartments.models import Listing
+from src.booking.models import Booking, ACTIVE_BOOKING_STATUSES
+from src.choices import BookingStatus
+from src.monitoring import timed
+
+# полосы блокировок процесса для БД без SELECT ... FOR UPDATE (SQLite)
+# Sperrstreifen des Prozesses für DBs ohne SELECT ... FOR UPDATE (SQLite)
+_LISTING_LOCKS = [threading.Lock() for _ in range(256)]
+
+OVERLAP_MESSAGE = "This listing is already booked for the selected dates."
+
+
+class BookingService:
+    """Сервис создания бронирований / Service zum Erstellen von Buchungen"""
+
+    @staticmethod
+    def overlapping(listing_id: int, start_date: date, end_date: date) -> QuerySet:
+        """Активные брони, пересекающие [start_date, end_date) (booking_overlap_idx) /
+        Aktive Buchungen, die [start_date, end_date) überschneiden (booking_overlap_idx)"""
+        return Booking.objects.filter(
+            listing_id=listing_id,
+            status__in=ACTIVE_BOOKING_STATUSES,
+            start_date__lt=end_date,  # начало раньше конца нового
+            end_date__gt=start_date,  # окончание позже начала нового
+        )
+
+    @staticmethod
+    @timed("booking_overlap_check")
+    def has_overlap(listing_id: int, start_date: date, end_date: date) -> bool:
+        return BookingService.overlapping(listing_id, start_date, end_date).exists()
+
+    @staticmethod
+    @contextmanager
+    def listing_lock(listing_id: int):
+        """
+        Сериализует бронирования одного объявления: блокировка строки Listing
+        (SELECT ... FOR UPDATE) внутри транзакции, а где её нет (SQLite) —
+        блокировка процесса на всё время транзакции.
+
+        Serialisiert Buchungen einer Anzeige: Sperre der Listing-Zeile
+        (SELECT ... FOR UPDATE) in der Transaktion, wo es sie nicht gibt (SQLite) —
+        eine Prozesssperre für die gesamte Transaktion.
+        """
+        row_lock = connection.features.has_select_for_update
+        process_lock = nullcontext() if row_lock else _LISTING_LOCKS[listing_id % len(_LISTING_LOCKS)]
+        with process_lock, transaction.atomic():
+            if row_lock:
+                list(Listing.objects.select_for_update().filter(pk=listing_id).values_list("pk"))
+            yield
+
+    @staticmethod
+    def create_booking(tenant: User, listing: Listing, start_date: date, end_date: date) -> Booking:
+        """
+        Проверяет пересечения и создаёт бронь в одной короткой транзакции под
+        блокировкой объявления — две параллельные брони на те же даты невозможны.
+
+        Prüft Überschneidungen und legt die Buchung in einer kurzen Transaktion
+        unter der Sperre der Anzeige an — zwei parallele Buchungen derselben Daten sind unmöglich.
+        """
+        with BookingService.listing_lock(listing.pk):
+            if BookingService.has_overlap(listing.pk, start_date, end_date):
+                # тот же формат, что у отказа в BookingCreateDTO.validate
+                # dasselbe Format wie die Ablehnung in BookingCreateDTO.validate
+                raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [OVERLAP_MESSAGE]})
+            return Booking.objects.create(
+                listing=listing,
+                tenant=tenant,
+                start_date=start_date,
+                end_date=end_date,
+                status=BookingStatus.PENDING,
+                cancellable_until=start_date - timedelta(days=listing.cancellation_deadline_days),
+            )
+
+
+def merge_intervals(intervals) -> list[tuple[date, date]]:
+    """
+    Сливает полуоткрытые интервалы [start, end), отсортированные по start:
+    пересекающиеся и смежные (выезд в день заезда следующего) — в один.
+
+    Fügt halboffene, nach start sortierte Intervalle [start, end) zusammen:
+    überlappende und angrenzende (Abreise am Anreisetag des nächsten) — zu einem.
+    """
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class AvailabilityService:
+    """
+    Календарь занятости объявления: слитые интервалы активных бронирований,
+    закэшированные по объявлению. Кэш сбрасывается сигналами Booking
+    после фиксации транзакции.
+
+    Belegungskalender einer Anzeige: zusammengeführte Intervalle aktiver Buchungen,
+    pro Anzeige gecacht. Der Cache wird von Booking-Signalen
+    nach dem Commit der Transaktion geleert.
+    """
+
+    KEY_PREFIX = "booking:availability"
+
+    @staticmethod
+    def timeout() -> int:
+        return getattr(settings, "LISTING_AVAILABILITY_CACHE_TIMEOUT", 3600)
+
+    @staticmethod
+    def cache_key(listing_id: int) -> str:
+        return f"{AvailabilityService.KEY_PREFIX}:{listing_id}"
+
+    @staticmethod
+    def intervals(listing_id: int, date_from: date, date_to: Optional[date] = None) -> list[tuple[date, date]]:
+        """
+        Слитые интервалы активных бронирований, заканчивающихся после date_from
+        (и начинающихся до date_to) — прошлое объявления не читается.
+
+        Zusammengeführte Intervalle aktiver Buchungen, die nach date_from enden
+        (und vor date_to beginnen) — die Vergangenheit der Anzeige wird nicht gelesen.
+        """
+        # покрывается booking_overlap_idx (listing, status, start_date, end_date)
+        # abgedeckt durch booking_overlap_idx (listing, status, start_date, end_date)
+        bookings = Booking.objects.filter(
+            listing_id=listing_id, status__in=ACTIVE_BOOKING_STATUSES, end_date__gt=date_from,
+        )
+        if date_to is not None:
+            bookings = bookings.filter(start_date__lt=date_to)
+        return merge_intervals(bookings.order_by("start_date").values_list("start_date", "end_date"))
+
+    @staticmethod
+    def occupied(listing_id: int) -> list[tuple[date, date]]:
+        """
+        Слитые занятые интервалы объявления от сегодняшнего дня — одна запись кэша
+        на объявление, любой будущий диапазон from/to вырезается из неё без обращения к Booking.
+
+        Zusammengeführte belegte Intervalle der Anzeige ab heute — ein Cache-Eintrag
+        pro Anzeige, jeder künftige Bereich from/to wird daraus ohne Zugriff auf Booking geschnitten.
+        """
+        timeout = AvailabilityService.timeout()
+        key = AvailabilityService.cache_key(listing_id)
+        if timeout > 0:
+            intervals = cache.get(key)
+            if intervals is not None:
+                return intervals
+
+        intervals = AvailabilityService.intervals(listing_id, date.today())
+        if timeout > 0:
+            cache.set(key, intervals, timeout=timeout)
+        return intervals
+
+    @staticmethod
+    def calendar(listing_id: int, date_from: date, date_to: date) -> dict:
+        """
+        Занятые интервалы внутри [date_from, date_to), обрезанные по границам.
+        Диапазон в прошлом читается из Booking без кэша.
+
+        Belegte Intervalle innerhalb [date_from, date_to), an den Grenzen beschnitten.
+        Ein Bereich in der Vergangenheit wird ohne Cache aus Booking gelesen.
+        """
+        if date_from < date.today():
+            intervals = AvailabilityService.intervals(listing_id, date_from, date_to)
+        else:
+            intervals = AvailabilityService.occupied(listing_id)
+        occupied = [
+            {"start": max(start, date_from), "end": min(end, date_to)}
+            for start, end in intervals
+            if start < date_to and end > date_from
+        ]
+        return {"listing": listing_id, "from": date_from, "to": date_to, "occupied": occupied}
+
+    @staticmethod
+    def invalidate(listing_id: Optional[int]) -> None:
+        """Сбрасывает календарь объявления после фиксации текущей транзакции /
+        Leert den Kalender der Anzeige nach dem Commit der aktuellen Transaktion"""
+        if listing_id is not None:
+            transaction.on_commit(lambda: cache.delete(AvailabilityService.cache_key(listing_id)))
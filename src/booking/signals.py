@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from src.apartments.services import ListingCacheService
+from src.booking.models import Booking
+from src.booking.services import AvailabilityService
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_listing_cache(sender, instance, **kwargs):
+    """Сбрасываем кэш ответов с фильтром available_from/available_to (остальные от бронирований
+    не зависят) и календарь занятости объявления (создание, смена статуса, удаление)"""
+    ListingCacheService.invalidate_availability()
+    AvailabilityService.invalidate(instance.listing_id)
@@ -1,3 +1,229 @@
-from django.test import TestCase
+import random
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from rest_framework.exceptions import ValidationError
+
+from src.apartments.models import Listing
+from src.benchmark import QueryBudgetTestCase, run_concurrently
+from src.booking.models import Booking, ACTIVE_BOOKING_STATUSES
+from src.booking.services import AvailabilityService, BookingService, merge_intervals
+from src.choices import BookingStatus, UserRole
+
+
+class BookingConcurrencyTests(TransactionTestCase):
+    """
+    Стресс-тест: параллельные брони одного объявления (hot) и разных (cold)
+    не дают пересекающихся активных бронирований.
+
+    Stresstest: parallele Buchungen einer Anzeige (hot) und verschiedener (cold)
+    ergeben keine überlappenden aktiven Buchungen.
+    """
+
+    THREADS = 8
+    START = date(2030, 1, 1)
+
+    def setUp(self):
+        self.landlord = User.objects.create_user("stress_landlord", password="x")
+        self.tenants = [User.objects.create_user(f"stress_tenant_{i}", password="x") for i in range(self.THREADS)]
+        self.listings = [
+            Listing.objects.create(
+                landlord=self.landlord, title=f"Stress {i}", description="", location="Berlin",
+                price=100, rooms=2, housing_type="apartment",
+            )
+            for i in range(self.THREADS)
+        ]
+
+    def book(self, tenant_id: int, listing_id: int, start_date: date, nights: int):
+        # новые объекты в потоке — без общего состояния между потоками
+        # neue Objekte im Thread — ohne gemeinsamen Zustand zwischen Threads
+        BookingService.create_booking(
+            tenant=User.objects.get(pk=tenant_id),
+            listing=Listing.objects.get(pk=listing_id),
+            start_date=start_date,
+            end_date=start_date + timedelta(days=nights),
+        )
+
+    def assertNoOverlaps(self, listing_id: int):
+        bookings = list(
+            Booking.objects.filter(listing_id=listing_id, status__in=ACTIVE_BOOKING_STATUSES)
+            .order_by("start_date").values_list("start_date", "end_date")
+        )
+        for (_, previous_end), (next_start, _) in zip(bookings, bookings[1:]):
+            self.assertLessEqual(previous_end, next_start, "double booking")
+        return len(bookings)
+
+    def test_same_dates_only_one_wins(self):
+        listing = self.listings[0]
+        jobs = [[tenant.pk, listing.pk, self.START, 3] for tenant in self.tenants]
+
+        result = run_concurrently(self.book, jobs, self.THREADS, rejected=(ValidationError,))
+
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(result["ok"], 1)
+        self.assertEqual(result["rejected"], self.THREADS - 1)
+        self.assertEqual(self.assertNoOverlaps(listing.pk), 1)
+
+    def test_hot_listing_stress_keeps_bookings_disjoint(self):
+        listing = self.listings[0]
+        rng = random.Random(0)
+        jobs = [
+            [rng.choice(self.tenants).pk, listing.pk, self.START + timedelta(days=rng.randint(0, 60)), rng.randint(1, 7)]
+            for _ in range(self.THREADS * 25)
+        ]
+
+        result = run_concurrently(self.book, jobs, self.THREADS, rejected=(ValidationError,))
+
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(result["ok"] + result["rejected"], len(jobs))
+        self.assertGreater(result["rejected"], 0)
+        self.assertEqual(self.assertNoOverlaps(listing.pk), result["ok"])
+
+    # параллельные записи в разные строки SQLite не поддерживает (database table is locked)
+    # parallele Schreibzugriffe auf verschiedene Zeilen unterstützt SQLite nicht (database table is locked)
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_cold_listings_do_not_block_each_other(self):
+        # у каждого потока своё объявление, даты не пересекаются — всё создаётся
+        # jeder Thread hat eine eigene Anzeige, Daten überlappen nicht — alles wird angelegt
+        jobs = [
+            [self.tenants[i % self.THREADS].pk, self.listings[i % self.THREADS].pk,
+             self.START + timedelta(days=2 * (i // self.THREADS)), 2]
+            for i in range(self.THREADS * 25)
+        ]
+
+        result = run_concurrently(self.book, jobs, self.THREADS, rejected=(ValidationError,))
+
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(result["ok"], len(jobs))
+        for listing in self.listings:
+            self.assertNoOverlaps(listing.pk)
+
+
+class BookingQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Бюджеты запросов /bookings/: список не делает запросов на строку.
+    Abfragebudgets von /bookings/: die Liste macht keine Abfragen pro Zeile.
+    """
+
+    START = date(2030, 1, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = cls.make_user("budget_landlord", UserRole.LANDLORD)
+        cls.tenant = cls.make_user("budget_tenant", UserRole.TENANT)
+        cls.listing = Listing.objects.create(
+            landlord=cls.landlord, title="Budget", description="", location="Berlin",
+            price=100, rooms=2, housing_type="apartment",
+        )
+        cls.booking = cls.add_bookings(1)[0]
+
+    @classmethod
+    def add_bookings(cls, amount: int) -> list[Booking]:
+        first = Booking.objects.count()
+        return Booking.objects.bulk_create(
+            Booking(
+                listing=cls.listing, tenant=cls.tenant,
+                start_date=cls.START + timedelta(days=3 * i), end_date=cls.START + timedelta(days=3 * i + 2),
+                status=BookingStatus.PENDING, cancellable_until=cls.START,
+            )
+            for i in range(first, first + amount)
+        )
+
+    def test_list(self):
+        client = self.client_for(self.tenant)
+        # эпоха токена, COUNT, страница / Token-Epoche, COUNT, Seite
+        self.assertBudget(3, lambda: client.get("/api/v1/bookings/"), grow=lambda: self.add_bookings(15))
+
+    def test_list_landlord(self):
+        client = self.client_for(self.landlord)
+        self.assertBudget(3, lambda: client.get("/api/v1/bookings/"), grow=lambda: self.add_bookings(15))
+
+    def test_retrieve(self):
+        client = self.client_for(self.tenant)
+        self.assertBudget(3, lambda: client.get(f"/api/v1/bookings/{self.booking.pk}/"))
+
+    def test_create(self):
+        client = self.client_for(self.tenant)
+        payload = {"listing": self.listing.pk, "start_date": "2031-01-01", "end_date": "2031-01-03"}
+        self.assertBudget(7, lambda: client.post("/api/v1/bookings/", payload, format="json"), status=201)
+
+    def test_confirm(self):
+        client = self.client_for(self.landlord)
+        self.assertBudget(
+            5, lambda: client.patch(f"/api/v1/bookings/{self.booking.pk}/", {"status": "confirmed"}, format="json")
+        )
+
+    def test_destroy(self):
+        client = self.client_for(self.tenant)
+        self.assertBudget(4, lambda: client.delete(f"/api/v1/bookings/{self.booking.pk}/"), status=204)
+
+
+class MergeIntervalsTests(SimpleTestCase):
+    """Слияние полуоткрытых интервалов / Zusammenführen halboffener Intervalle"""
+
+    def test_overlapping_and_adjacent_are_merged(self):
+        d = lambda day: date(2031, 1, day)
+        intervals = [(d(1), d(5)), (d(3), d(4)), (d(5), d(7)), (d(6), d(9)), (d(10), d(12))]
+        self.assertEqual(merge_intervals(intervals), [(d(1), d(9)), (d(10), d(12))])
+
+    def test_empty_and_single(self):
+        self.assertEqual(merge_intervals([]), [])
+        self.assertEqual(merge_intervals([(date(2031, 1, 1), date(2031, 1, 2))]), [(date(2031, 1, 1), date(2031, 1, 2))])
+
+
+@override_settings(LISTING_AVAILABILITY_CACHE_TIMEOUT=3600)
+class AvailabilityServiceTests(TestCase):
+    """Календарь занятости: обрезка по окну и только текущие брони в кэше /
+    Belegungskalender: Beschnitt auf das Fenster und nur aktuelle Buchungen im Cache"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date.today()
+        landlord = User.objects.create_user("calendar_landlord", password="x")
+        cls.tenant = User.objects.create_user("calendar_tenant", password="x")
+        cls.listing = Listing.objects.create(
+            landlord=landlord, title="Calendar", description="", location="Berlin",
+            price=100, rooms=2, housing_type="apartment",
+        )
+        cls.book(-30, -20)
+        cls.book(2, 5)
+        cls.book(5, 8)
+        cls.book(20, 25)
+        cls.book(10, 15, BookingStatus.CANCELLED)
+
+    @classmethod
+    def book(cls, start: int, end: int, status=BookingStatus.CONFIRMED):
+        Booking.objects.create(
+            listing=cls.listing, tenant=cls.tenant, status=status, cancellable_until=cls.today,
+            start_date=cls.today + timedelta(days=start), end_date=cls.today + timedelta(days=end),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def day(self, offset: int) -> date:
+        return self.today + timedelta(days=offset)
+
+    def occupied(self, date_from: int, date_to: int):
+        calendar = AvailabilityService.calendar(self.listing.pk, self.day(date_from), self.day(date_to))
+        return [(interval["start"], interval["end"]) for interval in calendar["occupied"]]
+
+    def test_cached_intervals_skip_past_bookings(self):
+        self.assertEqual(AvailabilityService.occupied(self.listing.pk), [(self.day(2), self.day(8)), (self.day(20), self.day(25))])
+
+    def test_intervals_are_clipped_to_window(self):
+        self.assertEqual(self.occupied(0, 31), [(self.day(2), self.day(8)), (self.day(20), self.day(25))])
+        self.assertEqual(self.occupied(4, 22), [(self.day(4), self.day(8)), (self.day(20), self.day(22))])
+        # выезд в первый день окна его не занимает / Abreise am ersten Tag belegt das Fenster nicht
+        self.assertEqual(self.occupied(8, 20), [])
+
+    def test_future_window_is_served_from_cache(self):
+        self.occupied(0, 31)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.occupied(6, 21), [(self.day(6), self.day(8)), (self.day(20), self.day(21))])
+
+    def test_past_window_reads_bookings(self):
+        self.assertEqual(self.occupied(-25, 3), [(self.day(-25), self.day(-20)), (self.day(2), self.day(3))])
@@ -1,14 +1,14 @@
-from datetime import timedelta
-
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import ModelViewSet
 
 from src.booking.models import Booking
 from src.booking.dtos import BookingBaseDTO, BookingCreateDTO, BookingUpdateDTO
 from src.permissions import IsTenantOrLandlordOrAdmin
+from src.throttling import BookingCreateThrottle, ThrottleFirstMixin
 
 
-class BookingViewSet(ModelViewSet):
+class BookingViewSet(ThrottleFirstMixin, ModelViewSet):
     """
     ViewSet для управления бронированиями.
     Позволяет создавать, просматривать, обновлять и отменять бронирования.
@@ -28,6 +28,7 @@ class BookingViewSet(ModelViewSet):
     """
     queryset = Booking.objects.all()
     permission_classes = [IsAuthenticated, IsTenantOrLandlordOrAdmin]
+    throttle_classes = [*api_settings.DEFAULT_THROTTLE_CLASSES, BookingCreateThrottle]
 
     def get_serializer_class(self):
         """
@@ -49,21 +50,15 @@ class BookingViewSet(ModelViewSet):
 
     def perform_create(self, serializer):
         """
-        Создает новое бронирование.
-        Устанавливает арендатора и рассчитывает дату, до которой можно отменить бронирование.
+        Создает новое бронирование через BookingService: проверка пересечений
+        и вставка выполняются под блокировкой объявления, сервис также
+        рассчитывает дату, до которой можно отменить бронирование.
         
-        Erstellt eine neue Buchung.
-        Setzt den Mieter und berechnet das Datum, bis zu dem die Stornierung möglich ist.
+        Erstellt eine neue Buchung über BookingService: Überschneidungsprüfung
+        und Einfügen laufen unter der Sperre der Anzeige, der Service berechnet
+        auch das Datum, bis zu dem die Stornierung möglich ist.
         """
-        listing = serializer.validated_data["listing"]
-        start_date = serializer.validated_data["start_date"]
-        # вычисляем дату, до которой можно отменить
-        cancellable_until = start_date - timedelta(days=listing.cancellation_deadline_days)
-
-        serializer.save(
-            tenant=self.request.user,
-            cancellable_until=cancellable_until
-        )
+        serializer.save(tenant=self.request.user)
 
     def get_queryset(self):
         """
@@ -1,7 +1,8 @@
-from src.choices.base import UserRole, HousingType, BookingStatus
+from src.choices.base import UserRole, HousingType, BookingStatus, ViewBucketGranularity
 
 __all__ = [
     'UserRole',
     'HousingType',
-    'BookingStatus'
+    'BookingStatus',
+    'ViewBucketGranularity'
 ]
\ No newline at end of file
@@ -17,3 +17,7 @@ class BookingStatus(models.TextChoices):
     REJECTED = "rejected",      "Abgelehnt"  # Vom Vermieter abgelehnt
     CANCELLED = "cancelled",    "Storniert"  # Vom Mieter storniert
     CHECKED = "checked",        "Abgeschlossen"  # Aufenthalt beendet, bestätigt
+
+class ViewBucketGranularity(models.TextChoices):
+    HOUR = "hour", "Stunde"  # Stündlicher Bucket (Час)
+    DAY = "day",   "Tag"  # Täglicher Bucket (День)
@@ -0,0 +1,7 @@
+from src.monitoring.metrics import registry, timed, should_sample
+
+__all__ = [
+    'registry',
+    'timed',
+    'should_sample'
+]
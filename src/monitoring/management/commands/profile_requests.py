@@ -0,0 +1,46 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from src.monitoring.profiler import get_profile_buffer
+
+
+class Command(BaseCommand):
+    help = (
+        "Send GET requests through the full middleware stack with the SQL profiler enabled "
+        "and dump the flagged queries (slow statements and N+1 shapes, with EXPLAIN and call "
+        "site) to a JSON file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Paths to request, e.g. /api/v1/listings/1/")
+        parser.add_argument("--output", default="query_profile.json", help="JSON file to write.")
+        parser.add_argument("--user", help="Username to log in as (session authentication).")
+        parser.add_argument("--slow-ms", type=float, help="Override PROFILER_SLOW_QUERY_MS.")
+        parser.add_argument("--repeat-threshold", type=int, help="Override PROFILER_REPEAT_THRESHOLD.")
+
+    def handle(self, *args, **options):
+        overrides = {"PROFILER_ENABLED": True, "THROTTLE_ENABLED": False, "ALLOWED_HOSTS": ["*"]}
+        if options["slow_ms"] is not None:
+            overrides["PROFILER_SLOW_QUERY_MS"] = options["slow_ms"]
+        if options["repeat_threshold"] is not None:
+            overrides["PROFILER_REPEAT_THRESHOLD"] = options["repeat_threshold"]
+
+        client = Client()
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"User {options['user']!r} does not exist.")
+            client.force_login(user)
+
+        buffer = get_profile_buffer()
+        buffer.clear()
+        with override_settings(**overrides):
+            for path in options["paths"]:
+                response = client.get(path)
+                self.stdout.write(f"{response.status_code} {path}")
+
+        for entry in buffer.entries():
+            self.stdout.write(f"[{entry['kind']}] x{entry['count']} {entry['call_site']}\n  {entry['sql'][:200]}")
+        written = buffer.dump(options["output"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} flagged queries to {options['output']}."))
@@ -0,0 +1,176 @@
+import bisect
+import random
+import threading
+import time
+from functools import wraps
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+_sample_rate: Optional[float] = None
+
+
+def sample_rate() -> float:
+    """METRICS_SAMPLE_RATE, прочитанный один раз / METRICS_SAMPLE_RATE, einmal gelesen"""
+    global _sample_rate
+    if _sample_rate is None:
+        _sample_rate = min(max(float(getattr(settings, "METRICS_SAMPLE_RATE", 1.0)), 0.0), 1.0)
+    return _sample_rate
+
+
+@receiver(setting_changed)
+def reset_sample_rate(setting, **kwargs):
+    global _sample_rate
+    if setting == "METRICS_SAMPLE_RATE":
+        _sample_rate = None
+
+
+def should_sample() -> bool:
+    rate = sample_rate()
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Counter:
+    """Счётчик по набору меток / Zähler pro Label-Satz"""
+
+    type = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(labels)} {value:g}"
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами (le) по набору меток.
+    Histogramm mit festen Grenzen (le) pro Label-Satz.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        # метки -> [счётчики корзин..., +Inf, сумма] / Labels -> [Bucket-Zähler..., +Inf, Summe]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(counts) for key, counts in self._values.items()}
+        for labels, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                yield f"{self.name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {counts[-1]:.6f}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """
+    Метрики процесса в текстовом формате Prometheus; каждый воркер
+    отдаёт свои значения (метка instance у скрейпера).
+
+    Metriken des Prozesses im Prometheus-Textformat; jeder Worker
+    liefert seine eigenen Werte (Label instance beim Scraper).
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.register(Counter(
+    "easyrent_http_requests_total", "HTTP requests by route, method and status class."
+))
+REQUEST_LATENCY = registry.register(Histogram(
+    "easyrent_http_request_duration_seconds", "Request latency by route and method."
+))
+REQUEST_QUERIES = registry.register(Histogram(
+    "easyrent_http_request_queries", "SQL queries per request by route and method.", QUERY_BUCKETS
+))
+REQUEST_DB_TIME = registry.register(Histogram(
+    "easyrent_http_request_db_seconds", "Total SQL time per request by route and method."
+))
+OPERATION_LATENCY = registry.register(Histogram(
+    "easyrent_operation_duration_seconds", "Latency of instrumented service operations."
+))
+
+
+def timed(operation: str) -> Callable:
+    """
+    Декоратор: время вызова в easyrent_operation_duration_seconds{operation}.
+    При METRICS_SAMPLE_RATE=0 — одна проверка числа.
+
+    Dekorator: Aufrufdauer in easyrent_operation_duration_seconds{operation}.
+    Bei METRICS_SAMPLE_RATE=0 — eine einzige Zahlenprüfung.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not should_sample():
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                OPERATION_LATENCY.observe(time.perf_counter() - started, operation=operation)
+
+        return wrapper
+
+    return decorator
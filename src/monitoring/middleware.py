@@ -0,0 +1,61 @@
+import time
+from typing import Callable
+
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+
+from src.monitoring.metrics import (
+    REQUESTS,
+    REQUEST_LATENCY,
+    REQUEST_QUERIES,
+    REQUEST_DB_TIME,
+    sample_rate,
+    should_sample,
+)
+
+
+class QueryStats:
+    """execute_wrapper: число запросов и время в БД / Anzahl der Abfragen und DB-Zeit"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """
+    Латентность, число SQL-запросов и время в БД по маршруту и методу.
+    Маршрут — шаблон URL (resolver_match.route), а не путь, чтобы метки не росли.
+
+    Latenz, Anzahl der SQL-Abfragen und DB-Zeit pro Route und Methode.
+    Die Route ist das URL-Muster (resolver_match.route), nicht der Pfad, damit die Labels nicht wachsen.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if sample_rate() <= 0.0 or not should_sample():
+            return self.get_response(request)
+
+        stats = QueryStats()
+        started = time.perf_counter()
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        labels = {"route": match.route if match else "unmatched", "method": request.method}
+        REQUESTS.inc(status=f"{response.status_code // 100}xx", **labels)
+        REQUEST_LATENCY.observe(elapsed, **labels)
+        REQUEST_QUERIES.observe(stats.count, **labels)
+        REQUEST_DB_TIME.observe(stats.seconds, **labels)
+        return response
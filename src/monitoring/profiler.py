@@ -0,0 +1,184 @@
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SRC_DIR = str(Path(__file__).resolve().parent.parent)
+MONITORING_DIR = str(Path(__file__).resolve().parent)
+
+# IN (%s, %s, ...) любой длины — одна форма запроса
+# IN (%s, %s, ...) beliebiger Länge — eine Abfrageform
+IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+NUMBER = re.compile(r"\b\d+\b")
+
+
+def query_shape(sql: str) -> str:
+    """Форма запроса без значений / Abfrageform ohne Werte"""
+    return NUMBER.sub("?", IN_LIST.sub("IN (...)", sql))
+
+
+def call_site() -> str:
+    """
+    Ближайший к запросу кадр кода проекта (src/, кроме monitoring).
+    Der der Abfrage nächste Frame des Projektcodes (src/, außer monitoring).
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(SRC_DIR) and not filename.startswith(MONITORING_DIR):
+            return f"{filename[len(SRC_DIR) - 3:]}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def explain(sql: str, params) -> str:
+    """EXPLAIN для SELECT, иначе пусто / EXPLAIN für SELECT, sonst leer"""
+    if not sql.lstrip().upper().startswith("SELECT"):
+        return ""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return "\n".join(" | ".join(str(value) for value in row) for row in cursor.fetchall())
+    except Exception as exc:
+        return f"EXPLAIN failed: {exc}"
+
+
+class QueryProfileBuffer:
+    """
+    Кольцевой буфер отмеченных запросов процесса (медленные и N+1).
+    Ringpuffer der markierten Abfragen des Prozesses (langsame und N+1).
+    """
+
+    def __init__(self, size: int):
+        self._entries: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, entry: dict) -> None:
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self, kind: Optional[str] = None) -> list[dict]:
+        with self._lock:
+            entries = list(self._entries)
+        return [entry for entry in entries if kind is None or entry["kind"] == kind]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def dump(self, path: str) -> int:
+        entries = self.entries()
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(entries, file, ensure_ascii=False, indent=2)
+        return len(entries)
+
+
+_buffer: Optional[QueryProfileBuffer] = None
+
+
+def get_profile_buffer() -> QueryProfileBuffer:
+    global _buffer
+    if _buffer is None:
+        _buffer = QueryProfileBuffer(getattr(settings, "PROFILER_BUFFER_SIZE", 200))
+    return _buffer
+
+
+class RequestQueryProfiler:
+    """
+    execute_wrapper на время запроса: запоминает формы запросов, их число,
+    самое долгое выполнение и место вызова; EXPLAIN — после ответа.
+
+    execute_wrapper für die Dauer der Anfrage: merkt sich Abfrageformen, deren Anzahl,
+    die längste Ausführung und die Aufrufstelle; EXPLAIN erst nach der Antwort.
+    """
+
+    def __init__(self, slow_ms: float, repeat_threshold: int):
+        self.slow_ms = slow_ms
+        self.repeat_threshold = repeat_threshold
+        self.shapes: dict[str, dict] = {}
+        self.slow: list[dict] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            shape = query_shape(sql)
+            seen = self.shapes.get(shape)
+            if seen is None:
+                seen = self.shapes[shape] = {"sql": sql, "params": params, "count": 0, "call_site": call_site()}
+            seen["count"] += 1
+            if duration_ms >= self.slow_ms:
+                self.slow.append({"sql": sql, "params": params, "duration_ms": duration_ms, "call_site": call_site()})
+
+    def flagged(self) -> list[dict]:
+        """Медленные запросы и повторяющиеся формы (N+1) / Langsame Abfragen und wiederholte Formen (N+1)"""
+        flagged = [{"kind": "slow", "count": 1, **query} for query in self.slow]
+        flagged += [
+            {"kind": "n_plus_one", "duration_ms": None, **seen}
+            for seen in self.shapes.values()
+            if seen["count"] > self.repeat_threshold
+        ]
+        return flagged
+
+    def record(self, request) -> int:
+        flagged = self.flagged()
+        buffer = get_profile_buffer()
+        for query in flagged:
+            buffer.add({
+                "kind": query["kind"],
+                "recorded_at": timezone.now().isoformat(),
+                "method": request.method,
+                "path": request.get_full_path(),
+                "sql": query["sql"],
+                "count": query["count"],
+                "duration_ms": query["duration_ms"],
+                "call_site": query["call_site"],
+                "explain": explain(query["sql"], query["params"]),
+            })
+            logger.warning("%s query (%sx) at %s: %s", query["kind"], query["count"], query["call_site"], query["sql"])
+        return len(flagged)
+
+
+class QueryProfilerMiddleware:
+    """
+    Отмечает в запросе SQL дольше PROFILER_SLOW_QUERY_MS и формы запросов,
+    повторённые больше PROFILER_REPEAT_THRESHOLD раз (N+1). Выключен, пока
+    PROFILER_ENABLED не задан.
+
+    Markiert in der Anfrage SQL länger als PROFILER_SLOW_QUERY_MS und Abfrageformen,
+    die öfter als PROFILER_REPEAT_THRESHOLD wiederholt werden (N+1). Ausgeschaltet,
+    solange PROFILER_ENABLED nicht gesetzt ist.
+
+    Стоит перед MetricsMiddleware: синхронный EXPLAIN после ответа не входит
+    в латентность и число запросов маршрута / Steht vor MetricsMiddleware: das
+    synchrone EXPLAIN nach der Antwort zählt nicht zu Latenz und Abfragezahl der Route.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "PROFILER_ENABLED", False):
+            return self.get_response(request)
+
+        profiler = RequestQueryProfiler(
+            slow_ms=getattr(settings, "PROFILER_SLOW_QUERY_MS", 100.0),
+            repeat_threshold=getattr(settings, "PROFILER_REPEAT_THRESHOLD", 5),
+        )
+        with connection.execute_wrapper(profiler):
+            response = self.get_response(request)
+        profiler.record(request)
+        return response
@@ -0,0 +1,185 @@
+import json
+import tempfile
+from datetime import date
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+
+from src.apartments.models import Listing
+from src.benchmark import QueryBudgetTestCase
+from src.booking.services import AvailabilityService
+from src.choices import UserRole
+from src.monitoring.profiler import RequestQueryProfiler, get_profile_buffer, query_shape
+
+DETAIL_ROUTE = "api/v1/listings/(?P<pk>[^/.]+)/$"
+
+
+def scrape(client) -> dict[str, float]:
+    """Серии /metrics/ → значение / Serien von /metrics/ → Wert"""
+    samples = {}
+    for line in client.get("/api/v1/metrics/").content.decode().splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def sample(samples: dict, name: str, **labels) -> float:
+    # метки по алфавиту, le — последней / Labels alphabetisch, le zuletzt
+    labels = {"method": "GET", "route": DETAIL_ROUTE, **labels}
+    rendered = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    return samples.get(f"{name}{{{rendered}}}", 0)
+
+
+class MetricsTests(QueryBudgetTestCase):
+    """
+    /metrics/ отдаёт счётчик и гистограммы запросов с меткой маршрута, а не пути.
+    /metrics/ liefert Zähler und Histogramme der Anfragen mit dem Routen-Label statt des Pfads.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = cls.make_user("metrics_admin", is_staff=True)
+        cls.listing = Listing.objects.create(
+            landlord=cls.make_user("metrics_landlord", UserRole.LANDLORD), title="Metrics", description="",
+            location="Berlin", price=100, rooms=2, housing_type="apartment",
+        )
+
+    def scrape(self) -> dict[str, float]:
+        return scrape(self.client_for(self.admin))
+
+    def test_request_is_counted_by_route(self):
+        before = self.scrape()
+        for _ in range(2):
+            self.assertEqual(self.client_for().get(f"/api/v1/listings/{self.listing.pk}/").status_code, 200)
+        after = self.scrape()
+
+        requests = "easyrent_http_requests_total"
+        self.assertEqual(sample(after, requests, status="2xx") - sample(before, requests, status="2xx"), 2)
+        for histogram in ("easyrent_http_request_duration_seconds", "easyrent_http_request_queries"):
+            with self.subTest(histogram=histogram):
+                count = sample(after, f"{histogram}_count") - sample(before, f"{histogram}_count")
+                self.assertEqual(count, 2)
+                self.assertEqual(sample(after, f"{histogram}_bucket", le="+Inf"), sample(after, f"{histogram}_count"))
+        # ни одной серии с сырым путём / keine Serie mit dem rohen Pfad
+        self.assertFalse([name for name in after if f"/listings/{self.listing.pk}/" in name])
+
+    def test_unknown_path_is_unmatched(self):
+        self.client_for().get("/api/v1/no-such-route/12345/")
+        samples = self.scrape()
+        self.assertGreater(sample(samples, "easyrent_http_requests_total", route="unmatched", status="4xx"), 0)
+        self.assertFalse([name for name in samples if "no-such-route" in name])
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_zero_sample_rate_records_nothing(self):
+        before = self.scrape()
+        self.client_for().get(f"/api/v1/listings/{self.listing.pk}/")
+        self.assertEqual(self.scrape(), before)
+
+    def test_metrics_are_admin_only(self):
+        response = self.client_for(self.admin).get("/api/v1/metrics/")
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        self.assertEqual(self.client_for().get("/api/v1/metrics/").status_code, 403)
+
+
+class QueryShapeTests(SimpleTestCase):
+    """Форма запроса без значений / Abfrageform ohne Werte"""
+
+    def test_numbers_and_in_lists_are_normalized(self):
+        self.assertEqual(
+            query_shape('SELECT "a"."id" FROM "a" WHERE "a"."id" IN (%s, %s, %s) AND "a"."n" > 10 LIMIT 21'),
+            'SELECT "a"."id" FROM "a" WHERE "a"."id" IN (...) AND "a"."n" > ? LIMIT ?',
+        )
+        self.assertEqual(query_shape("SELECT 1 WHERE x IN (%s)"), query_shape("SELECT 2 WHERE x IN (%s, %s)"))
+        # цифры внутри имён не трогаются / Ziffern in Namen bleiben erhalten
+        self.assertEqual(query_shape('SELECT "t2"."col1" FROM "t2"'), 'SELECT "t2"."col1" FROM "t2"')
+
+
+@override_settings(PROFILER_REPEAT_THRESHOLD=2, PROFILER_SLOW_QUERY_MS=10 ** 6)
+class QueryProfilerTests(QueryBudgetTestCase):
+    """N+1, буфер и его выгрузка / N+1, Puffer und dessen Export"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = cls.make_user("profiler_admin", is_staff=True)
+        landlord = cls.make_user("profiler_landlord", UserRole.LANDLORD)
+        cls.listings = [
+            Listing.objects.create(
+                landlord=landlord, title=f"Profiled {i}", description="", location="Berlin",
+                price=100, rooms=2, housing_type="apartment",
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        get_profile_buffer().clear()
+        self.addCleanup(get_profile_buffer().clear)
+
+    def test_repeated_shape_is_flagged_with_call_site(self):
+        profiler = RequestQueryProfiler(slow_ms=10 ** 6, repeat_threshold=2)
+        with connection.execute_wrapper(profiler):
+            for listing in self.listings:
+                AvailabilityService.intervals(listing.pk, date(2031, 1, 1))
+            Listing.objects.count()
+
+        flagged = profiler.flagged()
+        self.assertEqual([(query["kind"], query["count"]) for query in flagged], [("n_plus_one", 3)])
+        self.assertRegex(flagged[0]["call_site"], r"^src/booking/services\.py:\d+ in merge_intervals$")
+
+    def test_slow_query_is_flagged(self):
+        profiler = RequestQueryProfiler(slow_ms=0, repeat_threshold=2)
+        with connection.execute_wrapper(profiler):
+            Listing.objects.count()
+        self.assertEqual([query["kind"] for query in profiler.flagged()], ["slow"])
+
+    @override_settings(PROFILER_ENABLED=True, PROFILER_REPEAT_THRESHOLD=0)
+    def test_middleware_records_explain_and_endpoint_lists_entries(self):
+        with self.assertLogs("src.monitoring.profiler", "WARNING"):
+            self.client_for().get(f"/api/v1/listings/{self.listings[0].pk}/")
+
+        entries = get_profile_buffer().entries("n_plus_one")
+        self.assertTrue(entries)
+        select = next(entry for entry in entries if entry["sql"].startswith("SELECT"))
+        self.assertEqual(select["path"], f"/api/v1/listings/{self.listings[0].pk}/")
+        self.assertTrue(select["explain"])
+        self.assertNotIn("EXPLAIN failed", select["explain"])
+
+        response = self.client_for(self.admin).get("/api/v1/metrics/queries/", {"kind": "slow"})
+        self.assertEqual(response.data["count"], 0)
+
+    @override_settings(PROFILER_REPEAT_THRESHOLD=0)
+    def test_explain_is_not_counted_in_request_metrics(self):
+        path = f"/api/v1/listings/{self.listings[0].pk}/"
+        def observed_queries():
+            return sample(scrape(self.client_for(self.admin)), "easyrent_http_request_queries_sum")
+
+        before = observed_queries()
+        self.client_for().get(path)
+        without_profiler = observed_queries() - before
+
+        with override_settings(PROFILER_ENABLED=True), self.assertLogs("src.monitoring.profiler", "WARNING"):
+            before = observed_queries()
+            self.client_for().get(path)
+            with_profiler = observed_queries() - before
+
+        self.assertTrue(get_profile_buffer().entries())
+        self.assertEqual(with_profiler, without_profiler)
+
+    @override_settings(PROFILER_REPEAT_THRESHOLD=0)
+    def test_profile_requests_dumps_flagged_queries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / "profile.json"
+            out = StringIO()
+            with self.assertLogs("src.monitoring.profiler", "WARNING"):
+                call_command("profile_requests", f"/api/v1/listings/{self.listings[0].pk}/", output=str(output), stdout=out)
+            dumped = json.loads(output.read_text(encoding="utf-8"))
+
+        self.assertIn(f"Wrote {len(dumped)} flagged queries", out.getvalue())
+        self.assertTrue(dumped)
+        self.assertEqual(dumped, get_profile_buffer().entries())
+        self.assertEqual(
+            set(dumped[0]), {"kind", "recorded_at", "method", "path", "sql", "count", "duration_ms", "call_site", "explain"},
+        )
@@ -0,0 +1,40 @@
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from src.monitoring.metrics import registry
+from src.monitoring.profiler import get_profile_buffer
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsAPIView(APIView):
+    """
+    Метрики процесса в текстовом формате Prometheus (только администраторы).
+    Prozessmetriken im Prometheus-Textformat (nur Administratoren).
+    """
+    permission_classes = [IsAdminUser]
+    throttle_classes = []
+
+    def get(self, request: Request, *args, **kwargs) -> HttpResponse:
+        return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+class QueryProfileAPIView(APIView):
+    """
+    Отмеченные профайлером запросы процесса (?kind=slow|n_plus_one); DELETE очищает буфер.
+    Vom Profiler markierte Abfragen des Prozesses (?kind=slow|n_plus_one); DELETE leert den Puffer.
+    """
+    permission_classes = [IsAdminUser]
+    throttle_classes = []
+
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        entries = get_profile_buffer().entries(request.query_params.get("kind"))
+        return Response({"count": len(entries), "results": entries})
+
+    def delete(self, request: Request, *args, **kwargs) -> Response:
+        get_profile_buffer().clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,10 +1,11 @@
-from src.permissions.listings import IsLandlordOrAdmin
+from src.permissions.listings import IsLandlordOrAdmin, IsListingOwnerOrAdmin
 from src.permissions.users import IsAdminOrSelf, IsAnonymous
 from src.permissions.bookings import IsTenantOrLandlordOrAdmin
 from src.permissions.review import IsTenant
 
 __all__ = [
     'IsLandlordOrAdmin',
+    'IsListingOwnerOrAdmin',
     'IsAdminOrSelf',
     'IsAnonymous',
     'IsTenantOrLandlordOrAdmin',
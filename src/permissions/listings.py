@@ -24,4 +24,16 @@ class IsLandlordOrAdmin(BasePermission):
         if request.user.is_staff:
             return True
         # арендодатель может редактировать только свои объявления
-        return obj.landlord == request.user
\ No newline at end of file
+        return obj.landlord == request.user
+
+class IsListingOwnerOrAdmin(BasePermission):
+    """
+    Доступ только владельцу объявления и администраторам (в том числе на чтение).
+    """
+    def has_permission(self, request, view):
+        return request.user.is_authenticated
+
+    def has_object_permission(self, request, view, obj):
+        if request.user.is_staff:
+            return True
+        return obj.landlord_id == request.user.id
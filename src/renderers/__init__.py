@@ -0,0 +1,5 @@
+from src.renderers.fast_json import FastJSONRenderer
+
+__all__ = [
+    'FastJSONRenderer'
+]
@@ -0,0 +1,39 @@
+import orjson
+from rest_framework.utils import encoders
+from rest_framework.renderers import JSONRenderer
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson для компактного вывода.
+    Вывод с отступами (?indent= / Browsable API) и ensure_ascii идут через json.
+
+    JSONRenderer auf Basis von orjson für kompakte Ausgabe.
+    Eingerückte Ausgabe (?indent= / Browsable API) und ensure_ascii laufen über json.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # типы вне orjson (Decimal, lazy-строки, ...) — через кодировщик DRF
+            # Typen außerhalb von orjson (Decimal, Lazy-Strings, ...) — über den DRF-Encoder
+            ret = orjson.dumps(
+                data,
+                default=encoders.JSONEncoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            # например, целые больше 64 бит / z. B. Ganzzahlen über 64 Bit
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # как JSONRenderer: \u2028 и \u2029 всегда экранируются
+        # wie JSONRenderer: \u2028 und \u2029 werden immer maskiert
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -1,5 +1,6 @@
 from django.urls import path, include
 from src.apartments.views import PopularSearchesAPIView, MySearchHistoryAPIView
+from src.monitoring.views import MetricsAPIView, QueryProfileAPIView
 
 app_name = 'EasyRent'
 urlpatterns = [
@@ -8,4 +9,6 @@ urlpatterns = [
     path('bookings/', include('src.booking.urls'), name='bookings'),
     path("search/popular/", PopularSearchesAPIView.as_view(), name="popular-searches"),
     path("search/my/", MySearchHistoryAPIView.as_view(), name="my-search-history"),
+    path("metrics/", MetricsAPIView.as_view(), name="metrics"),
+    path("metrics/queries/", QueryProfileAPIView.as_view(), name="query-profile"),
 ]
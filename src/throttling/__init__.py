@@ -0,0 +1,21 @@
+from src.throttling.buckets import LocalTokenBucket, RedisTokenBucket, get_bucket
+from src.throttling.throttles import (
+    TokenBucketThrottle,
+    AnonBrowseThrottle,
+    SearchThrottle,
+    LoginThrottle,
+    BookingCreateThrottle,
+    ThrottleFirstMixin
+)
+
+__all__ = [
+    'LocalTokenBucket',
+    'RedisTokenBucket',
+    'get_bucket',
+    'TokenBucketThrottle',
+    'AnonBrowseThrottle',
+    'SearchThrottle',
+    'LoginThrottle',
+    'BookingCreateThrottle',
+    'ThrottleFirstMixin'
+]
@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+
+logger = logging.getLogger(__name__)
+
+# Пополнение по времени сервера Redis (TIME), чтобы часы процессов не расходились
+# Auffüllen nach der Redis-Serverzeit (TIME), damit die Uhren der Prozesse nicht abweichen
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+else
+    wait = (requested - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(wait)}
+"""
+
+
+class LocalTokenBucket:
+    """
+    Token bucket в памяти процесса: capacity токенов, пополнение rate токенов
+    в секунду. Лимит — на процесс; ключи хранятся LRU, вытесненный ключ
+    начинает с полного ведра.
+
+    Token Bucket im Prozessspeicher: capacity Tokens, Auffüllung mit rate Tokens
+    pro Sekunde. Das Limit gilt pro Prozess; Schlüssel werden per LRU gehalten,
+    ein verdrängter Schlüssel beginnt mit vollem Eimer.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: int, rate: float, requested: int = 1) -> tuple[bool, float]:
+        """Возвращает (разрешено, секунд до нужных токенов) / Gibt (erlaubt, Sekunden bis genug Tokens) zurück"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= requested:
+                allowed, wait = True, 0.0
+                tokens -= requested
+            else:
+                allowed, wait = False, (requested - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisTokenBucket:
+    """
+    Тот же token bucket в хэше Redis: проверка и списание — один Lua-скрипт,
+    атомарно для всех процессов. При ошибке Redis решение принимает
+    локальное ведро процесса.
+
+    Derselbe Token Bucket in einem Redis-Hash: Prüfen und Abbuchen in einem
+    Lua-Skript, atomar für alle Prozesse. Bei einem Redis-Fehler entscheidet
+    der lokale Eimer des Prozesses.
+    """
+
+    def __init__(self, fallback: LocalTokenBucket):
+        self.fallback = fallback
+        self._script = None
+
+    @staticmethod
+    def is_available() -> bool:
+        return isinstance(caches["default"], RedisCache)
+
+    def consume(self, key: str, capacity: int, rate: float, requested: int = 1) -> tuple[bool, float]:
+        redis_key = cache.make_key(key)
+        try:
+            client = cache._cache.get_client(redis_key, write=True)
+            if self._script is None:
+                self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+            allowed, wait = self._script(keys=[redis_key], args=[capacity, rate, requested], client=client)
+        except Exception:
+            logger.warning("Redis token bucket unavailable, using the local bucket", exc_info=True)
+            return self.fallback.consume(key, capacity, rate, requested)
+        return bool(allowed), float(wait)
+
+    def clear(self) -> None:
+        self.fallback.clear()
+
+
+_bucket = None
+
+
+def get_bucket():
+    """
+    Ведро в Redis, если кэш на Redis, иначе в памяти процесса.
+    Eimer in Redis, falls der Cache auf Redis läuft, sonst im Prozessspeicher.
+    """
+    global _bucket
+    if _bucket is None:
+        local = LocalTokenBucket(getattr(settings, "THROTTLE_LOCAL_MAX_KEYS", 10000))
+        _bucket = RedisTokenBucket(local) if RedisTokenBucket.is_available() else local
+    return _bucket
@@ -0,0 +1,121 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from src.apartments.models import Listing
+from src.benchmark import QueryBudgetTestCase
+from src.choices import UserRole
+from src.throttling import LocalTokenBucket, TokenBucketThrottle, get_bucket
+
+RATES = {"anon_browse": "1/min", "search": None, "login": "2/min", "booking_create": "1/hour"}
+
+
+class LocalTokenBucketTests(SimpleTestCase):
+    """Пополнение и всплеск ведра в памяти / Auffüllen und Burst des Eimers im Speicher"""
+
+    def setUp(self):
+        patcher = mock.patch("src.throttling.buckets.time.monotonic", return_value=1000.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tick(self, seconds: float):
+        self.clock.return_value += seconds
+
+    def test_burst_up_to_capacity_then_wait(self):
+        bucket = LocalTokenBucket()
+
+        # 3 токена, 1 токен в 2 секунды / 3 Tokens, 1 Token pro 2 Sekunden
+        for _ in range(3):
+            self.assertEqual(bucket.consume("k", capacity=3, rate=0.5), (True, 0.0))
+        self.assertEqual(bucket.consume("k", capacity=3, rate=0.5), (False, 2.0))
+        self.assertTrue(bucket.consume("other", capacity=3, rate=0.5)[0])
+
+    def test_refill_is_capped_at_capacity(self):
+        bucket = LocalTokenBucket()
+        for _ in range(3):
+            bucket.consume("k", capacity=3, rate=0.5)
+
+        self.tick(1)
+        allowed, wait = bucket.consume("k", capacity=3, rate=0.5)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 1.0)
+
+        self.tick(1)
+        self.assertTrue(bucket.consume("k", capacity=3, rate=0.5)[0])
+
+        self.tick(3600)
+        self.assertEqual(sum(bucket.consume("k", capacity=3, rate=0.5)[0] for _ in range(5)), 3)
+
+    def test_least_recently_used_key_is_evicted(self):
+        bucket = LocalTokenBucket(max_keys=2)
+        bucket.consume("a", capacity=1, rate=0.1)
+        bucket.consume("b", capacity=1, rate=0.1)
+        bucket.consume("c", capacity=1, rate=0.1)
+
+        # вытесненный ключ начинает с полного ведра / ein verdrängter Schlüssel beginnt mit vollem Eimer
+        self.assertTrue(bucket.consume("a", capacity=1, rate=0.1)[0])
+        self.assertFalse(bucket.consume("c", capacity=1, rate=0.1)[0])
+
+
+@override_settings(THROTTLE_ENABLED=True, PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+@mock.patch.object(TokenBucketThrottle, "THROTTLE_RATES", RATES)
+class ThrottleTests(QueryBudgetTestCase):
+    """429 и Retry-After на дорогих маршрутах / 429 und Retry-After auf teuren Routen"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = cls.make_user("throttle_tenant", UserRole.TENANT)
+        cls.listing = Listing.objects.create(
+            landlord=cls.make_user("throttle_landlord", UserRole.LANDLORD), title="Throttle", description="",
+            location="Berlin", price=100, rooms=2, housing_type="apartment",
+        )
+
+    def setUp(self):
+        get_bucket().clear()
+        self.addCleanup(get_bucket().clear)
+
+    def login(self):
+        return self.client.post("/api/v1/users/login/", {"username": "nobody", "password": "wrong"}, format="json")
+
+    def book(self, client, start_date):
+        payload = {"listing": self.listing.pk, "start_date": start_date, "end_date": "2031-02-28"}
+        return client.post("/api/v1/bookings/", payload, format="json")
+
+    def test_login_is_throttled_per_ip(self):
+        self.assertEqual([self.login().status_code for _ in range(2)], [401, 401])
+
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
+
+    def test_booking_create_is_throttled_per_user(self):
+        client = self.client_for(self.tenant)
+        self.assertEqual(self.book(client, "2031-02-01").status_code, 201)
+
+        response = self.book(client, "2031-02-10")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "3600")
+        # чтение не ограничено этим ведром / Lesen ist von diesem Eimer nicht begrenzt
+        self.assertEqual(client.get("/api/v1/bookings/").status_code, 200)
+
+    def test_throttled_request_makes_no_queries(self):
+        self.assertEqual(self.client.get("/api/v1/listings/").status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/v1/listings/").status_code, 429)
+
+        client = self.client_for(self.tenant)
+        self.assertEqual(self.book(client, "2031-02-01").status_code, 201)
+        # ни эпохи токена, ни пользователя / weder Token-Epoche noch Benutzer
+        with self.assertNumQueries(0):
+            self.assertEqual(self.book(client, "2031-02-10").status_code, 429)
+
+    def test_authenticated_reads_skip_anonymous_bucket(self):
+        client = self.client_for(self.tenant)
+        self.assertEqual({client.get("/api/v1/listings/").status_code for _ in range(3)}, {200})
+
+    @override_settings(THROTTLE_ENABLED=False)
+    def test_disabled_throttling_lets_everything_through(self):
+        self.assertEqual({self.login().status_code for _ in range(5)}, {401})
+        client = self.client_for(self.tenant)
+        self.assertEqual(self.book(client, "2031-02-01").status_code, 201)
+        self.assertNotEqual(self.book(client, "2031-02-10").status_code, 429)
@@ -0,0 +1,155 @@
+from typing import Optional
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from src.authentication.services import RequestTokenService
+from src.throttling.buckets import get_bucket
+
+
+def has_session(request) -> bool:
+    """Сессионная аутентификация требует БД / Die Sitzungsauthentifizierung braucht die DB"""
+    return settings.SESSION_COOKIE_NAME in request.COOKIES
+
+
+def token_user_id(request) -> Optional[str]:
+    """
+    id пользователя из Bearer-токена без БД (подпись и срок проверяются);
+    разобранный токен запоминается для RoleJWTAuthentication.
+
+    Benutzer-ID aus dem Bearer-Token ohne DB (Signatur und Ablauf werden geprüft);
+    das geparste Token wird für RoleJWTAuthentication gemerkt.
+    """
+    parts = request.META.get("HTTP_AUTHORIZATION", "").split()
+    if len(parts) != 2 or parts[0] not in jwt_settings.AUTH_HEADER_TYPES:
+        return None
+    raw = parts[1]
+    token = RequestTokenService.recall(request._request, raw)
+    if token is None:
+        try:
+            token = AccessToken(raw)
+        except TokenError:
+            return None
+        RequestTokenService.remember(request._request, raw, token)
+    return token.get(jwt_settings.USER_ID_CLAIM)
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Троттлинг token bucket вместо скользящего окна SimpleRateThrottle:
+    ставка "N/period" — ведро на N токенов, пополняемое на N за period.
+    Ключ считается без БД (IP или id из JWT), а ThrottleFirstMixin проверяет
+    ведра до аутентификации, поэтому отказ 429 не делает ни одного запроса.
+
+    Token-Bucket-Drosselung statt des gleitenden Fensters von SimpleRateThrottle:
+    die Rate "N/period" ist ein Eimer mit N Tokens, der um N pro period aufgefüllt
+    wird. Der Schlüssel wird ohne DB berechnet (IP oder ID aus dem JWT), und
+    ThrottleFirstMixin prüft die Eimer vor der Authentifizierung, daher macht
+    die Ablehnung 429 keine einzige Abfrage.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._wait = None
+
+    def applies(self, request, view) -> bool:
+        return True
+
+    @staticmethod
+    def user_key(request) -> Optional[str]:
+        """id из JWT или, при сессии, из request.user / ID aus dem JWT oder bei einer Sitzung aus request.user"""
+        user_id = token_user_id(request)
+        if user_id is not None:
+            return str(user_id)
+        if has_session(request) and request.user and request.user.is_authenticated:
+            return str(request.user.pk)
+        return None
+
+    def get_ident_key(self, request) -> str:
+        user_id = self.user_key(request)
+        if user_id is not None:
+            return f"user:{user_id}"
+        return f"ip:{self.get_ident(request)}"
+
+    def get_cache_key(self, request, view):
+        if not self.applies(request, view):
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident_key(request)}
+
+    def allow_request(self, request, view) -> bool:
+        if not getattr(settings, "THROTTLE_ENABLED", True) or self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        allowed, self._wait = get_bucket().consume(
+            key, capacity=self.num_requests, rate=self.num_requests / self.duration
+        )
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class AnonBrowseThrottle(TokenBucketThrottle):
+    """Чтение без аутентификации / Lesezugriffe ohne Authentifizierung"""
+    scope = "anon_browse"
+
+    def applies(self, request, view) -> bool:
+        return request.method in SAFE_METHODS and self.user_key(request) is None
+
+
+class SearchThrottle(TokenBucketThrottle):
+    """Запросы с ?search= (каждый пишет в журнал поиска) / Anfragen mit ?search= (jede schreibt ins Suchprotokoll)"""
+    scope = "search"
+
+    def applies(self, request, view) -> bool:
+        return bool(request.query_params.get("search", "").strip())
+
+
+class LoginThrottle(TokenBucketThrottle):
+    """Попытки входа с одного IP (хеширование пароля) / Anmeldeversuche pro IP (Passwort-Hashing)"""
+    scope = "login"
+
+    def applies(self, request, view) -> bool:
+        return request.method == "POST"
+
+    def get_ident_key(self, request) -> str:
+        return f"ip:{self.get_ident(request)}"
+
+
+class BookingCreateThrottle(TokenBucketThrottle):
+    """Создание бронирований / Erstellen von Buchungen"""
+    scope = "booking_create"
+
+    def applies(self, request, view) -> bool:
+        return getattr(view, "action", None) == "create"
+
+
+class ThrottleFirstMixin:
+    """
+    Проверяет ведра до аутентификации (в APIView.initial DRF делает это после
+    неё и проверки прав): отказ 429 не читает эпоху токена и пользователя.
+    Запросы с сессионной cookie идут в обычном порядке — их ключ требует БД.
+
+    Prüft die Eimer vor der Authentifizierung (in APIView.initial tut DRF das nach
+    ihr und der Rechteprüfung): eine Ablehnung 429 liest weder Token-Epoche noch
+    Benutzer. Anfragen mit Sitzungs-Cookie laufen in der üblichen Reihenfolge —
+    ihr Schlüssel braucht die DB.
+    """
+
+    def perform_authentication(self, request):
+        if not has_session(request):
+            self.check_throttles(request)
+        super().perform_authentication(request)
+
+    def check_throttles(self, request):
+        # один раз за запрос / einmal pro Anfrage
+        if getattr(request, "_throttles_checked", False):
+            return
+        request._throttles_checked = True
+        super().check_throttles(request)